@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+"""
+Benchmark keyframes() extraction modes on synthetic screen recordings.
+
+Usage
+-----
+poetry run python scripts/bench_keyframes.py
+poetry run python scripts/bench_keyframes.py --lengths 10 60 600 --fps 30 60
+"""
+
+from __future__ import annotations
+import argparse, sys, tempfile, time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+from bugbot.preprocess.vision import keyframes  # noqa: E402
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--lengths", type=float, nargs="+", default=[10, 60, 180],
+                    help="video lengths in seconds")
+parser.add_argument("--fps", type=int, nargs="+", default=[30, 60])
+parser.add_argument("--size", type=int, nargs=2, default=[1280, 720],
+                    metavar=("W", "H"))
+parser.add_argument("--every", type=float, default=2.0)
+parser.add_argument("--repeat", type=int, default=3)
+args = parser.parse_args()
+
+
+def synth(path: Path, seconds: float, fps: int, size: tuple[int, int]) -> None:
+    """A mostly static 'desktop' with a moving cursor box and a frame counter."""
+    w, h = size
+    base = np.full((h, w, 3), 235, np.uint8)
+    cv2.rectangle(base, (40, 40), (w - 40, h - 40), (180, 180, 180), 2)
+    out = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), fps, size)
+    for i in range(int(seconds * fps)):
+        frame = base.copy()
+        x = 60 + (i * 7) % (w - 160)
+        cv2.rectangle(frame, (x, h // 2), (x + 40, h // 2 + 40), (40, 40, 200), -1)
+        cv2.putText(frame, str(i), (60, 100), cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 0, 0), 3)
+        out.write(frame)
+    out.release()
+
+
+def best_of(fn, n: int) -> float:
+    times = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+print(f"{'length':>7} {'fps':>4} {'decode':>9} {'grab':>9} {'seek':>9} {'speed-up':>9}")
+with tempfile.TemporaryDirectory() as tmp:
+    for seconds in args.lengths:
+        for fps in args.fps:
+            vid = Path(tmp) / f"v_{seconds}_{fps}.mp4"
+            synth(vid, seconds, fps, tuple(args.size))
+            ref = keyframes(vid, every=args.every, mode="decode")
+            res = {}
+            for mode in ("decode", "grab", "seek"):
+                assert keyframes(vid, every=args.every, mode=mode) == ref, mode
+                res[mode] = best_of(
+                    lambda: keyframes(vid, every=args.every, mode=mode), args.repeat
+                )
+            print(f"{seconds:>6.0f}s {fps:>4} "
+                  f"{res['decode']:>8.3f}s {res['grab']:>8.3f}s {res['seek']:>8.3f}s "
+                  f"{res['decode'] / res['seek']:>8.1f}x")
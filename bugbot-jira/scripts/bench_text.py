@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+"""
+Benchmark clean_freeform / clean_freeform_many against the previous
+multi-pass implementation on realistic note shapes.
+
+Usage
+-----
+poetry run python scripts/bench_text.py
+poetry run python scripts/bench_text.py --notes 500 --repeat 5
+"""
+
+from __future__ import annotations
+import argparse, random, re, sys, time, unicodedata
+from pathlib import Path
+
+import emoji
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+from bugbot.preprocess.text import clean_freeform, clean_freeform_many  # noqa: E402
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--notes", type=int, default=200, help="notes per batch")
+parser.add_argument("--repeat", type=int, default=3)
+args = parser.parse_args()
+
+
+def reference(raw: str) -> str:
+    """clean_freeform as it was: every step allocates a full-size copy."""
+    text = unicodedata.normalize("NFKC", raw)
+    text = emoji.demojize(text, delimiters=(":", ":"))
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    return re.sub(r"\s+", " ", text.lower()).strip()
+
+
+FRAME = '  File "/srv/app/handlers/{m}.py", line {n}, in handle_{m}\n    result = self.{m}(request)\n'
+rng = random.Random(0)
+
+
+def stack_trace(frames: int) -> str:
+    mods = ["save", "load", "render", "sync", "auth"]
+    body = "".join(FRAME.format(m=rng.choice(mods), n=rng.randint(1, 999)) for _ in range(frames))
+    return f"Traceback (most recent call last):\n{body}ValueError: bad payload\n"
+
+
+SHAPES = {
+    "short ascii (~120 B)": lambda: "Clicking Save on the profile page does nothing, console shows 500.",
+    "short emoji (~120 B)": lambda: "OMG 😱 Page CRASHED!!! after I tapped ✅ on the café settings – again 🙄",
+    "trace ascii (~20 KB)": lambda: "Crash on save, log below:\n" + stack_trace(150),
+    "trace + emoji (~20 KB)": lambda: "Crash 💥 on save, log below:\n" + stack_trace(150),
+}
+
+print(f"{'shape':<24} {'old':>9} {'new':>9} {'many':>9} {'speed-up':>9}")
+for label, make in SHAPES.items():
+    notes = [make() for _ in range(args.notes)]
+    ref = [reference(n) for n in notes]
+    assert [clean_freeform(n) for n in notes] == ref, label
+    assert clean_freeform_many(notes) == ref, label
+
+    def best(fn) -> float:
+        times = []
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - t0)
+        return min(times)
+
+    old = best(lambda: [reference(n) for n in notes])
+    new = best(lambda: [clean_freeform(n) for n in notes])
+    many = best(lambda: clean_freeform_many(notes))
+    print(f"{label:<24} {old * 1e3:>7.1f}ms {new * 1e3:>7.1f}ms {many * 1e3:>7.1f}ms "
+          f"{old / min(new, many):>8.1f}x")
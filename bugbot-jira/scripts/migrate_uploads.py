@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+"""
+Move pre-store flat uploads (``<uuid>.<ext>`` directly in UPLOAD_DIR) into
+the content-addressed store, dropping duplicate copies.
+
+Drafts and undelivered pushes that still name a flat file lose that
+attachment, so run it once no such push is pending.
+
+Usage
+-----
+poetry run python scripts/migrate_uploads.py            # dry run
+poetry run python scripts/migrate_uploads.py --apply
+"""
+
+from __future__ import annotations
+import argparse, hashlib, sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+from bugbot.ingress.store import get_store, is_content_id  # noqa: E402
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--apply", action="store_true", help="move files (default: report only)")
+args = parser.parse_args()
+
+store = get_store()
+flat = [p for p in store.root.iterdir()
+        if p.is_file() and not p.name.startswith("index.sqlite3") and not is_content_id(p.name)]
+seen: dict[str, int] = {}
+before = 0
+for p in flat:
+    data = p.read_bytes()
+    digest = hashlib.sha256(data).hexdigest()
+    before += len(data)
+    seen.setdefault(digest, len(data))
+    if args.apply:
+        store.commit(p, digest, p.suffix, len(data))
+
+after = sum(seen.values())
+print(f"{len(flat)} flat files, {before / 1e6:.1f} MB → "
+      f"{len(seen)} blobs, {after / 1e6:.1f} MB"
+      + ("" if args.apply else "  (dry run; --apply to move)"))
@@ -11,6 +11,118 @@ class Settings(BaseSettings):
     jira_user:    str | None = None
     jira_token:   str | None = None
     jira_project: str | None = None
+    jira_max_connections: int = 10
+    jira_timeout: float = 30.0           # seconds per request
+    jira_retries: int = 4                # on 429/5xx and connection errors
+    jira_backoff: float = 0.5            # seconds, doubled per retry
+    jira_attach_concurrency: int = 4     # attachment uploads at once
+    jira_bulk_size: int = 50             # issues per /issue/bulk call (Jira's cap)
+    jira_search_settle: float = 30.0     # seconds before search sees a new issue
+
+    # durable /push outbox (bugbot.jira.outbox)
+    outbox_path: str = ".cache/outbox.sqlite3"
+    outbox_workers: int = 2
+    outbox_max_attempts: int = 8
+    outbox_backoff: float = 2.0          # seconds, doubled per attempt
+    outbox_max_backoff: float = 300.0
+    outbox_lease: float = 120.0          # seconds a claim holds without renewal
+
+    # draft cache in front of complete_many
+    cache_backend: str = "memory"        # memory | disk | off
+    cache_dir: str = ".cache/drafts"
+    cache_max_entries: int = 512
+    cache_ttl: float = 3600.0            # seconds
+
+    # "all": one draft per backend (complete_many); "hedged": a single
+    # draft from whichever backend answers first (complete_hedged)
+    llm_mode: str = "all"
+    # hedged completion: fire the next backend once the current one is
+    # slower than its own latency percentile
+    hedge_percentile: float = 0.95
+    hedge_percentiles: dict[str, float] = {}   # per-backend override
+    hedge_default_delay: float = 2.0     # seconds, until enough samples
+    hedge_min_samples: int = 20
+
+    # per-backend circuit breaker
+    breaker_window: int = 20             # last N calls considered
+    breaker_min_calls: int = 5
+    breaker_error_rate: float = 0.5      # failed-or-slow share that trips
+    breaker_slow_call: float = 30.0      # seconds; slower counts as failure
+    breaker_cooldown: float = 30.0       # seconds open before half-open probe
+
+    # image/video preprocessing executor
+    preprocess_executor: str = "thread"  # thread | process
+    preprocess_workers: int = 4
+    preprocess_concurrency: int = 8      # files processed at once
+
+    # video keyframes: fixed "interval" sampling or content-aware "scene"
+    keyframe_strategy: str = "interval"
+    scene_threshold: float = 4.0         # mean abs grey diff, 0-255
+
+    # log-aware note compaction before the prompt (bugbot.preprocess.compact)
+    compact_notes: bool = True
+    compact_keep_frames: int = 3         # first/last frames kept per trace
+    note_token_budget: int = 2000        # cap on the note's tokens; 0 = none
+
+    # uploads
+    upload_dir: str = "uploads"
+    upload_max_bytes: int = 200 * 1024 * 1024       # per file
+    upload_max_request: int = 512 * 1024 * 1024     # whole multipart body
+    # content-addressed upload store GC (bugbot.ingress.store); blobs held
+    # by an undelivered push are never collected
+    upload_gc_interval: float = 3600.0   # seconds; 0 = off
+    upload_gc_max_age: float = 14 * 86400.0         # unreferenced + idle this long
+    upload_gc_max_bytes: int = 2 * 1024 ** 3        # then LRU down to this
+
+    # drafts held server-side while the tester reviews them (postprocess.hitl);
+    # one SQLite file shared by every worker process
+    draft_session_path: str = ".cache/sessions.sqlite3"
+    draft_session_ttl: float = 86400.0   # seconds since last use
+    draft_session_max: int = 10_000
+
+    # background /jobs workers
+    job_workers: int = 4
+    job_ttl: float = 3600.0              # finished jobs kept this long
+
+    # consume vendor token streams and stop at the draft's closing brace
+    llm_stream: bool = True
+    # vendor-native JSON schema / forced tool call derived from ReportOut
+    llm_structured: bool = True
+
+    # shared LLM transport (bugbot.llm.client)
+    llm_max_connections: int = 32
+    llm_max_keepalive: int = 16
+    llm_keepalive_expiry: float = 30.0   # seconds an idle connection is kept
+    llm_connect_timeout: float = 5.0
+    llm_read_timeout: float = 60.0       # between bytes, not whole call
+    llm_total_timeout: float = 90.0      # whole call incl. streaming
+    llm_concurrency: int = 8             # in-flight calls per backend
+    llm_concurrency_per_backend: dict[str, int] = {}
+    llm_executor_workers: int = 4        # threads for blocking SDK calls
+    llm_payload_log: str | None = None   # DEBUG log of full LLM payloads; off if unset
+
+    # per-backend admission control (0 = unlimited); overrides e.g.
+    # RATE_LIMITS='{"gpt-4o-mini": {"rpm": 500, "tpm": 200000}}'
+    rate_rpm: float = 0
+    rate_tpm: float = 0
+    rate_limits: dict[str, dict] = {}
+    rate_queue_timeout: float = 20.0     # longest wait before refusing (503)
+
+    # duplicate-ticket detection (bugbot.dedup)
+    dedup_backend: str = "memory"        # memory | pgvector | off
+    dedup_embedder: str = "hashing"      # hashing | openai
+    dedup_dim: int = 384
+    dedup_path: str = ".cache/dedup.npz" # memory backend snapshot (+ .log journal); "" = none
+    dedup_dsn: str | None = None         # postgresql://… for pgvector
+    dedup_top_k: int = 3
+    dedup_threshold: float = 0.6         # cosine; raise for semantic embedders
+
+    # build NLTK / SDK clients / Jira session on a thread at start-up
+    warmup: bool = True
+
+    # per-backend ImagePolicy overrides, e.g.
+    # IMAGE_POLICIES='{"gpt-4o-mini": {"max_edge": 1024, "grayscale": "auto"}}'
+    image_policies: dict[str, dict] = {}
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
@@ -0,0 +1,17 @@
+from .embed import Embedder, HashingEmbedder, OpenAIEmbedder, get_embedder
+from .finder import find_duplicates, record_ticket, ticket_text
+from .index import NumpyIndex, PgVectorIndex, VectorIndex, get_index
+
+__all__ = [
+    "Embedder",
+    "HashingEmbedder",
+    "OpenAIEmbedder",
+    "get_embedder",
+    "find_duplicates",
+    "record_ticket",
+    "ticket_text",
+    "NumpyIndex",
+    "PgVectorIndex",
+    "VectorIndex",
+    "get_index",
+]
@@ -0,0 +1,89 @@
+"""
+Text embedders for duplicate detection.
+
+``HashingEmbedder`` is a dependency-free feature-hashing model (word
+unigrams + bigrams, signed buckets, log term frequency) – deterministic
+across processes, good enough for near-identical bug notes, and what the
+tests and single-node deployments use. ``OpenAIEmbedder`` calls the
+embeddings API over the shared LLM transport.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Protocol, Sequence
+
+import numpy as np
+
+from bugbot.config import get_settings
+
+_WORD_RE = re.compile(r"\w+")
+
+
+class Embedder(Protocol):
+    dim: int
+
+    async def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Return an ``(len(texts), dim)`` float32 array of unit vectors."""
+        ...
+
+
+def _normalise(vecs: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vecs, axis=1, keepdims=True)
+    return vecs / np.where(norms == 0, 1, norms)
+
+
+class HashingEmbedder:
+    def __init__(self, dim: int = 384) -> None:
+        self.dim = dim
+
+    def _features(self, text: str) -> Counter[str]:
+        words = _WORD_RE.findall(text.lower())
+        return Counter(words + [f"{a} {b}" for a, b in zip(words, words[1:])])
+
+    def _vector(self, text: str) -> np.ndarray:
+        vec = np.zeros(self.dim, np.float32)
+        for feat, tf in self._features(text).items():
+            h = int.from_bytes(hashlib.blake2b(feat.encode(), digest_size=8).digest(), "little")
+            vec[h % self.dim] += (1.0 if h >> 63 else -1.0) * (1.0 + math.log(tf))
+        return vec
+
+    async def embed(self, texts: Sequence[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dim), np.float32)
+        return _normalise(np.stack([self._vector(t) for t in texts]))
+
+
+class OpenAIEmbedder:
+    def __init__(self, model: str = "text-embedding-3-small", dim: int = 1536) -> None:
+        import openai
+        from bugbot.llm.client import get_transport
+
+        self.model = model
+        self.dim = dim
+        self._client = openai.AsyncOpenAI(
+            api_key=get_settings().openai_key, http_client=get_transport().http
+        )
+
+    async def embed(self, texts: Sequence[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dim), np.float32)
+        resp = await self._client.embeddings.create(
+            model=self.model, input=list(texts), dimensions=self.dim
+        )
+        return _normalise(np.array([d.embedding for d in resp.data], np.float32))
+
+
+@lru_cache
+def get_embedder() -> Embedder:
+    """Process-wide embedder built from settings."""
+    s = get_settings()
+    if s.dedup_embedder == "openai":
+        return OpenAIEmbedder(dim=s.dedup_dim)
+    if s.dedup_embedder == "hashing":
+        return HashingEmbedder(dim=s.dedup_dim)
+    raise ValueError(f"unknown dedup embedder {s.dedup_embedder!r}")
@@ -0,0 +1,61 @@
+"""
+Look up likely duplicates of a note, and remember tickets once filed.
+
+Both sides embed the same kind of text: a lookup embeds the tester's
+cleaned note, and a filed ticket is indexed by the cleaned note it was
+drafted from. Only tickets filed without one (e.g. through the JSON
+push API) fall back to ``ticket_text`` of the draft.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict
+
+from bugbot.config import get_settings
+from bugbot.dedup.embed import get_embedder
+from bugbot.dedup.index import get_index
+from bugbot.ingress.schemas import Duplicate
+
+log = logging.getLogger(__name__)
+
+
+def ticket_text(draft: Dict[str, Any]) -> str:
+    """What gets embedded for a filed ticket whose source note is unknown."""
+    return "\n".join([draft.get("title", ""), draft.get("actual", ""), *draft.get("steps", [])])
+
+
+async def find_duplicates(text: str) -> list[Duplicate]:
+    """Filed tickets similar to *text*; never raises (drafting must go on)."""
+    if not text.strip():
+        return []
+    s = get_settings()
+    try:
+        index = get_index()             # a misconfigured backend raises here
+        if index is None:
+            return []
+        [vec] = await get_embedder().embed([text])
+        hits = await index.search(vec, s.dedup_top_k)
+    except Exception as exc:
+        log.warning("duplicate lookup failed: %s", exc)
+        return []
+    return [
+        Duplicate(key=key, title=title, score=round(score, 3))
+        for key, title, score in hits
+        if score >= s.dedup_threshold
+    ]
+
+
+async def record_ticket(key: str, draft: Dict[str, Any], note: str = "") -> None:
+    """
+    Add a newly created issue to the index so later reports can match it;
+    *note* is the cleaned note the draft came from.
+    """
+    try:
+        index = get_index()
+        if index is None:
+            return
+        [vec] = await get_embedder().embed([note.strip() or ticket_text(draft)])
+        await index.add(key, draft.get("title", ""), vec)
+    except Exception as exc:
+        log.warning("could not index %s for duplicate detection: %s", key, exc)
@@ -1,13 +1,75 @@
 from __future__ import annotations
-from fastapi import FastAPI, File, UploadFile, Form
-from bugbot.ingress.schemas import TicketChoice
+import asyncio
+import math
+import threading
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, File, UploadFile, Form, Query, Request, HTTPException
+from fastapi.responses import JSONResponse
+from bugbot.config import get_settings
+from bugbot.ingress.schemas import PushItem, TicketChoice
+from bugbot.ingress.push   import queue_pushes
 from bugbot.ingress.logic  import generate_drafts
-from bugbot.ingress        import ui
+from bugbot.ingress        import ui, ws
+from bugbot.ingress.jobs   import get_jobs
+from bugbot.ingress.uploads import ingest_many
+from bugbot.ingress.store  import get_store, run_gc
+from bugbot.llm            import selector
+from bugbot.llm.client     import get_transport
+from bugbot.jira.client    import get_jira
+from bugbot.jira.outbox    import get_outbox
+from bugbot.dedup          import get_index
+from bugbot.llm.health     import scoreboard
+from bugbot.llm.ratelimit  import RateLimited
+from bugbot.preprocess     import COMPACTION_STATS
+from bugbot.preprocess.pool import get_pool
+from bugbot.warmup         import warm_up
 import logging
 logging.basicConfig(level=logging.DEBUG)
 
-app = FastAPI(title="BugBot API", version="0.1.0")   # ① create app first
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if get_settings().warmup:                        # don't block worker start
+        threading.Thread(target=warm_up, name="bugbot-warmup", daemon=True).start()
+    get_outbox().start()                             # resume undelivered pushes
+    interval = get_settings().upload_gc_interval
+    gc = asyncio.create_task(run_gc(interval)) if interval else None
+    yield
+    if gc is not None:
+        gc.cancel()
+    await get_jobs().stop()                          # cancel background workers
+    await get_outbox().stop()
+    await get_transport().aclose()                   # drop pooled LLM connections
+    if get_jira.cache_info().currsize:
+        await get_jira().aclose()                    # and the Jira session
+    if (index := get_index()) is not None:
+        await index.close()                          # persist / disconnect
+    get_pool().shutdown()                            # reap preprocess workers
+
+
+app = FastAPI(title="BugBot API", version="0.1.0", lifespan=lifespan)  # ① create app first
 app.include_router(ui.router)                        # ② mount UI pages
+app.include_router(ws.router)                        #    + job WebSocket
+
+
+@app.exception_handler(RateLimited)
+async def rate_limited(request: Request, exc: RateLimited):
+    # backpressure: every backend is saturated past the queue deadline
+    return JSONResponse(
+        {"detail": str(exc)},
+        status_code=503,
+        headers={"Retry-After": str(math.ceil(exc.retry_after))},
+    )
+
+
+@app.middleware("http")
+async def limit_request_size(request: Request, call_next):
+    # refuse oversized bodies before the multipart parser spools them
+    length = request.headers.get("content-length")
+    limit = get_settings().upload_max_request
+    if length and length.isdigit() and int(length) > limit:
+        return JSONResponse({"detail": f"request exceeds {limit} bytes"}, status_code=413)
+    return await call_next(request)
 
 
 @app.post(
@@ -18,11 +80,93 @@ app.include_router(ui.router)                        # ② mount UI pages
 async def create_report(
     note: str = Form(..., description="Free-form tester note"),
     files: list[UploadFile] = File(default=[]),
+    severity: str | None = Form(None, description="critical | major | minor; queue priority"),
+):
+    # Stream uploads to disk, then one call does everything:
+    # preprocess → LLMs → validation
+    stored = await ingest_many(files)
+    return await generate_drafts(note, [s.path for s in stored], severity=severity)   # ③
+
+
+@app.post(
+    "/jobs",
+    status_code=202,
+    summary="Queue draft generation; returns a job id at once",
+)
+async def submit_report_job(
+    note: str = Form(..., description="Free-form tester note"),
+    files: list[UploadFile] = File(default=[]),
+    severity: str | None = Form(None, description="critical | major | minor; queue priority"),
 ):
-    # One call does everything: preprocess → LLMs → validation
-    return await generate_drafts(note, files)        # ③
+    stored = await ingest_many(files)
+    job = get_jobs().submit(note, [s.path for s in stored], severity)
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "poll": f"/jobs/{job.id}",
+        "ws": f"/ws/jobs/{job.id}",
+    }
+
+
+@app.get("/jobs/{job_id}", summary="Poll a queued /jobs submission")
+async def get_report_job(job_id: str):
+    job = get_jobs().get(job_id)
+    if job is None:
+        raise HTTPException(404, "unknown job")
+    return job.summary()
+
+
+@app.post(
+    "/push/bulk",
+    status_code=202,
+    summary="Queue many edited drafts for JIRA; per-item delivery status",
+)
+async def push_bulk(
+    items: list[PushItem],
+    wait: float = Query(0, ge=0, le=60, description="seconds to wait for final results"),
+):
+    # one outbox batch → Jira bulk create + every attachment in parallel
+    try:
+        deliveries = queue_pushes([(i.vendor, i.draft, i.idempotency_key, i.note) for i in items])
+    except ValueError as exc:                        # bad attachment reference
+        raise HTTPException(422, str(exc)) from None
+    if wait:
+        deliveries = await get_outbox().wait([d.id for d in deliveries], wait)
+    return {
+        "items": [d.summary() for d in deliveries],
+        "failed": sum(d.status == "failed" for d in deliveries),
+    }
 
 
 @app.get("/health", include_in_schema=False)
 async def health():
     return {"status": "ok"}
+
+
+@app.get("/health/backends", summary="Circuit-breaker state per LLM backend")
+async def health_backends():
+    return scoreboard([c.name for c in selector.get_clients()])
+
+
+@app.get("/health/preprocess", summary="Preprocessing queue depth, task timing and note compaction")
+async def health_preprocess():
+    return {
+        **get_pool().stats(),
+        "jobs_queued": get_jobs().depth(),
+        "compaction": COMPACTION_STATS.snapshot(),
+    }
+
+
+@app.get("/health/outbox", summary="Jira pushes by delivery status")
+async def health_outbox():
+    return get_outbox().stats()
+
+
+@app.get("/health/uploads", summary="Content-addressed upload store size and references")
+async def health_uploads():
+    return get_store().stats()
+
+
+@app.get("/health/transport", summary="Shared LLM connection pool and in-flight calls")
+async def health_transport():
+    return get_transport().stats()
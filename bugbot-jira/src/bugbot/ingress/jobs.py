@@ -0,0 +1,158 @@
+"""
+Background job mode for /report.
+
+``POST /jobs`` stores the uploads and returns a job id immediately; a fixed
+pool of asyncio workers runs preprocessing + ``complete_many`` so draft
+throughput is bounded by ``job_workers``, not by open HTTP connections.
+Results can be polled (``GET /jobs/{id}``) or streamed per vendor over the
+WebSocket in ``bugbot.ingress.ws``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict
+
+from bugbot.config import get_settings
+from bugbot.ingress.logic import generate_drafts
+from bugbot.ingress.schemas import TicketChoice
+
+log = logging.getLogger(__name__)
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+@dataclass
+class Job:
+    id: str
+    note: str
+    files: list[Path]
+    severity: str | None = None
+    status: str = QUEUED
+    created: float = field(default_factory=time.time)
+    finished: float | None = None
+    drafts: list[TicketChoice] = field(default_factory=list)
+    error: str | None = None
+    _listeners: list[asyncio.Queue] = field(default_factory=list, repr=False)
+
+    @property
+    def is_final(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "drafts": [t.model_dump() for t in self.drafts],
+            "error": self.error,
+        }
+
+    def _publish(self, event: Dict[str, Any]) -> None:
+        for q in self._listeners:
+            q.put_nowait(event)
+
+
+class JobQueue:
+    def __init__(self, *, workers: int = 4, ttl: float = 3600.0) -> None:
+        self.workers = workers
+        self.ttl = ttl
+        self.jobs: dict[str, Job] = {}
+        self._queue: asyncio.Queue[Job] | None = None
+        self._tasks: list[asyncio.Task] = []
+
+    # ── lifecycle ────────────────────────────────────────────────────
+    def _ensure_started(self) -> asyncio.Queue[Job]:
+        if self._queue is None or not self._tasks or all(t.done() for t in self._tasks):
+            self._queue = asyncio.Queue()
+            self._tasks = [
+                asyncio.create_task(self._worker()) for _ in range(self.workers)
+            ]
+        return self._queue
+
+    async def stop(self) -> None:
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    # ── public API ───────────────────────────────────────────────────
+    def submit(self, note: str, files: list[Path], severity: str | None = None) -> Job:
+        self._expire()
+        job = Job(id=uuid.uuid4().hex, note=note, files=files, severity=severity)
+        self.jobs[job.id] = job
+        self._ensure_started().put_nowait(job)
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        return self.jobs.get(job_id)
+
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    async def events(self, job: Job) -> AsyncIterator[Dict[str, Any]]:
+        """Replay what is known about *job*, then stream until it is final."""
+        q: asyncio.Queue = asyncio.Queue()
+        replay, final = list(job.drafts), job.is_final   # snapshot + subscribe
+        job._listeners.append(q)                          # with no await between
+        try:
+            for t in replay:
+                yield {"event": "draft", "ticket": t.model_dump()}
+            if final:
+                yield {"event": job.status, "error": job.error}
+                return
+            while True:
+                event = await q.get()
+                yield event
+                if event["event"] in (DONE, FAILED):
+                    return
+        finally:
+            job._listeners.remove(q)
+
+    # ── internals ────────────────────────────────────────────────────
+    async def _worker(self) -> None:
+        queue = self._queue
+        while True:
+            job = await queue.get()
+            job.status = RUNNING
+            job._publish({"event": RUNNING})
+
+            async def _on_draft(ticket: TicketChoice, job: Job = job) -> None:
+                job.drafts.append(ticket)
+                job._publish({"event": "draft", "ticket": ticket.model_dump()})
+
+            async def _on_field(vendor: str, key: str, value: Any, job: Job = job) -> None:
+                # partial fields are live-only; replays start from whole drafts
+                job._publish({"event": "field", "vendor": vendor, "key": key, "value": value})
+
+            try:
+                await generate_drafts(
+                    job.note, job.files, severity=job.severity,
+                    on_draft=_on_draft, on_field=_on_field,
+                )
+                job.status = DONE
+            except Exception as exc:
+                log.exception("job %s failed", job.id)
+                job.status, job.error = FAILED, str(exc)
+            finally:
+                job.finished = time.time()
+                job._publish({"event": job.status, "error": job.error})
+                queue.task_done()
+
+    def _expire(self) -> None:
+        cutoff = time.time() - self.ttl
+        for jid in [j.id for j in self.jobs.values() if j.finished and j.finished < cutoff]:
+            del self.jobs[jid]
+
+
+@lru_cache
+def get_jobs() -> JobQueue:
+    """Process-wide job queue built from settings."""
+    s = get_settings()
+    return JobQueue(workers=s.job_workers, ttl=s.job_ttl)
@@ -1,57 +1,239 @@
 from __future__ import annotations
-from typing import List
+import asyncio
+import hashlib
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, List
 from pathlib import Path
 
-from bugbot.preprocess import clean_freeform, encode_screenshot, keyframes
+from bugbot.config import get_settings
+from bugbot.preprocess import (
+    COMPACTION_STATS, Attachment, clean_freeform, compact_note, keyframes,
+    load_attachment, scene_keyframes,
+)
+from bugbot.preprocess.pool import get_pool
 from bugbot.prompt     import build
-from bugbot.llm.selector import complete_many
-from bugbot.ingress.schemas import TicketChoice
+from bugbot.llm.selector import complete_hedged, complete_many
+from bugbot.llm.ratelimit import priority_for
+from bugbot.dedup import find_duplicates
+from bugbot.ingress.schemas import Duplicate, TicketChoice
+from bugbot.ingress.store import is_content_id
+
+log = logging.getLogger(__name__)
 
 # supported extensions
 _IMAGE_EXTS = {".png", ".jpg", ".jpeg", ".bmp", ".gif"}
 _VIDEO_EXTS = {".mp4", ".mov", ".avi", ".mkv", ".webm"}
 
-async def generate_drafts(
-    note: str,
-    files: list[Path],          # list of real upload Paths (images & videos)
-) -> list[TicketChoice]:
-    # 1) Text clean-up
-    cleaned = clean_freeform(note)
+ResultCallback = Callable[[str, dict], Awaitable[None]]
+FieldCallback = Callable[[str, str, Any], Awaitable[None]]
 
-    # 2) Vision prep: collect base64 frames & raw image bytes
-    b64_images: List[str] = []
-    raw_bytes:  List[bytes] = []
 
-    for p in files:
+# ────────────────────────────────────────────────────────────────────────
+# Single-flight: identical reports submitted while one is still being
+# drafted share its LLM fan-out instead of starting their own.
+# ────────────────────────────────────────────────────────────────────────
+@dataclass
+class _Flight:
+    task: asyncio.Task | None = None
+    results: list[tuple[str, dict]] = field(default_factory=list)
+    on_result: list[ResultCallback] = field(default_factory=list)
+    on_field: list[FieldCallback] = field(default_factory=list)
+    duplicates: list[Duplicate] = field(default_factory=list)
+    callers: int = 0
+
+    async def publish_result(self, vendor: str, draft: dict) -> None:
+        self.results.append((vendor, draft))
+        for cb in list(self.on_result):
+            await self._notify(self.on_result, cb, vendor, draft)
+
+    async def publish_field(self, vendor: str, key: str, value: Any) -> None:
+        for cb in list(self.on_field):
+            await self._notify(self.on_field, cb, vendor, key, value)
+
+    @staticmethod
+    async def _notify(subscribers: list, cb: Callable[..., Awaitable[None]], *args: Any) -> None:
+        """One caller's failing callback (e.g. its client left) drops only that caller."""
+        try:
+            await cb(*args)
+        except Exception:
+            log.warning("draft subscriber failed, unsubscribing it", exc_info=True)
+            if cb in subscribers:
+                subscribers.remove(cb)
+
+
+_INFLIGHT: dict[str, _Flight] = {}
+
+
+def _stored_digest(path: Path) -> str | None:
+    """SHA-256 named by an upload-store content ID, None for other files."""
+    return path.name.split(".", 1)[0] if is_content_id(path.name) else None
+
+
+def _digest(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+async def _draft_all(
+    flight: _Flight, cleaned: str, files: list[Path], severity: str | None
+) -> list[tuple[str, dict]]:
+    """Preprocess (+ duplicate lookup) → prompt → every LLM; results go to every caller of *flight*."""
+    # Vision prep, off the event loop and in parallel (bounded by the pool):
+    # collect base64 frames & shared image attachments
+    pool = get_pool()
+    settings = get_settings()
+
+    async def _prep(p: Path) -> tuple[List[str], List[Attachment]]:
         ext = p.suffix.lower()
         if ext in _IMAGE_EXTS:
-            # regular image: send the encoded screenshot + raw bytes
-            b64_images.append(encode_screenshot(p))
-            raw_bytes.append(p.read_bytes())
+            # regular image: read + encode once, shared by every backend
+            att = await pool.run(load_attachment, p, sha256=_stored_digest(p))
+            return [att.b64], [att]
+        if ext in _VIDEO_EXTS:
+            # video: extract keyframes as context, but no attachments
+            if settings.keyframe_strategy == "scene":
+                frames = await pool.run(
+                    scene_keyframes, p, threshold=settings.scene_threshold
+                )
+            else:
+                frames = await pool.run(keyframes, p, every=2.0)
+            return frames, []
+        # skip any other file types
+        return [], []
 
-        elif ext in _VIDEO_EXTS:
-            # video: extract keyframes as context, but no raw_bytes
-            frames = keyframes(p, every=2.0)
-            b64_images.extend(frames)
-
-        else:
-            # skip any other file types
-            continue
+    b64_images: List[str] = []
+    images:     List[Attachment] = []
+    prepped, flight.duplicates = await asyncio.gather(
+        asyncio.gather(*(_prep(p) for p in files)),
+        find_duplicates(cleaned),       # overlaps with the vision work
+    )
+    for frames, atts in prepped:
+        b64_images.extend(frames)
+        images.extend(atts)
 
-    # 3) Build prompt
+    # Build prompt
     prompt = build({
         "cleaned_text": cleaned,
         "b64_images":   b64_images,
     })
 
-    # 4) Dispatch to all LLM backends
-    results = await complete_many(prompt, image_bytes=raw_bytes)
+    if settings.llm_mode == "hedged":
+        # one draft, from whichever backend answers (and validates) first
+        try:
+            vendor, draft = await complete_hedged(
+                prompt, images=images,
+                on_field=flight.publish_field,
+                priority=priority_for(severity),
+            )
+        except RuntimeError as exc:     # every backend failed
+            vendor, draft = "hedged", {"error": str(exc)}
+        await flight.publish_result(vendor, draft)
+        return [(vendor, draft)]
+
+    # Dispatch to all LLM backends
+    return await complete_many(
+        prompt, images=images,
+        on_result=flight.publish_result,
+        on_field=flight.publish_field,
+        priority=priority_for(severity),
+    )
+
+
+async def generate_drafts(
+    note: str,
+    files: list[Path],          # list of real upload Paths (images & videos)
+    *,
+    severity: str | None = None,
+    on_draft: Callable[[TicketChoice], Awaitable[None]] | None = None,
+    on_field: FieldCallback | None = None,
+) -> list[TicketChoice]:
+    """
+    Preprocess → prompt → every LLM → one TicketChoice per backend
+    (with ``llm_mode = "hedged"``: one, from the first backend to answer).
+    *on_draft* is awaited with each TicketChoice as soon as its backend
+    finishes, before the slowest one is done; *on_field* with
+    (vendor, key, value) as each field of a streamed draft closes.
+    *severity* (the tester's guess) orders LLM calls queued by the rate
+    limiter; ``RateLimited`` propagates when no backend can take the call.
+
+    Pasted stack traces and console dumps in *note* are compacted (see
+    ``bugbot.preprocess.compact``) to the configured token budget first.
+    Concurrent calls whose cleaned note, attachment contents and severity
+    match share one in-flight LLM computation; each still gets its own tickets
+    carrying its own attachment filenames. Every ticket lists already
+    filed issues that look like duplicates of the note.
+    """
+    # 1) Log compaction (needs the raw newlines) + clean-up + content key
+    settings = get_settings()
+    if settings.compact_notes:
+        compacted = compact_note(
+            note,
+            budget=settings.note_token_budget,
+            keep_frames=settings.compact_keep_frames,
+        )
+        COMPACTION_STATS.add(compacted)
+        if compacted.saved:
+            log.info(
+                "note compacted: ~%d → ~%d tokens (saved ~%d)",
+                compacted.tokens_before, compacted.tokens_after, compacted.saved,
+            )
+        note = compacted.text
+    cleaned = clean_freeform(note)
+    # stored uploads are named by their digest; hash only other files
+    pool = get_pool()
+    unnamed = [p for p in files if not _stored_digest(p)]
+    hashed = dict(zip(unnamed, await asyncio.gather(*(pool.run(_digest, p) for p in unnamed))))
+    digests = [_stored_digest(p) or hashed[p] for p in files]
+    key = hashlib.sha256(
+        "\0".join([severity or "", cleaned, *digests]).encode()
+    ).hexdigest()
 
-    # 5) Wrap into TicketChoice, override attachments with real filenames
-    tickets: list[TicketChoice] = []
+    # 2) Wrap into TicketChoice, override attachments with real filenames
     filenames = [p.name for p in files]
-    for vendor, draft in results:
-        draft["attachments"] = filenames.copy()
-        tickets.append(TicketChoice(vendor=vendor, draft=draft))
 
-    return tickets
+    def _ticket(vendor: str, draft: dict) -> TicketChoice:
+        # drafts may be shared with coalesced callers: never mutate them
+        return TicketChoice(
+            vendor=vendor,
+            draft={**draft, "attachments": filenames.copy()},
+            duplicates=flight.duplicates,
+            note=cleaned,
+        )
+
+    async def _on_result(vendor: str, draft: dict) -> None:
+        await on_draft(_ticket(vendor, draft))
+
+    # 3) Join the in-flight computation for this content, or start it
+    flight = _INFLIGHT.get(key)
+    if flight is None:
+        flight = _INFLIGHT[key] = _Flight()
+        flight.task = asyncio.create_task(_draft_all(flight, cleaned, files, severity))
+        flight.task.add_done_callback(lambda _: _INFLIGHT.pop(key, None))
+    else:
+        log.info("coalescing report into in-flight drafts %s", key[:12])
+
+    replay = list(flight.results)       # snapshot + subscribe, no await between
+    if on_draft:
+        flight.on_result.append(_on_result)
+    if on_field:
+        flight.on_field.append(on_field)
+    flight.callers += 1
+    try:
+        for vendor, draft in replay if on_draft else ():
+            await _on_result(vendor, draft)
+        results = await asyncio.shield(flight.task)
+    except asyncio.CancelledError:
+        if flight.callers == 1:         # last one waiting: stop the fan-out
+            flight.task.cancel()
+        raise
+    finally:
+        flight.callers -= 1
+        if _on_result in flight.on_result:      # unless dropped on failure
+            flight.on_result.remove(_on_result)
+        if on_field in flight.on_field:
+            flight.on_field.remove(on_field)
+    return [_ticket(vendor, draft) for vendor, draft in results]
@@ -0,0 +1,94 @@
+"""
+Turning edited drafts into outbox deliveries.
+
+Shared by the per-card ``/push`` form, the "Send all" UI action and the
+JSON ``/push/bulk`` API, so all three derive the same idempotency key
+from the same content and resolve attachments the same way.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import hashlib
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict
+
+from bugbot.ingress.store import get_store, is_content_id
+from bugbot.jira.outbox import FAILED, Delivery, get_outbox
+
+
+def edit_draft(
+    draft: Dict[str, Any], *, title: str, steps: str, expected: str, actual: str, severity: str
+) -> Dict[str, Any]:
+    """Overwrite *draft* with whatever the tester just edited on the card."""
+    draft["title"]    = title
+    # split the steps textarea into a list, dropping empty lines
+    draft["steps"]    = [line for line in steps.splitlines() if line.strip()]
+    draft["expected"] = expected
+    draft["actual"]   = actual
+    draft["severity"] = severity
+    return draft
+
+
+def push_key(vendor: str, draft: Dict[str, Any]) -> str:
+    """The same card sent twice (double-click, retry) maps to the same key."""
+    return hashlib.sha256(json.dumps([vendor, draft], sort_keys=True).encode()).hexdigest()
+
+
+_DATA_URI = re.compile(r"data:[\w.+-]+/([\w.+-]+)(;[^;,]*)*;base64", re.IGNORECASE)
+
+
+def attachment_paths(names: list[str]) -> list[Path]:
+    """
+    Rebuild the real file Paths out of the stored content IDs; raise
+    ValueError for anything else (a malformed data URI, a plain file name).
+    """
+    store = get_store()
+    files: list[Path] = []
+    for name in names:
+        if name.startswith("data:"):
+            # inline screenshot: into the store like any upload (deduplicated)
+            header, _, data = name.partition(",")
+            m = _DATA_URI.fullmatch(header)
+            if m is None:
+                raise ValueError(f"unsupported data URI header {header[:64]!r}")
+            try:
+                raw = base64.b64decode(data, validate=True)
+            except binascii.Error as exc:
+                raise ValueError(f"invalid base64 in data URI: {exc}") from None
+            files.append(store.put_bytes(raw, f".{m.group(1)}"))
+        elif is_content_id(name):
+            files.append(store.path(name))
+        else:
+            raise ValueError(f"invalid attachment {name[:80]!r}: not an upload content ID")
+    return files
+
+
+def queue_pushes(items: list[tuple[str, Dict[str, Any], str | None, str]]) -> list[Delivery]:
+    """
+    Enqueue ``(vendor, draft, idempotency_key, note)`` items in one
+    transaction; keys already in the outbox return their existing
+    delivery, except failed ones, which are sent again. Each queued push
+    holds its attachments in the store until it is delivered; *note* is
+    what the filed issue is indexed by for dedup.
+    """
+    outbox, store = get_outbox(), get_store()
+    keys = [key or push_key(vendor, draft) for vendor, draft, key, _ in items]
+    pushes, seen = [], set()
+    for key, (vendor, draft, _, note) in zip(keys, items):
+        if key in seen:
+            continue
+        seen.add(key)
+        known = outbox.get(key)
+        if known is None or known.status == FAILED:
+            files = attachment_paths(draft.get("attachments", []))
+            pushes.append((key, vendor, draft, files, note))
+    # every attachment resolved: only now pin them, so a bad item leaks nothing
+    for key, _, _, files, _ in pushes:
+        store.acquire(f"push:{key}", [f.name for f in files])
+    if pushes:
+        outbox.enqueue_many(pushes)
+    return [outbox.get(key) for key in keys]
@@ -13,10 +13,25 @@ class ReportOut(BaseModel):
     attachments: List[str]
 
 
+class Duplicate(BaseModel):
+    key:   str            # existing Jira issue, e.g. BUG-123
+    title: str
+    score: float          # cosine similarity to the new note
+
+
 # For multipart/form-data we’ll read fields directly in the route, so no “ReportIn”.
 class TicketChoice(BaseModel):
     vendor: str          # "gpt-4o", "claude-3-haiku-20240307", …
     draft:  Dict[str, Any]
+    duplicates: List[Duplicate] = []
+    handle: str | None = None   # server-side draft session (UI cards only)
+    note: str = ""              # cleaned source note, indexed for dedup once filed
+
+class PushItem(BaseModel):
+    vendor: str
+    draft:  Dict[str, Any]   # edited draft exactly as it should be filed
+    idempotency_key: str | None = None   # default: hash of vendor + draft
+    note: str = ""           # source note, matched by later duplicate lookups
 
 class InvalidDraft(BaseModel):
     error: str            # human-readable message
@@ -0,0 +1,198 @@
+"""
+Content-addressed store for uploaded attachments.
+
+A file is named by its SHA-256 (``<digest><ext>``, the *content ID* drafts
+refer to) and lives under two levels of shard directories
+(``ab/cd/abcd….png``), so the same screenshot uploaded twenty times is
+stored once and no directory grows past a few hundred entries.
+
+A small SQLite index (``index.sqlite3`` in the store root) records size
+and last use per blob and which owners – e.g. ``push:<key>`` for an
+undelivered outbox row – still reference it. ``gc()`` works from the
+index alone: it never deletes a referenced blob, drops unreferenced ones
+idle for longer than *max_age*, then evicts least-recently-used ones
+until the store is under *max_bytes*.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable
+
+from bugbot.config import get_settings
+
+log = logging.getLogger(__name__)
+
+_CONTENT_ID = re.compile(r"^[0-9a-f]{64}(\.[a-z0-9]{1,8})?$")
+_TMP_MAX_AGE = 3600.0           # abandoned partial writes
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    name      TEXT PRIMARY KEY,     -- content ID
+    size      INTEGER NOT NULL,
+    created   REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS blobs_lru ON blobs (last_used);
+CREATE TABLE IF NOT EXISTS refs (
+    name  TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    PRIMARY KEY (name, owner)
+);
+CREATE INDEX IF NOT EXISTS refs_owner ON refs (owner);
+"""
+
+
+def is_content_id(name: str) -> bool:
+    return bool(_CONTENT_ID.match(name))
+
+
+def _suffix(suffix: str) -> str:
+    """*suffix* as a content ID may carry it (``.png``); dropped if it cannot."""
+    suffix = suffix.lower()
+    return suffix if _CONTENT_ID.match("0" * 64 + suffix) else ""
+
+
+class BlobStore:
+    def __init__(self, root: str | Path) -> None:
+        self.root = Path(root)
+        self.tmp = self.root / "tmp"
+        self.tmp.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()   # gc() runs on a worker thread
+        self._db = sqlite3.connect(
+            self.root / "index.sqlite3", isolation_level=None, check_same_thread=False
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+    # ── naming ───────────────────────────────────────────────────────
+    def path(self, name: str) -> Path:
+        """Where content ID *name* lives; other names are pre-store flat files."""
+        if is_content_id(name):
+            return self.root / name[:2] / name[2:4] / name
+        if Path(name).name != name:
+            raise ValueError(f"invalid attachment name {name!r}")
+        return self.root / name
+
+    def temp_path(self, suffix: str = "") -> Path:
+        """A private file to stream an upload into before ``commit``."""
+        return self.tmp / f"{uuid.uuid4().hex}{_suffix(suffix)}.part"
+
+    # ── writes ───────────────────────────────────────────────────────
+    def commit(self, tmp: Path, digest: str, suffix: str, size: int) -> Path:
+        """Move a fully written *tmp* into place; drop it if the content is known."""
+        name = f"{digest}{_suffix(suffix)}"
+        dest = self.path(name)
+        with self._lock:                            # not while gc() unlinks it
+            if dest.exists():
+                tmp.unlink(missing_ok=True)         # dedup at write time
+            else:
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp, dest)
+            now = time.time()
+            self._db.execute(
+                "INSERT INTO blobs (name, size, created, last_used) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET last_used = excluded.last_used",
+                (name, size, now, now),
+            )
+        return dest
+
+    def put_bytes(self, data: bytes, suffix: str = "") -> Path:
+        tmp = self.temp_path(suffix)
+        tmp.write_bytes(data)
+        return self.commit(tmp, hashlib.sha256(data).hexdigest(), suffix, len(data))
+
+    # ── references ───────────────────────────────────────────────────
+    def acquire(self, owner: str, names: Iterable[str]) -> None:
+        """Protect *names* from GC until ``release(owner)``."""
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO refs (name, owner) VALUES (?, ?)",
+                [(n, owner) for n in names if is_content_id(n)],
+            )
+
+    def release(self, owner: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM refs WHERE owner = ?", (owner,))
+
+    # ── garbage collection ───────────────────────────────────────────
+    def gc(self, *, max_bytes: int, max_age: float) -> Dict[str, int]:
+        """Delete unreferenced blobs past *max_age*, then LRU ones past *max_bytes*."""
+        now = time.time()
+        with self._lock:
+            candidates = self._db.execute(
+                "SELECT name, size, last_used FROM blobs "
+                "WHERE name NOT IN (SELECT name FROM refs) ORDER BY last_used"
+            ).fetchall()
+            (total,) = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()
+        doomed = []
+        for name, size, last_used in candidates:
+            if last_used < now - max_age or total > max_bytes:
+                doomed.append(name)
+                total -= size
+        removed = freed = 0
+        for name in doomed:
+            with self._lock:
+                # re-check: a concurrent upload or push may have claimed it
+                row = self._db.execute(
+                    "SELECT size FROM blobs WHERE name = ? AND last_used < ? "
+                    "AND name NOT IN (SELECT name FROM refs)",
+                    (name, now),
+                ).fetchone()
+                if row is None:
+                    continue
+                self.path(name).unlink(missing_ok=True)
+                self._db.execute("DELETE FROM blobs WHERE name = ?", (name,))
+            removed += 1
+            freed += row[0]
+        for part in self.tmp.iterdir():             # one flat dir, not the shards
+            if part.stat().st_mtime < now - _TMP_MAX_AGE:
+                part.unlink(missing_ok=True)
+        if removed:
+            log.info("upload gc: removed %d blobs, freed %d bytes", removed, freed)
+        return {"removed": removed, "freed": freed}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            blobs, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs"
+            ).fetchone()
+            (referenced,) = self._db.execute(
+                "SELECT COUNT(DISTINCT name) FROM refs"
+            ).fetchone()
+        return {"blobs": blobs, "bytes": size, "referenced": referenced}
+
+
+async def run_gc(interval: float) -> None:
+    """Collect every *interval* seconds, off the event loop, until cancelled."""
+    s = get_settings()
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(
+                get_store().gc, max_bytes=s.upload_gc_max_bytes, max_age=s.upload_gc_max_age
+            )
+        except Exception:
+            log.exception("upload gc failed")
+
+
+@lru_cache
+def _open(root: Path) -> BlobStore:
+    return BlobStore(root)
+
+
+def get_store(root: str | Path | None = None) -> BlobStore:
+    """The store rooted at *root*, default ``uploads.UPLOAD_DIR``."""
+    from bugbot.ingress import uploads
+
+    return _open(Path(root or uploads.UPLOAD_DIR).resolve())
@@ -1,16 +1,18 @@
-from fastapi import APIRouter, Request, UploadFile, Form, File
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi import APIRouter, Request, UploadFile, Form, File, Header, HTTPException
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from bugbot.ingress.logic import generate_drafts   # reuse the same logic
-from bugbot.llm.selector import complete_many
-import uuid, os, tempfile, base64, json, shutil
 from pathlib import Path
-from bugbot.jira.client   import create_issue
+from bugbot.jira.outbox   import get_outbox
+from bugbot.ingress.push  import edit_draft, queue_pushes
+from bugbot.postprocess.hitl import get_sessions
+from bugbot.ingress.uploads import ingest_many
+from bugbot.ingress.jobs   import get_jobs
+from bugbot.ingress.schemas import TicketChoice
+from markupsafe import escape
 
 router = APIRouter()
 templates = Jinja2Templates(directory=Path(__file__).parent.parent / "templates")
-UPLOAD_DIR = Path("uploads")
-UPLOAD_DIR.mkdir(exist_ok=True)
 
 @router.get("/", response_class=HTMLResponse)
 async def upload_page(request: Request):
@@ -22,65 +24,133 @@ async def get_drafts(
     note: str = Form(...),
     files: list[UploadFile] = File(None),
 ):
-    # 1) Persist each UploadFile to disk
-    saved: list[Path] = []
-    for f in files or []:
-        dest = UPLOAD_DIR / f"{uuid.uuid4()}{Path(f.filename).suffix}"
-        with dest.open("wb") as out_f:
-            shutil.copyfileobj(f.file, out_f)
-        saved.append(dest)
+    # 1) Stream each UploadFile to disk (chunked, hashed, size-limited)
+    stored = await ingest_many(files)
 
     # 2) Call generate_drafts with the real Paths
-    resp = await generate_drafts(note, saved)
+    resp = await generate_drafts(note, [s.path for s in stored])
 
+    # 3) Keep the drafts server-side; cards only carry their handles
+    sessions = get_sessions()
     return templates.TemplateResponse(
-        "ticket_cards.html",
-        {"request": request, "tickets": resp}
+        request, "ticket_cards.html", {"tickets": [sessions.hold(t) for t in resp]}
     )
 
-@router.post("/push")
+def _sse(event: str, html: str) -> str:
+    # one SSE message; every line of the payload needs its own "data:" prefix
+    # (and an empty payload one bare "data:", or the event is never fired)
+    data = "\n".join(f"data: {line}" for line in html.splitlines() or [""])
+    return f"event: {event}\n{data}\n\n"
+
+
+@router.post("/drafts/stream", response_class=HTMLResponse)
+async def stream_drafts(
+    request: Request,
+    note: str = Form(...),
+    files: list[UploadFile] = File(None),
+):
+    # Same input as /drafts, but answer at once with an SSE container that
+    # appends each vendor's card as soon as that backend finishes. The
+    # request is parked in the shared sessions DB; the job itself starts in
+    # the events request, so it runs on the worker that streams it.
+    stored = await ingest_many(files)
+    handle = get_sessions().stash(note, [s.path for s in stored])
+    return templates.TemplateResponse(
+        request, "ticket_stream.html", {"handle": handle}
+    )
+
+
+@router.get("/drafts/{handle}/events")
+async def draft_events(handle: str):
+    sessions = get_sessions()
+    parked = sessions.take(handle)
+    if parked is None:          # also ends the browser's auto-reconnect
+        raise HTTPException(404, "unknown draft stream")
+    jobs = get_jobs()
+    job = jobs.submit(*parked)
+    card = templates.get_template("ticket_card.html")
+    send_all = templates.get_template("send_all.html")
+
+    async def _stream():
+        async for event in jobs.events(job):
+            if event["event"] == "draft":
+                t = sessions.hold(TicketChoice(**event["ticket"]))
+                yield _sse("card", card.render(t=t))
+            elif event["event"] == "done":
+                # the cards are on the page already (maybe edited or sent):
+                # add the batch control, never re-render them
+                yield _sse("done", send_all.render() if len(job.drafts) > 1 else "")
+            elif event["event"] == "failed":
+                yield _sse("failed", f"<p style='color:red'>❌ {escape(event['error'])}</p>")
+
+    return StreamingResponse(
+        _stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+def _expired(request: Request, vendor: str = "Draft") -> HTMLResponse:
+    # 200, not 410: htmx leaves the card untouched on a 4xx, and the tester
+    # would never learn why nothing happened
+    return templates.TemplateResponse(
+        request, "push_status.html",
+        {"d": {"vendor": vendor, "status": "failed", "is_final": True,
+               "error": "this draft has expired – generate it again"}},
+    )
+
+
+@router.post("/push", response_class=HTMLResponse)
 async def push_to_jira(
-    vendor: str       = Form(...),
-    draft: str        = Form(...),
+    request: Request,
+    handle: str       = Form(...),
     title: str        = Form(...),
     steps: str        = Form(...),
     expected: str     = Form(...),
     actual: str       = Form(...),
     severity: str     = Form(...),
+    idempotency_key: str | None = Header(None),
 ):
-    # parse the original draft...
-    draft_obj = json.loads(draft)
-
-    # overwrite with whatever the tester just edited:
-    draft_obj["title"]    = title
-    # split the steps textarea into a list, dropping empty lines
-    draft_obj["steps"]    = [line for line in steps.splitlines() if line.strip()]
-    draft_obj["expected"] = expected
-    draft_obj["actual"]   = actual
-    draft_obj["severity"] = severity
-
-    # now rebuild the real file Paths out of the stored filenames
-    tmpdir = Path(tempfile.mkdtemp())
-    files: list[Path] = []
-    for b64name in draft_obj.get("attachments", []):
-        if b64name.startswith("data:"):
-            header, data = b64name.split(",", 1)
-            ext = header.split("/")[1].split(";")[0]
-            fp = tmpdir / f"{uuid.uuid4()}.{ext}"
-            fp.write_bytes(base64.b64decode(data))
-        else:
-            fp = UPLOAD_DIR / b64name
-        files.append(fp)
-
-    # create the JIRA issue
-    try:
-        key = create_issue(draft_obj, files)
-        return HTMLResponse(
-            f"<div class='card'><h3>{vendor}</h3>"
-            f"<p>✅ Sent to JIRA as <strong>{key}</strong></p></div>"
-        )
-    except Exception as e:
-        return HTMLResponse(
-            f"<div class='card'><h3>{vendor}</h3>"
-            f"<p style='color:red'>❌ JIRA error: {e}</p></div>"
-        )
+    # the held draft, overwritten with the tester's edits; persist and
+    # answer now, a background worker talks to JIRA
+    held = get_sessions().get(handle)
+    if held is None:
+        return _expired(request)
+    draft_obj = edit_draft(
+        dict(held.draft), title=title, steps=steps,
+        expected=expected, actual=actual, severity=severity,
+    )
+    [delivery] = queue_pushes([(held.vendor, draft_obj, idempotency_key, held.note)])
+    return templates.TemplateResponse(request, "push_status.html", {"d": delivery})
+
+
+@router.post("/push/all", response_class=HTMLResponse)
+async def push_all_to_jira(
+    request: Request,
+    handle: list[str]   = Form(...),
+    title: list[str]    = Form(...),
+    steps: list[str]    = Form(...),
+    expected: list[str] = Form(...),
+    actual: list[str]   = Form(...),
+    severity: list[str] = Form(...),
+):
+    # every card form on the page, field lists in card order; one batch
+    sessions = get_sessions()
+    held = [sessions.get(h) for h in handle]
+    if None in held:
+        return _expired(request)
+    items = [
+        (d.vendor, edit_draft(dict(d.draft), title=t, steps=st, expected=e, actual=a, severity=sv),
+         None, d.note)
+        for d, t, st, e, a, sv in zip(held, title, steps, expected, actual, severity)
+    ]
+    deliveries = queue_pushes(items)
+    return templates.TemplateResponse(request, "push_statuses.html", {"deliveries": deliveries})
+
+
+@router.get("/push/{key}", response_class=HTMLResponse)
+async def push_status(request: Request, key: str):
+    delivery = get_outbox().get(key)
+    if delivery is None:
+        raise HTTPException(404, "unknown push")
+    return templates.TemplateResponse(request, "push_status.html", {"d": delivery})
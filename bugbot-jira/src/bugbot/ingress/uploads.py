@@ -0,0 +1,106 @@
+"""
+Async, streaming ingestion of multipart uploads.
+
+Each ``UploadFile`` is copied in fixed-size chunks with the blocking
+writes pushed to a worker thread, hashed while it streams and rejected
+with 413 as soon as it crosses the size limit. The finished file is
+committed to the content-addressed store under ``UPLOAD_DIR`` (see
+``bugbot.ingress.store``): a repeat of a known file costs no disk space
+and its stored name is the same content ID. Downstream stages get a
+``StoredUpload`` (path + digest); the digest is also the file's name, so
+nothing needs to hash an upload twice.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Sequence
+
+from fastapi import HTTPException, UploadFile
+
+from bugbot.config import get_settings
+from bugbot.ingress.store import get_store
+
+CHUNK_SIZE = 1 << 20            # 1 MiB
+
+UPLOAD_DIR = Path(get_settings().upload_dir)
+UPLOAD_DIR.mkdir(exist_ok=True)
+
+
+@dataclass(frozen=True, slots=True)
+class StoredUpload:
+    path: Path
+    filename: str               # name the client sent
+    size: int
+    sha256: str
+    content_type: str | None = None
+
+
+def _too_large(limit: int) -> HTTPException:
+    return HTTPException(413, f"upload exceeds {limit} bytes")
+
+
+async def ingest(
+    upload: UploadFile,
+    dest_dir: Path | None = None,
+    *,
+    max_bytes: int | None = None,
+) -> StoredUpload:
+    """
+    Stream *upload* into the store at *dest_dir* (default ``UPLOAD_DIR``);
+    raise HTTPException(413) past *max_bytes*.
+    """
+    store = get_store(dest_dir)
+    limit = max_bytes or get_settings().upload_max_bytes
+    if upload.size is not None and upload.size > limit:      # declared size
+        raise _too_large(limit)
+
+    suffix = Path(upload.filename or "").suffix.lower()
+    dest = store.temp_path(suffix)
+    digest = hashlib.sha256()
+    size = 0
+    out = await asyncio.to_thread(dest.open, "wb")
+    try:
+        while chunk := await upload.read(CHUNK_SIZE):
+            size += len(chunk)
+            if size > limit:
+                raise _too_large(limit)
+            digest.update(chunk)
+            await asyncio.to_thread(out.write, chunk)
+    except BaseException:
+        await asyncio.to_thread(out.close)
+        dest.unlink(missing_ok=True)
+        raise
+    await asyncio.to_thread(out.close)
+    sha256 = digest.hexdigest()
+    path = await asyncio.to_thread(store.commit, dest, sha256, suffix, size)
+
+    return StoredUpload(
+        path=path,
+        filename=upload.filename or path.name,
+        size=size,
+        sha256=sha256,
+        content_type=upload.content_type,
+    )
+
+
+async def ingest_many(
+    uploads: Sequence[UploadFile] | None,
+    dest_dir: Path | None = None,
+) -> list[StoredUpload]:
+    """Ingest every upload concurrently; on any failure none are kept.
+
+    Files that did get stored stay in the store unreferenced (other
+    drafts may share their content); GC reclaims them.
+    """
+    tasks = [asyncio.ensure_future(ingest(u, dest_dir)) for u in uploads or [] if u.filename]
+    try:
+        return list(await asyncio.gather(*tasks))
+    except BaseException:
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
@@ -0,0 +1,22 @@
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from bugbot.ingress.jobs import get_jobs
+
+router = APIRouter()
+
+
+@router.websocket("/ws/jobs/{job_id}")
+async def job_events(ws: WebSocket, job_id: str):
+    """Push {"event": "field", …} / {"event": "draft", "ticket": …} as each vendor
+    streams and finishes, then done/failed."""
+    await ws.accept()
+    jobs = get_jobs()
+    job = jobs.get(job_id)
+    if job is None:
+        await ws.close(code=4404, reason="unknown job")
+        return
+    try:
+        async for event in jobs.events(job):
+            await ws.send_json(event)
+    except WebSocketDisconnect:
+        return
+    await ws.close()
@@ -0,0 +1,56 @@
+"""
+Concurrent attachment upload for a freshly created issue.
+
+Each file is its own multipart POST streamed from disk (httpx reads the
+open handle in chunks, so screenshots and videos are never loaded into
+memory). At most ``attach_concurrency`` uploads run at once across every
+issue the client is pushing. A failed upload does not stop the others;
+the failures are returned so the caller can retry just those files – the
+issue itself already exists.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import mimetypes
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from bugbot.jira.client import JiraClient
+
+log = logging.getLogger(__name__)
+
+
+async def add_attachment(jira: JiraClient, key: str, path: Path) -> None:
+    ctype = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+
+    def body() -> dict[str, Any]:       # fresh handle for every attempt
+        return {"files": {"file": (path.name, path.open("rb"), ctype)}}
+
+    await jira.request(
+        "POST", f"/rest/api/2/issue/{key}/attachments",
+        headers={"X-Atlassian-Token": "no-check"},
+        body=body,
+    )
+
+
+async def upload_attachments(
+    jira: JiraClient, key: str, files: list[Path]
+) -> dict[Path, Exception]:
+    """Attach *files* to *key*; return the files that failed, with the error."""
+    async def one(f: Path) -> Exception | None:
+        if not f.exists():
+            log.warning("attachment %s not found, skipping", f)
+            return None
+        async with jira.attach_slots:
+            try:
+                await add_attachment(jira, key, f)
+            except Exception as e:
+                log.error("failed to attach %s to %s: %s", f, key, e)
+                return e
+        return None
+
+    errors = await asyncio.gather(*(one(f) for f in files))
+    return {f: e for f, e in zip(files, errors) if e is not None}
@@ -1,20 +1,32 @@
-from atlassian import Jira
-from bugbot.config import get_settings
-from pathlib import Path
+"""
+Async Jira Cloud client on one pooled ``httpx.AsyncClient``.
+
+Pushing a ticket no longer blocks the event loop: the issue is created
+with a single REST call and its attachments are then uploaded
+concurrently (see ``bugbot.jira.attachments``), so a push with ten
+screenshots costs about two round-trips instead of eleven sequential
+ones. Every call retries 429/5xx and connection errors with exponential
+backoff, honouring ``Retry-After``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
 import logging
+import random
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Collection
+
+from bugbot.config import get_settings
+from bugbot.jira.attachments import upload_attachments
+
+if TYPE_CHECKING:
+    import httpx
+
 settings = get_settings()
 log = logging.getLogger(__name__)
-if not all([settings.jira_base, settings.jira_user,
-            settings.jira_token, settings.jira_project]):
-    raise RuntimeError("JIRA_* env vars missing")
-
-_jira = Jira(
-    url=settings.jira_base,
-    username=settings.jira_user,
-    password=settings.jira_token,
-    cloud=True,
-    api_version='2',
-)
 
 SEVERITY_TO_PRIORITY = {
     "critical": "Highest",
@@ -22,35 +34,271 @@ SEVERITY_TO_PRIORITY = {
     "minor":    "Medium",
 }
 
-def create_issue(draft: dict, files: list[Path]) -> str:
-    """Return the created issue key, e.g. BUG-123."""
+# a create that failed with these was not processed, so retrying it
+# cannot file a second issue; uploads may retry any transient error
+NOT_PROCESSED = frozenset({429, 503})
+TRANSIENT = frozenset({429, 500, 502, 503, 504})
+
+# issue property carrying the outbox idempotency key of a filed issue
+PUSH_PROPERTY = "bugbot.push"
+
+
+class JiraError(RuntimeError):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(f"Jira {status}: {message[:500]}")
+        self.status = status
+        self.text = message
+
+
+def _issue_update(fields: dict[str, Any], properties: dict[str, Any] | None) -> dict[str, Any]:
+    update: dict[str, Any] = {"fields": fields}
+    if properties:
+        update["properties"] = [{"key": k, "value": v} for k, v in properties.items()]
+    return update
+
+
+def _element_error(error: dict[str, Any]) -> JiraError:
+    """One failed element of a bulk create, as a ``JiraError``."""
+    detail = error.get("elementErrors", {})
+    messages = [*detail.get("errorMessages", []),
+                *(f"{k}: {v}" for k, v in detail.get("errors", {}).items())]
+    return JiraError(error.get("status", 400), "; ".join(messages) or "bulk create failed")
+
+
+class JiraClient:
+    def __init__(
+        self,
+        base_url: str,
+        user: str,
+        token: str,
+        *,
+        max_connections: int = 10,
+        timeout: float = 30.0,
+        retries: int = 4,
+        backoff: float = 0.5,
+        attach_concurrency: int = 4,
+        bulk_size: int = 50,
+        transport: httpx.AsyncBaseTransport | None = None,   # tests
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.auth = (user, token)
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.attach_concurrency = attach_concurrency
+        self.bulk_size = bulk_size
+        self._attach_slots: asyncio.Semaphore | None = None
+        self._transport = transport
+        self._http: httpx.AsyncClient | None = None
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        if self._http is None or self._http.is_closed:
+            import httpx                # deferred: keeps `import bugbot…` fast
+
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                auth=self.auth,
+                headers={"Accept": "application/json"},
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                timeout=self.timeout,
+                transport=self._transport,
+            )
+        return self._http
+
+    @property
+    def attach_slots(self) -> asyncio.Semaphore:
+        """Bounds attachment uploads across every issue being pushed."""
+        if self._attach_slots is None:
+            self._attach_slots = asyncio.Semaphore(self.attach_concurrency)
+        return self._attach_slots
+
+    def _delay(self, attempt: int, response: httpx.Response | None) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:          # HTTP-date form: fall back to backoff
+                pass
+        return self.backoff * 2 ** attempt * (0.5 + random.random() / 2)
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        *,
+        retry_on: Collection[int] = TRANSIENT,
+        body: Callable[[], dict[str, Any]] | None = None,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """
+        Send with retries. *body* is called once per attempt and its result
+        merged into the request kwargs – for file handles that cannot be
+        re-read after a failed attempt.
+        """
+        import httpx
+
+        for attempt in range(self.retries + 1):
+            extra = body() if body else {}
+            try:
+                response = await self.http.request(method, path, **kwargs, **extra)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout):
+                if attempt == self.retries:
+                    raise
+                response = None
+            finally:
+                for f in extra.get("files", {}).values():
+                    f[1].close()
+            if response is not None:
+                if response.status_code not in retry_on or attempt == self.retries:
+                    break
+                await response.aclose()
+            delay = self._delay(attempt, response)
+            log.warning(
+                "%s %s: %s, retrying in %.1fs", method, path,
+                response.status_code if response is not None else "connection failed",
+                delay,
+            )
+            await asyncio.sleep(delay)
+        if response.is_error:
+            raise JiraError(response.status_code, response.text)
+        return response
+
+    async def create_issue(
+        self, fields: dict[str, Any], *, properties: dict[str, Any] | None = None
+    ) -> str:
+        response = await self.request(
+            "POST", "/rest/api/2/issue",
+            json=_issue_update(fields, properties), retry_on=NOT_PROCESSED,
+        )
+        return response.json()["key"]
+
+    async def create_issues(
+        self,
+        fields: list[dict[str, Any]],
+        *,
+        properties: list[dict[str, Any] | None] | None = None,
+    ) -> list[str | Exception]:
+        """
+        Create many issues through ``/issue/bulk``, ``bulk_size`` per call
+        and the calls in parallel. Returns one key or exception per input,
+        in order – a rejected element does not fail its neighbours.
+        """
+        updates = [_issue_update(f, p) for f, p in zip(fields, properties or [None] * len(fields))]
+
+        async def chunk(part: list[dict[str, Any]]) -> list[str | Exception]:
+            try:
+                response = await self.request(
+                    "POST", "/rest/api/2/issue/bulk",
+                    json={"issueUpdates": part},
+                    retry_on=NOT_PROCESSED,
+                )
+                body = response.json()
+            except JiraError as exc:
+                if exc.status != 400:
+                    return [exc] * len(part)
+                try:                    # every element rejected: same body shape
+                    body = json.loads(exc.text)
+                except ValueError:
+                    return [exc] * len(part)
+            except Exception as exc:
+                return [exc] * len(part)
+            failed = {e["failedElementNumber"]: _element_error(e) for e in body.get("errors", [])}
+            created = iter(issue["key"] for issue in body.get("issues", []))
+            out: list[str | Exception] = []
+            for n in range(len(part)):
+                key = failed.get(n) or next(created, None)
+                # neither created nor reported failed: retry that one (the
+                # outbox looks it up by label first in case it was filed)
+                out.append(key or JiraError(502, f"bulk create returned no key for element {n}"))
+            return out
+
+        parts = [updates[i:i + self.bulk_size] for i in range(0, len(updates), self.bulk_size)]
+        results = await asyncio.gather(*(chunk(p) for p in parts))
+        return [r for part in results for r in part]
+
+    async def find_issue(self, label: str, *, push_id: str | None = None) -> str | None:
+        """
+        Key of an issue carrying *label*, if one was already filed. Search
+        is eventually consistent, so a just-created issue may not show up
+        yet; each hit is confirmed by its ``PUSH_PROPERTY`` (a direct,
+        consistent read) when *push_id* is given.
+        """
+        response = await self.request(
+            "GET", "/rest/api/3/search/jql",
+            params={"jql": f'labels = "{label}"', "fields": "labels", "maxResults": 10},
+        )
+        for issue in response.json().get("issues", []):
+            if push_id is None:
+                return issue["key"]
+            pushed = await self.issue_property(issue["key"], PUSH_PROPERTY)
+            # no property: filed before it was set – the label alone decides
+            if pushed is None or pushed.get("id") == push_id:
+                return issue["key"]
+        return None
+
+    async def issue_property(self, key: str, name: str) -> Any | None:
+        try:
+            response = await self.request("GET", f"/rest/api/2/issue/{key}/properties/{name}")
+        except JiraError as exc:
+            if exc.status == 404:
+                return None
+            raise
+        return response.json().get("value")
+
+    async def aclose(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+
+@lru_cache
+def get_jira() -> JiraClient:
+    """Jira client, built on first use so importing this module is free."""
+    if not all([settings.jira_base, settings.jira_user,
+                settings.jira_token, settings.jira_project]):
+        raise RuntimeError("JIRA_* env vars missing")
+    return JiraClient(
+        settings.jira_base,
+        settings.jira_user,
+        settings.jira_token,
+        max_connections=settings.jira_max_connections,
+        timeout=settings.jira_timeout,
+        retries=settings.jira_retries,
+        backoff=settings.jira_backoff,
+        attach_concurrency=settings.jira_attach_concurrency,
+        bulk_size=settings.jira_bulk_size,
+    )
+
+
+def issue_fields(draft: dict, labels: list[str] | None = None) -> dict[str, Any]:
     description = (
         "*Steps to reproduce*\n"
         + "\n".join(f"# {s}" for s in draft["steps"])
         + "\n\n*Expected*\n"   + draft["expected"]
         + "\n\n*Actual*\n"     + draft["actual"]
     )
-
-    issue = _jira.issue_create({
+    fields = {
         "project": {"key": settings.jira_project},
         "summary": draft["title"],
         "description": description,
         "issuetype": {"name": "Bug"},
         "priority":  {"name": SEVERITY_TO_PRIORITY[draft["severity"]]},
-    })
-
-    key = issue["key"]
+    }
+    if labels:
+        fields["labels"] = labels
+    return fields
 
-    # 3) attach every real file, skip stubs
-    for f in files:
-        if not f.exists():
-            log.warning("attachment %s not found, skipping", f)
-            continue
 
-        # Jira.add_attachment signature is (issue_key, attachment, filename=None)
-        try:
-            _jira.add_attachment(key, str(f))
-        except Exception as e:
-            log.error("failed to attach %s to %s: %s", f, key, e)
+async def create_issue(draft: dict, files: list[Path]) -> str:
+    """Return the created issue key, e.g. BUG-123."""
+    jira = get_jira()
+    key = await jira.create_issue(issue_fields(draft))
 
+    # attach every real file concurrently, skip stubs
+    await upload_attachments(jira, key, files)
     return key
@@ -0,0 +1,452 @@
+"""
+Durable outbox between ``/push`` and Jira.
+
+``/push`` only writes the edited draft to a SQLite table under an
+idempotency key and answers at once; background workers deliver pending
+rows with exponential backoff and the card polls for the outcome. The
+same key pushed twice (double-click, retry after a timeout) returns the
+existing row instead of filing a second issue; pushing a key that failed
+for good starts its delivery over. A worker claims up to ``batch`` due
+rows at once: they are created with Jira's bulk endpoint and all their
+attachments uploaded together, so a sweep of fifty pushes costs one
+create call, not fifty.
+
+Claims are safe across processes sharing the database: one UPDATE marks
+the rows ``sending`` under a fresh owner token with a *lease*, which the
+worker renews while it delivers. Only rows whose lease ran out – their
+sender died – are put back, never those another live process is sending.
+
+Every issue is created with the label ``bugbot-<key prefix>`` and the
+issue property ``bugbot.push`` holding the full key. The issue key is
+stored before attachments are uploaded, and a row that is retried after a
+failed or interrupted create is first searched for by that label (Jira's
+``/rest/api/3/search/jql``), each hit confirmed by its property, so a
+create Jira processed but we never heard back about is not repeated.
+
+Jira's search index is eventually consistent, so such a row is not looked
+up until *settle* seconds after its create was sent. What remains is the
+window in which the index lags by more than that: an issue created then
+can still be missed and filed a second time.
+Attachments that fail to upload stay on the row, which is retried for
+just those files; their store references are held until they are sent.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+import uuid
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict
+
+from bugbot.config import get_settings
+from bugbot.dedup import record_ticket
+from bugbot.ingress.store import get_store
+from bugbot.jira.attachments import upload_attachments
+from bugbot.jira.client import PUSH_PROPERTY, JiraError, get_jira, issue_fields
+
+log = logging.getLogger(__name__)
+
+PENDING, SENDING, DONE, FAILED = "pending", "sending", "done", "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id        TEXT PRIMARY KEY,     -- idempotency key
+    vendor    TEXT NOT NULL,
+    draft     TEXT NOT NULL,        -- JSON
+    files     TEXT NOT NULL,        -- JSON list of paths still to attach
+    status    TEXT NOT NULL,
+    attempts  INTEGER NOT NULL DEFAULT 0,
+    issue_key TEXT,
+    error     TEXT,
+    created   REAL NOT NULL,
+    next_try  REAL NOT NULL,
+    owner     TEXT,                 -- claim token while sending
+    lease_until REAL,
+    sent_at   REAL,                 -- last create call, for the search lookup
+    note      TEXT NOT NULL DEFAULT ''  -- source note, indexed for dedup once filed
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_try);
+CREATE INDEX IF NOT EXISTS outbox_owner ON outbox (owner);
+"""
+
+
+@dataclass
+class Delivery:
+    id: str
+    vendor: str
+    draft: Dict[str, Any]
+    files: list[Path]
+    status: str = PENDING
+    attempts: int = 0
+    issue_key: str | None = None
+    error: str | None = None
+    owner: str | None = None
+    sent_at: float | None = None
+    note: str = ""
+
+    @property
+    def is_final(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    @property
+    def label(self) -> str:
+        return f"bugbot-{self.id[:16]}"
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "vendor": self.vendor,
+            "status": self.status,
+            "issue_key": self.issue_key,
+            "error": self.error,
+            "attempts": self.attempts,
+        }
+
+    @classmethod
+    def _from_row(cls, row: sqlite3.Row) -> Delivery:
+        return cls(
+            id=row["id"], vendor=row["vendor"], draft=json.loads(row["draft"]),
+            files=[Path(p) for p in json.loads(row["files"])],
+            status=row["status"], attempts=row["attempts"],
+            issue_key=row["issue_key"], error=row["error"], owner=row["owner"],
+            sent_at=row["sent_at"], note=row["note"],
+        )
+
+
+def _permanent(exc: Exception) -> bool:
+    """Errors a retry cannot fix: bad request/credentials, missing config."""
+    if isinstance(exc, JiraError):
+        return 400 <= exc.status < 500 and exc.status != 429
+    return isinstance(exc, (RuntimeError, KeyError, ValueError))
+
+
+class Outbox:
+    def __init__(
+        self,
+        path: str | Path,
+        *,
+        workers: int = 2,
+        max_attempts: int = 8,
+        backoff: float = 2.0,
+        max_backoff: float = 300.0,
+        batch: int = 50,
+        lease: float = 120.0,
+        settle: float = 30.0,
+    ) -> None:
+        self.path = Path(path)
+        self.workers = workers
+        self.batch = batch
+        self.lease = lease
+        self.settle = settle
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._conn: sqlite3.Connection | None = None
+        self._wake: asyncio.Event | None = None
+        self._tasks: list[asyncio.Task] = []
+
+    # ── storage ──────────────────────────────────────────────────────
+    @property
+    def db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _update(self, d: Delivery, **cols: Any) -> None:
+        """Update a claimed row – a no-op once its lease passed to another owner."""
+        if cols.get("status", SENDING) != SENDING:
+            cols.update(owner=None, lease_until=None)
+        assignments = ", ".join(f"{c} = ?" for c in cols)
+        self.db.execute(
+            f"UPDATE outbox SET {assignments} WHERE id = ? AND owner IS ?",
+            (*cols.values(), d.id, d.owner),
+        )
+
+    # ── public API ───────────────────────────────────────────────────
+    def enqueue(
+        self, key: str, vendor: str, draft: Dict[str, Any], files: list[Path], note: str = ""
+    ) -> Delivery:
+        """Persist a push; an existing *key* returns its delivery unchanged,
+        unless it failed for good, which puts it back in the queue."""
+        return self.enqueue_many([(key, vendor, draft, files, note)])[0]
+
+    def enqueue_many(
+        self, pushes: list[tuple[str, str, Dict[str, Any], list[Path], str]]
+    ) -> list[Delivery]:
+        """``enqueue`` for many pushes in one transaction, claimable as one batch."""
+        now = time.time()
+        db = self.db
+        db.execute("BEGIN")
+        try:
+            inserted = 0
+            for key, vendor, draft, files, note in pushes:
+                paths = json.dumps([str(f) for f in files])
+                cur = db.execute(
+                    "INSERT OR IGNORE INTO outbox "
+                    "(id, vendor, draft, files, status, created, next_try, note) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, vendor, json.dumps(draft), paths, PENDING, now, now, note),
+                )
+                if not cur.rowcount:
+                    # a failed push starts over; one already filed keeps its
+                    # issue key and just the attachments still missing
+                    cur = db.execute(
+                        "UPDATE outbox SET status = ?, attempts = 0, error = NULL, "
+                        "next_try = ?, files = CASE WHEN issue_key IS NULL THEN ? "
+                        "ELSE files END WHERE id = ? AND status = ?",
+                        (PENDING, now, paths, key, FAILED),
+                    )
+                inserted += cur.rowcount
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        if inserted:
+            self._ensure_started()
+            self._wake.set()
+        if inserted < len(pushes):
+            log.info("%d push(es) already in the outbox, not enqueued again",
+                     len(pushes) - inserted)
+        return [self.get(key) for key, *_ in pushes]
+
+    def get(self, key: str) -> Delivery | None:
+        row = self.db.execute("SELECT * FROM outbox WHERE id = ?", (key,)).fetchone()
+        return Delivery._from_row(row) if row else None
+
+    async def wait(self, keys: list[str], timeout: float) -> list[Delivery]:
+        """Deliveries for *keys* once all are final, or as they are at *timeout*."""
+        deadline = time.monotonic() + timeout
+        while True:
+            deliveries = [self.get(k) for k in keys]
+            if all(d is None or d.is_final for d in deliveries) or time.monotonic() >= deadline:
+                return deliveries
+            await asyncio.sleep(0.1)
+
+    def stats(self) -> Dict[str, int]:
+        rows = self.db.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status")
+        return {PENDING: 0, SENDING: 0, DONE: 0, FAILED: 0, **dict(rows.fetchall())}
+
+    # ── lifecycle ────────────────────────────────────────────────────
+    def _ensure_started(self) -> None:
+        if self._wake is None or not self._tasks or all(t.done() for t in self._tasks):
+            self._wake = asyncio.Event()
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    def start(self) -> None:
+        """Resume rows left pending by a previous process."""
+        self._ensure_started()
+        self._wake.set()
+
+    async def stop(self) -> None:
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._wake = None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    # ── internals ────────────────────────────────────────────────────
+    def _claim(self) -> list[Delivery]:
+        """Take up to ``batch`` due rows in one statement, so no two workers share one."""
+        now, owner = time.time(), uuid.uuid4().hex
+        db = self.db
+        # a sender whose lease ran out died mid-delivery; the create may have
+        # gone through, so count the attempt (⇒ label lookup before re-creating)
+        db.execute(
+            "UPDATE outbox SET status = ?, owner = NULL, lease_until = NULL, "
+            "attempts = attempts + 1 WHERE status = ? AND COALESCE(lease_until, 0) < ?",
+            (PENDING, SENDING, now),
+        )
+        db.execute(
+            "UPDATE outbox SET status = ?, owner = ?, lease_until = ? WHERE id IN "
+            "(SELECT id FROM outbox WHERE status = ? AND next_try <= ? "
+            "ORDER BY next_try LIMIT ?)",
+            (SENDING, owner, now + self.lease, PENDING, now, self.batch),
+        )
+        rows = db.execute(
+            "SELECT * FROM outbox WHERE owner = ? ORDER BY next_try", (owner,)
+        ).fetchall()
+        return [Delivery._from_row(row) for row in rows]
+
+    def _renew(self, owner: str) -> None:
+        self.db.execute(
+            "UPDATE outbox SET lease_until = ? WHERE owner = ? AND status = ?",
+            (time.time() + self.lease, owner, SENDING),
+        )
+
+    def _unclaim(self, owner: str) -> None:
+        """Hand back rows still held by *owner*; the create may have gone through."""
+        self.db.execute(
+            "UPDATE outbox SET status = ?, owner = NULL, lease_until = NULL, "
+            "attempts = attempts + 1 WHERE owner = ? AND status = ?",
+            (PENDING, owner, SENDING),
+        )
+
+    def _next_due(self) -> float | None:
+        (due,) = self.db.execute(
+            "SELECT MIN(t) FROM (SELECT next_try AS t FROM outbox WHERE status = ? "
+            "UNION ALL SELECT COALESCE(lease_until, 0) FROM outbox WHERE status = ?)",
+            (PENDING, SENDING),
+        ).fetchone()
+        return None if due is None else max(0.0, due - time.time())
+
+    async def _heartbeat(self, owner: str) -> None:
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            self._renew(owner)
+
+    async def _worker(self) -> None:
+        wake = self._wake
+        while True:
+            batch = self._claim()
+            if not batch:
+                wake.clear()
+                try:
+                    await asyncio.wait_for(wake.wait(), self._next_due())
+                except TimeoutError:
+                    pass
+                continue
+            wake.set()                  # let an idle sibling look for more
+            owner = batch[0].owner
+            heartbeat = asyncio.create_task(self._heartbeat(owner))
+            try:
+                await self._deliver(batch)
+            except asyncio.CancelledError:      # shutdown: don't wait out the lease
+                self._unclaim(owner)
+                raise
+            except Exception as exc:            # a bug must not stop the worker
+                log.exception("push batch delivery crashed")
+                for claimed in batch:          # rows not yet settled, as stored
+                    d = self.get(claimed.id)
+                    if d is not None and d.status == SENDING and d.owner == owner:
+                        self._retry_or_fail(d, exc)
+            finally:
+                heartbeat.cancel()
+
+    def _retry_or_fail(self, d: Delivery, exc: Exception) -> None:
+        attempts = d.attempts + 1
+        if _permanent(exc) or attempts >= self.max_attempts:
+            log.error("push %s failed for good: %s", d.id[:12], exc)
+            self._update(d, status=FAILED, attempts=attempts, error=str(exc))
+            get_store().release(f"push:{d.id}")     # attachments may be collected
+            return
+        delay = min(self.max_backoff, self.backoff * 2 ** d.attempts)
+        log.warning("push %s failed (%s), retry in %.0fs", d.id[:12], exc, delay)
+        self._update(
+            d, status=PENDING, attempts=attempts, error=str(exc),
+            next_try=time.time() + delay,
+        )
+
+    async def _deliver(self, batch: list[Delivery]) -> None:
+        errors: dict[str, Exception] = {}
+        unfiled = {d.id for d in batch if d.issue_key is None}
+        try:
+            jira = get_jira()
+        except Exception as exc:
+            for d in batch:
+                self._retry_or_fail(d, exc)
+            return
+
+        # 1) an earlier try may already have filed some of them; search
+        # cannot be trusted to show a create until it had time to settle
+        now = time.time()
+        unsure = [d for d in batch if d.issue_key is None and (d.attempts or d.sent_at)]
+        settling = {d.id for d in unsure if d.sent_at and now - d.sent_at < self.settle}
+        for d in unsure:
+            if d.id in settling:
+                self._update(d, status=PENDING, next_try=d.sent_at + self.settle)
+        batch = [d for d in batch if d.id not in settling]
+        unsure = [d for d in unsure if d.id not in settling]
+        found = await asyncio.gather(
+            *(jira.find_issue(d.label, push_id=d.id) for d in unsure), return_exceptions=True
+        )
+        for d, key in zip(unsure, found):
+            if isinstance(key, Exception):
+                errors[d.id] = key
+            elif key:
+                d.issue_key = key
+
+        # 2) create the rest – one bulk call per `bulk_size` issues
+        todo, fields = [], []
+        for d in batch:
+            if d.issue_key is None and d.id not in errors:
+                try:
+                    fields.append(issue_fields(d.draft, labels=[d.label]))
+                    todo.append(d)
+                except Exception as exc:            # malformed draft
+                    errors[d.id] = exc
+        props = [{PUSH_PROPERTY: {"id": d.id}} for d in todo]
+        for d in todo:
+            self._update(d, sent_at=time.time())
+        if len(todo) == 1:
+            created = await asyncio.gather(
+                jira.create_issue(fields[0], properties=props[0]), return_exceptions=True
+            )
+        else:
+            created = await jira.create_issues(fields, properties=props) if todo else []
+        for d, key in zip(todo, created):
+            if isinstance(key, Exception):
+                errors[d.id] = key
+            else:
+                d.issue_key = key
+        for d in batch:
+            if d.issue_key is not None:             # from here on, never re-create
+                self._update(d, issue_key=d.issue_key)
+
+        # 3) every attachment of the batch, bounded by the client's slots
+        filed = [d for d in batch if d.id not in errors]
+        failed = await asyncio.gather(
+            *(upload_attachments(jira, d.issue_key, d.files) for d in filed)
+        )
+        for d, missing in zip(filed, failed):
+            if missing:                 # the issue exists: retry only these files
+                d.files = list(missing)
+                self._update(d, files=json.dumps([str(f) for f in d.files]))
+                errors[d.id] = next(iter(missing.values()))
+
+        for d in batch:
+            if d.id in errors:
+                self._retry_or_fail(d, errors[d.id])
+            else:
+                self._update(d, status=DONE, error=None)
+                get_store().release(f"push:{d.id}")
+                log.info("push %s delivered as %s", d.id[:12], d.issue_key)
+        # future reports can match them – once, not again per attachment retry
+        new = [d for d in batch if d.id in unfiled and d.issue_key is not None]
+        recorded = await asyncio.gather(
+            *(record_ticket(d.issue_key, d.draft, d.note) for d in new),
+            return_exceptions=True,
+        )
+        for d, exc in zip(new, recorded):
+            if isinstance(exc, Exception):
+                log.warning("could not index %s for dedup: %s", d.issue_key, exc)
+
+
+@lru_cache
+def get_outbox() -> Outbox:
+    """Process-wide outbox built from settings."""
+    s = get_settings()
+    return Outbox(
+        s.outbox_path,
+        workers=s.outbox_workers,
+        max_attempts=s.outbox_max_attempts,
+        backoff=s.outbox_backoff,
+        max_backoff=s.outbox_max_backoff,
+        batch=s.jira_bulk_size,
+        lease=s.outbox_lease,
+        settle=s.jira_search_settle,
+    )
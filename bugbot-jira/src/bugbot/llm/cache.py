@@ -0,0 +1,235 @@
+"""
+Content-addressed cache for validated LLM drafts.
+
+Key = sha256(backend name ‖ rendered prompt ‖ sha256 of every image), so a
+tester re-submitting the same note + screenshots after a flaky round-trip
+gets the previous drafts back without paying vendor latency or tokens.
+Only drafts that pass ``validate()`` are ever stored.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, Protocol
+
+from pydantic import ValidationError
+
+from bugbot.config import get_settings
+from bugbot.postprocess.validate import validate
+
+log = logging.getLogger(__name__)
+
+Draft = Dict[str, Any]
+
+
+# ────────────────────────────────────────────────────────────────────────
+# Storage backends
+# ────────────────────────────────────────────────────────────────────────
+class CacheBackend(Protocol):
+    """
+    Minimal key/value store; values are ``(expires_at, draft)``. Backends
+    with ``blocking = True`` do file I/O and are called off the event loop.
+    """
+
+    blocking: bool
+
+    def get(self, key: str) -> tuple[float, Draft] | None: ...
+    def set(self, key: str, expires_at: float, draft: Draft) -> None: ...
+    def delete(self, key: str) -> None: ...
+    def clear(self) -> None: ...
+    def __len__(self) -> int: ...
+
+
+class MemoryBackend:
+    """In-process LRU dict, capped at *max_entries*."""
+
+    blocking = False
+
+    def __init__(self, max_entries: int = 512) -> None:
+        self.max_entries = max_entries
+        self._data: OrderedDict[str, tuple[float, Draft]] = OrderedDict()
+
+    def get(self, key: str) -> tuple[float, Draft] | None:
+        item = self._data.get(key)
+        if item is not None:
+            self._data.move_to_end(key)
+        return item
+
+    def set(self, key: str, expires_at: float, draft: Draft) -> None:
+        self._data[key] = (expires_at, draft)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class DiskBackend:
+    """
+    One JSON file per key under *directory*; survives worker restarts.
+    When more than *max_entries* files exist the least recently written
+    ones are removed. The directory is scanned once, at start-up; after
+    that the write order is tracked in memory, so a ``set`` never lists it.
+    Files written by other workers are picked up when this one reads them.
+    """
+
+    blocking = True
+
+    def __init__(self, directory: str | Path, max_entries: int = 512) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()       # set/get run in worker threads
+        self._order: OrderedDict[str, None] = OrderedDict(
+            (p.stem, None)
+            for p in sorted(self.directory.glob("*.json"), key=_mtime)
+        )
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> tuple[float, Draft] | None:
+        try:
+            blob = json.loads(self._path(key).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        with self._lock:
+            self._order.setdefault(key)     # another worker's entry
+        return blob["expires_at"], blob["draft"]
+
+    def set(self, key: str, expires_at: float, draft: Draft) -> None:
+        tmp = self._path(key).with_suffix(f".{threading.get_ident()}.tmp")
+        tmp.write_text(
+            json.dumps({"expires_at": expires_at, "draft": draft}),
+            encoding="utf-8",
+        )
+        tmp.replace(self._path(key))          # atomic on POSIX
+        with self._lock:
+            self._order[key] = None
+            self._order.move_to_end(key)
+            evicted = [
+                self._order.popitem(last=False)[0]
+                for _ in range(len(self._order) - self.max_entries)
+            ]
+        for old in evicted:
+            self._path(old).unlink(missing_ok=True)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._order.pop(key, None)
+        self._path(key).unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._order.clear()
+        for p in self.directory.glob("*.json"):
+            p.unlink(missing_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+
+def _mtime(path: Path) -> float:
+    try:
+        return path.stat().st_mtime
+    except OSError:                         # removed by another worker
+        return 0.0
+
+
+# ────────────────────────────────────────────────────────────────────────
+# Cache front-end
+# ────────────────────────────────────────────────────────────────────────
+class DraftCache:
+    """TTL cache of ``backend name → validated draft`` with hit/miss counters."""
+
+    def __init__(self, backend: CacheBackend, *, ttl: float = 3600.0) -> None:
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(prompt: str, image_digests: Iterable[str], backend: str) -> str:
+        """*image_digests* are the sha256 hex digests of each attached image."""
+        h = hashlib.sha256()
+        for part in (backend.encode(), prompt.encode("utf-8")):
+            h.update(len(part).to_bytes(8, "big"))
+            h.update(part)
+        for digest in image_digests:
+            h.update(bytes.fromhex(digest))
+        return h.hexdigest()
+
+    def get(self, key: str) -> Draft | None:
+        item = self.backend.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        expires_at, draft = item
+        if expires_at < time.time():
+            self.backend.delete(key)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return copy.deepcopy(draft)       # callers mutate "attachments"
+
+    def put(self, key: str, draft: Draft) -> bool:
+        """Store *draft* if it is a valid ``ReportOut``; return whether it was stored."""
+        try:
+            validate(draft)
+        except ValidationError:
+            return False
+        self.backend.set(key, time.time() + self.ttl, copy.deepcopy(draft))
+        return True
+
+    async def aget(self, key: str) -> Draft | None:
+        """``get`` for the event loop: file-backed lookups run in a thread."""
+        if self.backend.blocking:
+            return await asyncio.to_thread(self.get, key)
+        return self.get(key)
+
+    async def aput(self, key: str, draft: Draft) -> bool:
+        """``put`` for the event loop: file-backed writes run in a thread."""
+        if self.backend.blocking:
+            return await asyncio.to_thread(self.put, key, draft)
+        return self.put(key, draft)
+
+    def clear(self) -> None:
+        self.backend.clear()
+        self.hits = self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.backend)}
+
+
+@lru_cache
+def get_cache() -> DraftCache | None:
+    """Process-wide cache built from settings; ``None`` when disabled."""
+    settings = get_settings()
+    if settings.cache_backend == "off":
+        return None
+    if settings.cache_backend == "disk":
+        backend: CacheBackend = DiskBackend(
+            settings.cache_dir, max_entries=settings.cache_max_entries
+        )
+    elif settings.cache_backend == "memory":
+        backend = MemoryBackend(max_entries=settings.cache_max_entries)
+    else:
+        raise ValueError(f"unknown cache_backend {settings.cache_backend!r}")
+    log.info("draft cache: %s backend, ttl=%ss", settings.cache_backend, settings.cache_ttl)
+    return DraftCache(backend, ttl=settings.cache_ttl)
@@ -0,0 +1,134 @@
+"""
+Shared transport for every LLM adapter.
+
+One pooled ``httpx.AsyncClient`` (keep-alive, HTTP/2 when the ``h2``
+package is installed, explicit connect/read/write/pool timeouts) is handed
+to the OpenAI and Anthropic SDKs instead of each building its own. Calls
+go through ``slot(name)``, which caps concurrent requests per backend and
+enforces a total deadline. Blocking SDKs (Gemini's sync
+``generate_content``) run on a dedicated bounded executor rather than the
+loop's default one.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, TypeVar
+
+from bugbot.config import get_settings
+
+if TYPE_CHECKING:
+    import httpx
+
+T = TypeVar("T")
+
+
+class Transport:
+    def __init__(
+        self,
+        *,
+        max_connections: int = 32,
+        max_keepalive: int = 16,
+        keepalive_expiry: float = 30.0,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 60.0,
+        total_timeout: float = 90.0,
+        concurrency: int = 8,
+        per_backend: dict[str, int] | None = None,
+        executor_workers: int = 4,
+    ) -> None:
+        import httpx                    # deferred: keeps `import bugbot…` fast
+
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(
+            connect=connect_timeout, read=read_timeout,
+            write=read_timeout, pool=connect_timeout,
+        )
+        self.total_timeout = total_timeout
+        self.concurrency = concurrency
+        self.per_backend = per_backend or {}
+        self.executor_workers = executor_workers
+        self.http2 = importlib.util.find_spec("h2") is not None
+        self._http: httpx.AsyncClient | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self._slots: dict[str, asyncio.Semaphore] = {}
+        self.inflight: dict[str, int] = {}
+
+    # ── pooled HTTP client ───────────────────────────────────────────
+    @property
+    def http(self) -> httpx.AsyncClient:
+        if self._http is None or self._http.is_closed:
+            import httpx
+
+            self._http = httpx.AsyncClient(
+                limits=self.limits, timeout=self.timeout, http2=self.http2
+            )
+        return self._http
+
+    # ── per-backend admission + total deadline ───────────────────────
+    @asynccontextmanager
+    async def slot(self, name: str) -> AsyncIterator[None]:
+        sem = self._slots.get(name)
+        if sem is None:
+            sem = self._slots[name] = asyncio.Semaphore(
+                self.per_backend.get(name, self.concurrency)
+            )
+        async with sem:
+            self.inflight[name] = self.inflight.get(name, 0) + 1
+            try:
+                async with asyncio.timeout(self.total_timeout):
+                    yield
+            finally:
+                self.inflight[name] -= 1
+
+    # ── blocking SDK calls ───────────────────────────────────────────
+    async def run_blocking(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                self.executor_workers, thread_name_prefix="bugbot-llm"
+            )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(fn, *args, **kwargs)
+        )
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "inflight": dict(self.inflight),
+        }
+
+    async def aclose(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+@lru_cache
+def get_transport() -> Transport:
+    """Process-wide LLM transport built from settings."""
+    s = get_settings()
+    return Transport(
+        max_connections=s.llm_max_connections,
+        max_keepalive=s.llm_max_keepalive,
+        keepalive_expiry=s.llm_keepalive_expiry,
+        connect_timeout=s.llm_connect_timeout,
+        read_timeout=s.llm_read_timeout,
+        total_timeout=s.llm_total_timeout,
+        concurrency=s.llm_concurrency,
+        per_backend=s.llm_concurrency_per_backend,
+        executor_workers=s.llm_executor_workers,
+    )
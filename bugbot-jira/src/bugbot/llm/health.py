@@ -0,0 +1,166 @@
+"""
+Per-backend circuit breakers and the health scoreboard.
+
+CLOSED ─(error/slow rate ≥ threshold)→ OPEN ─(cooldown)→ HALF_OPEN
+HALF_OPEN lets exactly one probe through: success closes the breaker,
+failure re-opens it for another cooldown.
+
+``RetryStats`` counts how often a backend's draft needed a repair
+round-trip and how many bytes those retries re-sent.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict
+
+from bugbot.config import get_settings
+from bugbot.llm.ratelimit import get_limiter
+from bugbot.utils.timing import LatencyWindow
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        *,
+        window: int = 20,
+        min_calls: int = 5,
+        error_rate: float = 0.5,
+        slow_call: float = 30.0,
+        cooldown: float = 30.0,
+    ) -> None:
+        self.name = name
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_call = slow_call
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.latency = LatencyWindow()
+        self._outcomes: deque[bool] = deque(maxlen=window)   # True = healthy
+        self._opened_at = 0.0
+        self._probing = False
+        self.successes = 0
+        self.failures = 0
+
+    # ── admission ────────────────────────────────────────────────────
+    def allow(self) -> bool:
+        """May a call go to this backend right now?"""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def release(self) -> None:
+        """A call was abandoned (e.g. cancelled) without a verdict."""
+        self._probing = False
+
+    # ── outcomes ─────────────────────────────────────────────────────
+    def record_success(self, seconds: float) -> None:
+        self.latency.add(seconds)
+        self.successes += 1
+        healthy = seconds <= self.slow_call
+        if self.state == HALF_OPEN:
+            if healthy:
+                self._close()
+            else:
+                self._open()
+            return
+        self._outcomes.append(healthy)
+        self._maybe_trip()
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == HALF_OPEN:
+            self._open()
+            return
+        self._outcomes.append(False)
+        self._maybe_trip()
+
+    def _maybe_trip(self) -> None:
+        n = len(self._outcomes)
+        if n >= self.min_calls and self._outcomes.count(False) / n >= self.error_rate:
+            self._open()
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._probing = False
+
+    def _close(self) -> None:
+        self.state = CLOSED
+        self._outcomes.clear()
+        self._probing = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        n = len(self._outcomes)
+        return {
+            "backend": self.name,
+            "state": self.state,
+            "successes": self.successes,
+            "failures": self.failures,
+            "error_rate": round(self._outcomes.count(False) / n, 3) if n else 0.0,
+            "p50_s": self.latency.percentile(0.5),
+            "p95_s": self.latency.percentile(0.95),
+        }
+
+
+@dataclass
+class RetryStats:
+    drafts: int = 0             # answers received and validated
+    retries: int = 0            # of those, how many needed a repair call
+    retry_bytes: int = 0        # prompt bytes sent by repair calls
+
+    def record(self, *, retried_bytes: int | None = None) -> None:
+        self.drafts += 1
+        if retried_bytes is not None:
+            self.retries += 1
+            self.retry_bytes += retried_bytes
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "retry_rate": round(self.retries / self.drafts, 3) if self.drafts else 0.0,
+            "retry_bytes_avg": self.retry_bytes // self.retries if self.retries else 0,
+        }
+
+
+BREAKERS: dict[str, CircuitBreaker] = {}
+RETRIES: dict[str, RetryStats] = {}
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Return (creating on first use) the breaker for backend *name*."""
+    if name not in BREAKERS:
+        s = get_settings()
+        BREAKERS[name] = CircuitBreaker(
+            name,
+            window=s.breaker_window,
+            min_calls=s.breaker_min_calls,
+            error_rate=s.breaker_error_rate,
+            slow_call=s.breaker_slow_call,
+            cooldown=s.breaker_cooldown,
+        )
+    return BREAKERS[name]
+
+
+def get_retry_stats(name: str) -> RetryStats:
+    return RETRIES.setdefault(name, RetryStats())
+
+
+def scoreboard(names: list[str]) -> list[Dict[str, Any]]:
+    return [
+        {
+            **get_breaker(n).snapshot(),
+            **get_retry_stats(n).snapshot(),
+            **get_limiter(n).snapshot(),
+        }
+        for n in names
+    ]
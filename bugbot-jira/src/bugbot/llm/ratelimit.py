@@ -0,0 +1,189 @@
+"""
+Per-backend admission control in front of vendor calls.
+
+Each backend has two token buckets – requests/minute and (estimated)
+tokens/minute, images included – refilled continuously. A call that cannot
+start at once waits in a priority queue (critical before major before
+minor, FIFO within a level) until both buckets allow it. A call that
+would have to wait longer than its deadline is refused up front with
+``RateLimited`` carrying a ``retry_after`` the API turns into
+``503 Retry-After`` instead of sending a request the vendor would 429.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Any, Dict, Sequence
+
+from bugbot.config import get_settings
+from bugbot.preprocess.compact import approx_tokens
+from bugbot.preprocess.vision import Attachment
+
+SEVERITY_PRIORITY = {"critical": 0, "major": 1, "minor": 2}
+DEFAULT_PRIORITY = SEVERITY_PRIORITY["major"]
+
+
+def priority_for(severity: str | None) -> int:
+    return SEVERITY_PRIORITY.get((severity or "").lower(), DEFAULT_PRIORITY)
+
+
+def estimate_tokens(
+    prompt: str, images: Sequence[Attachment] | None = None, *, output: int = 1024
+) -> int:
+    """Rough, vendor-agnostic token cost: ~4 chars/token, ~w·h/750 per image."""
+    vision = sum(max(85, a.width * a.height // 750) for a in images or [])
+    return approx_tokens(prompt) + vision + output
+
+
+class RateLimited(Exception):
+    def __init__(self, backend: str, retry_after: float) -> None:
+        super().__init__(f"{backend}: rate limited, retry after {retry_after:.1f}s")
+        self.backend = backend
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float) -> None:
+        self.rate = per_minute / 60.0           # units per second
+        self.capacity = per_minute              # one minute of burst
+        self.level = per_minute
+        self._stamp = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def wait(self, amount: float) -> float:
+        """Seconds until *amount* is available (0 if it already is)."""
+        self._refill()
+        return max(0.0, amount - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.level -= amount
+
+    def give(self, amount: float) -> None:
+        """Return *amount* taken for a call that never ran."""
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+
+class BackendLimiter:
+    def __init__(self, name: str, *, rpm: float = 0, tpm: float = 0) -> None:
+        self.name = name
+        self.requests = TokenBucket(rpm) if rpm > 0 else None    # 0 = unlimited
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        self._waiters: list[tuple[int, int, int, asyncio.Future]] = []  # heap
+        self._seq = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+        self.admitted = 0
+        self.rejected = 0
+
+    def _cost(self, tokens: int) -> int:
+        # a single call larger than a minute's budget still has to run
+        return min(tokens, int(self.tokens.capacity)) if self.tokens else tokens
+
+    def _wait(self, calls: int, tokens: int) -> float:
+        wait = 0.0
+        if self.requests:
+            wait = self.requests.wait(calls)
+        if self.tokens:
+            wait = max(wait, self.tokens.wait(tokens))
+        return wait
+
+    def _take(self, tokens: int) -> None:
+        if self.requests:
+            self.requests.take(1)
+        if self.tokens:
+            self.tokens.take(tokens)
+        self.admitted += 1
+
+    def _refund(self, tokens: int) -> None:
+        if self.requests:
+            self.requests.give(1)
+        if self.tokens:
+            self.tokens.give(tokens)
+        self.admitted -= 1
+        self._pump()                            # the next waiter may fit now
+
+    def _ahead(self, priority: int) -> list[tuple[int, int, int, asyncio.Future]]:
+        return [w for w in self._waiters if w[0] <= priority and not w[3].done()]
+
+    def delay(self, tokens: int, priority: int = DEFAULT_PRIORITY) -> float:
+        """Estimated seconds before a call of *tokens* at *priority* could start."""
+        ahead = self._ahead(priority)
+        return self._wait(
+            len(ahead) + 1, sum(w[2] for w in ahead) + self._cost(tokens)
+        )
+
+    async def acquire(
+        self, tokens: int, *, priority: int = DEFAULT_PRIORITY, timeout: float = 30.0
+    ) -> None:
+        """Wait for capacity; raise ``RateLimited`` rather than wait past *timeout*."""
+        tokens = self._cost(tokens)
+        delay = self.delay(tokens, priority)
+        if delay > timeout:
+            self.rejected += 1
+            raise RateLimited(self.name, delay)
+        if delay == 0 and not self._ahead(priority):
+            self._take(tokens)
+            return
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), tokens, fut))
+        self._pump()
+        try:
+            await asyncio.wait_for(fut, timeout)
+        except (TimeoutError, asyncio.CancelledError) as exc:
+            # _pump may have admitted us (and taken the tokens) just before
+            admitted = fut.done() and not fut.cancelled()
+            if isinstance(exc, asyncio.CancelledError):
+                if admitted:                    # the call will never be made
+                    self._refund(tokens)
+                raise
+            if admitted:                        # in time after all
+                return
+            self.rejected += 1
+            raise RateLimited(self.name, self.delay(tokens, priority)) from None
+
+    def _pump(self) -> None:
+        """Admit queued calls in priority order; re-arm for the head's wait."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._waiters:
+            _, _, tokens, fut = self._waiters[0]
+            if fut.done():                      # timed out or cancelled
+                heapq.heappop(self._waiters)
+                continue
+            wait = self._wait(1, tokens)
+            if wait > 0:
+                self._timer = asyncio.get_running_loop().call_later(wait, self._pump)
+                return
+            heapq.heappop(self._waiters)
+            self._take(tokens)
+            fut.set_result(None)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "rate_queued": len(self._ahead(max(SEVERITY_PRIORITY.values()))),
+            "rate_admitted": self.admitted,
+            "rate_rejected": self.rejected,
+        }
+
+
+LIMITERS: dict[str, BackendLimiter] = {}
+
+
+def get_limiter(name: str) -> BackendLimiter:
+    """Return (creating on first use) the limiter for backend *name*."""
+    if name not in LIMITERS:
+        s = get_settings()
+        cfg = s.rate_limits.get(name, {})
+        LIMITERS[name] = BackendLimiter(
+            name, rpm=cfg.get("rpm", s.rate_rpm), tpm=cfg.get("tpm", s.rate_tpm)
+        )
+    return LIMITERS[name]
@@ -6,13 +6,23 @@ import asyncio
 import json
 import logging
 import os                             # CHANGED: added for log file path and GenAI SDK config
-import base64                         # CHANGED: added for encoding image bytes
-from typing import Any, Dict, List
-import re
+import threading
+from functools import lru_cache
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Sequence
+import time
 
 from bugbot.config import get_settings
-from bugbot.postprocess.validate import validate, FIX_JSON_PROMPT
+from bugbot.llm.cache import get_cache
+from bugbot.llm.client import get_transport
+from bugbot.llm.health import get_breaker, get_retry_stats
+from bugbot.llm.ratelimit import (
+    DEFAULT_PRIORITY, RateLimited, estimate_tokens, get_limiter,
+)
+from bugbot.llm.stream import JsonStreamParser, parse_first_object
+from bugbot.postprocess.validate import validate, repair_prompt, report_schema
 from bugbot.ingress.schemas import InvalidDraft
+from bugbot.preprocess.pool import get_pool
+from bugbot.preprocess.vision import Attachment, ImagePolicy, apply_policy
 from pydantic import ValidationError
 
 settings = get_settings()
@@ -20,17 +30,19 @@ log = logging.getLogger(__name__)
 
 # ────────────────────────────────────────────────────────────────────────
 # CHANGED: configure a FileHandler so we capture full DEBUG payloads (incl. base64)
-LOG_PATH = os.path.join(os.getcwd(), "llm_payload.log")
-os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
-file_h = logging.FileHandler(LOG_PATH, mode="a", encoding="utf-8")
-file_h.setLevel(logging.DEBUG)
-file_h.setFormatter(
-    logging.Formatter("%(asctime)s %(name)s %(levelname)s %(message)s")
-)
-log.addHandler(file_h)
-# Also capture external libs
-logging.getLogger("openai").addHandler(file_h)
-logging.getLogger("anthropic").addHandler(file_h)
+# Opt-in via LLM_PAYLOAD_LOG=<path>; the file can grow large and holds user data.
+LOG_PATH = settings.llm_payload_log
+if LOG_PATH:
+    os.makedirs(os.path.dirname(os.path.abspath(LOG_PATH)), exist_ok=True)
+    file_h = logging.FileHandler(LOG_PATH, mode="a", encoding="utf-8")
+    file_h.setLevel(logging.DEBUG)
+    file_h.setFormatter(
+        logging.Formatter("%(asctime)s %(name)s %(levelname)s %(message)s")
+    )
+    log.addHandler(file_h)
+    # Also capture external libs
+    logging.getLogger("openai").addHandler(file_h)
+    logging.getLogger("anthropic").addHandler(file_h)
 # ────────────────────────────────────────────────────────────────────────
 
 # Force every model to answer in strict JSON
@@ -57,60 +69,75 @@ def _safe_load(raw: str) -> Dict[str, Any]:
     try:
         return json.loads(raw)
     except json.JSONDecodeError:
-        match = re.search(r"\{.*\}", raw, re.S)
-        if match:
-            return json.loads(match.group(0))
-        raise
+        return parse_first_object(raw)
+
+FieldCallback = Callable[[str, str, Any], Awaitable[None]]   # (model, key, value)
 
 # ────────────────────────────────────────────────────────────────────────
-# Optional SDK imports (only loaded when DRY_RUN is False)
-# ────────────────────────────────────────────────────────────────────────
-if not settings.dry_run:
-    log.setLevel(logging.DEBUG)
-    import openai
-    import anthropic
-    import google.generativeai as genai
+# Vendor SDKs are imported inside each adapter's __init__, so importing this
+# module stays cheap; get_clients() builds them on first use (or warm-up).
 # ────────────────────────────────────────────────────────────────────────
 
 class _Base:
     name: str
-    async def chat(self, prompt: str) -> Dict[str, Any]: ...
+    image_policy: ImagePolicy = ImagePolicy()
+    async def chat(
+        self, prompt: str, *, images: Sequence[Attachment] | None = None
+    ) -> Dict[str, Any]: ...
+    # Streaming adapters also implement
+    #   def stream(self, prompt, *, images=None) -> AsyncIterator[str]
+    # yielding raw text deltas; see _read_stream().
 
 # ────────────────────────────────────────────────────────────────────────
 # OpenAI (GPT-4 / GPT-4o)
 # ────────────────────────────────────────────────────────────────────────
 class _OpenAI(_Base):
     name = "gpt-4o-mini"
+    image_policy = ImagePolicy(max_edge=2048)   # "high" detail downsizes past this
 
     def __init__(self) -> None:
-        self._client = openai.AsyncOpenAI(api_key=settings.openai_key)
+        import openai
+        self._client = openai.AsyncOpenAI(
+            api_key=settings.openai_key, http_client=get_transport().http
+        )
+
+    def _format(self) -> dict:
+        if not settings.llm_structured:
+            return {}
+        schema = {**report_schema(), "additionalProperties": False}
+        return {"response_format": {
+            "type": "json_schema",
+            "json_schema": {"name": "bug_report", "strict": True, "schema": schema},
+        }}
 
-    async def chat(self, prompt: str, *, image_bytes: list[bytes] | None = None):
+    def _messages(self, prompt: str, images: Sequence[Attachment] | None) -> list[dict]:
         content_parts: list[Any] = [{"type": "text", "text": prompt}]
-        if image_bytes:
-            for b in image_bytes:
-                b64 = base64.b64encode(b).decode()
-                content_parts.append({
-                    "type": "image_url",
-                    "image_url": {"url": f"data:image/png;base64,{b64}"}
-                })
-        messages = [
+        for att in images or []:
+            content_parts.append({
+                "type": "image_url",
+                "image_url": {"url": att.data_uri}
+            })
+        return [
             {"role": "system", "content": JSON_INSTRUCTION},
             {"role": "user", "content": content_parts},
         ]
+
+    async def chat(self, prompt: str, *, images: Sequence[Attachment] | None = None):
+        messages = self._messages(prompt, images)
         resp = await self._client.chat.completions.create(
             model="gpt-4o-mini",
             messages=messages,
             temperature=0.3,
+            **self._format(),
         )
         # CHANGED: log the exact outgoing payload (truncated in-list for readability)
         log.debug(
             "▶️ OpenAI.chat called\n"
             "    prompt=%r\n"
-            "    image_bytes=%d items\n"
+            "    images=%d items\n"
             "    messages=%r",
             prompt,
-            len(image_bytes or []),
+            len(images or []),
             [{"role": m["role"], "content": (
                 m["content"][:100] if isinstance(m["content"], str)
                 else f"<{len(m['content'])} parts>"
@@ -118,33 +145,68 @@ class _OpenAI(_Base):
         )
         return _safe_load(resp.choices[0].message.content)
 
+    async def stream(self, prompt: str, *, images: Sequence[Attachment] | None = None):
+        resp = await self._client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=self._messages(prompt, images),
+            temperature=0.3,
+            stream=True,
+            **self._format(),
+        )
+        try:
+            async for chunk in resp:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            await resp.close()          # drop the connection, not just the loop
+
 # ────────────────────────────────────────────────────────────────────────
 # Anthropic Claude 3 Sonnet
 # ────────────────────────────────────────────────────────────────────────
 class _Claude(_Base):
     name = "claude-3-5-sonnet-20240620"
+    image_policy = ImagePolicy(max_edge=1568)   # Anthropic's recommended long edge
 
     def __init__(self):
-        self._client = anthropic.AsyncAnthropic(api_key=settings.anthropic_key)
+        import anthropic
+        self._client = anthropic.AsyncAnthropic(
+            api_key=settings.anthropic_key, http_client=get_transport().http
+        )
 
-    async def chat(self, prompt: str, *, image_bytes: list[bytes] | None = None):
+    def _tools(self) -> dict:
+        # forced tool call: the draft arrives as schema-checked tool input
+        if not settings.llm_structured:
+            return {}
+        return {
+            "tools": [{
+                "name": "bug_report",
+                "description": "Record the drafted bug report.",
+                "input_schema": report_schema(),
+            }],
+            "tool_choice": {"type": "tool", "name": "bug_report"},
+        }
+
+    def _contents(self, prompt: str, images: Sequence[Attachment] | None) -> list[dict]:
         contents: list[dict] = []
-        for b in image_bytes or []:
+        for att in images or []:
             contents.append({
                 "type": "image",
                 "source": {
                     "type": "base64",
-                    "media_type": "image/png",
-                    "data": base64.b64encode(b).decode()
+                    "media_type": att.mime,
+                    "data": att.b64,
                 }
             })
         contents.append({"type": "text", "text": prompt})
+        return contents
 
+    async def chat(self, prompt: str, *, images: Sequence[Attachment] | None = None):
         resp = await self._client.messages.create(
             model=self.name,
             system=JSON_INSTRUCTION,
-            messages=[{"role": "user", "content": contents}],
+            messages=[{"role": "user", "content": self._contents(prompt, images)}],
             max_tokens=1024,
+            **self._tools(),
         )
         # CHANGED: debug log for Claude payload
         try:
@@ -158,56 +220,225 @@ class _Claude(_Base):
             prompt,
             sent,
         )
+        for block in resp.content:
+            if block.type == "tool_use":
+                return block.input
         return _safe_load(resp.content[0].text)
 
+    async def stream(self, prompt: str, *, images: Sequence[Attachment] | None = None):
+        async with self._client.messages.stream(
+            model=self.name,
+            system=JSON_INSTRUCTION,
+            messages=[{"role": "user", "content": self._contents(prompt, images)}],
+            max_tokens=1024,
+            **self._tools(),
+        ) as resp:
+            async for event in resp:
+                if event.type != "content_block_delta":
+                    continue
+                if event.delta.type == "input_json_delta":      # tool input
+                    yield event.delta.partial_json
+                elif event.delta.type == "text_delta":
+                    yield event.delta.text
+
 # ────────────────────────────────────────────────────────────────────────
 # Gemini via Google Gen-AI SDK (multimodal)
 # ────────────────────────────────────────────────────────────────────────
+@lru_cache
+def _gemini_config_keys() -> frozenset[str]:
+    """GenerationConfig fields the installed google-generativeai accepts."""
+    from dataclasses import fields
+    from google.generativeai.types import GenerationConfig
+    return frozenset(f.name for f in fields(GenerationConfig))
+
+
 class _GeminiStudio(_Base):
     name = "gemini-2.0-flash-lite-001"
+    image_policy = ImagePolicy(max_edge=1536)   # two 768 px tiles per edge
 
     def __init__(self):
+        import google.generativeai as genai
         genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
         self._model = genai.GenerativeModel(self.name)
 
-    async def chat(self, prompt: str, *, image_bytes: list[bytes] | None = None):
+    def _config(self) -> dict:
+        config: dict[str, Any] = {"temperature": 0.2, "max_output_tokens": 1024}
+        if settings.llm_structured:
+            # JSON mode arrived in SDK 0.5 and schemas in 0.6; older SDKs
+            # reject unknown keys, so they get plain JSON_INSTRUCTION only
+            supported = _gemini_config_keys()
+            if "response_mime_type" in supported:
+                config["response_mime_type"] = "application/json"
+            if "response_schema" in supported:
+                config["response_schema"] = report_schema()
+        return config
+
+    def _parts(self, prompt: str, images: Sequence[Attachment] | None) -> list[Any]:
         parts: list[Any] = []
-        for b in image_bytes or []:
-            parts.append({"mime_type": "image/png", "data": b})
+        for att in images or []:
+            parts.append({"mime_type": att.mime, "data": att.raw})
         parts.append(JSON_INSTRUCTION)
         parts.append(prompt)
+        return parts
 
-        loop = asyncio.get_running_loop()
-        resp = await loop.run_in_executor(
-            None,
-            lambda: self._model.generate_content(
-                parts,
-                generation_config={
-                    "temperature": 0.2,
-                    "max_output_tokens": 1024,
-                },
-            ),
+    async def chat(self, prompt: str, *, images: Sequence[Attachment] | None = None):
+        # sync SDK call on the transport's own bounded executor
+        resp = await get_transport().run_blocking(
+            self._model.generate_content,
+            self._parts(prompt, images),
+            generation_config=self._config(),
+            request_options={"timeout": settings.llm_read_timeout},
         )
         # CHANGED: (optional) you could log here similarly if desired
         return _safe_load(resp.text)
 
+    async def stream(self, prompt: str, *, images: Sequence[Attachment] | None = None):
+        resp = await self._model.generate_content_async(
+            self._parts(prompt, images),
+            generation_config=self._config(),
+            stream=True,
+            request_options={"timeout": settings.llm_read_timeout},
+        )
+        async for chunk in resp:
+            if chunk.parts:
+                yield chunk.text
+
 # ────────────────────────────────────────────────────────────────────────
 # Build active client list (order = fallback order)
 # ────────────────────────────────────────────────────────────────────────
-CLIENTS: list[_Base] = []
-if settings.openai_key:
-    CLIENTS.append(_OpenAI())
-if settings.anthropic_key:
-    CLIENTS.append(_Claude())
-if os.getenv("GOOGLE_API_KEY"):
-    CLIENTS.append(_GeminiStudio())
+CLIENTS: list[_Base] | None = None     # built lazily by get_clients()
+_clients_lock = threading.Lock()       # warm-up thread vs first request
+
+
+def _build_clients() -> list[_Base]:
+    if settings.dry_run:
+        return []
+    log.setLevel(logging.DEBUG)
+    clients: list[_Base] = []
+    if settings.openai_key:
+        clients.append(_OpenAI())
+    if settings.anthropic_key:
+        clients.append(_Claude())
+    if os.getenv("GOOGLE_API_KEY"):
+        clients.append(_GeminiStudio())
+    return clients
+
+
+def get_clients() -> list[_Base]:
+    """Active backends in fallback order; SDKs are imported on first call."""
+    global CLIENTS
+    if CLIENTS is None:
+        with _clients_lock:
+            if CLIENTS is None:
+                CLIENTS = _build_clients()
+    return CLIENTS
+
+async def _read_stream(
+    client: _Base,
+    prompt: str,
+    images: Sequence[Attachment] | None,
+    on_field: FieldCallback | None,
+) -> Dict[str, Any]:
+    """Parse ``client.stream`` as it arrives; stop at the object's closing brace."""
+    parser = JsonStreamParser()
+    deltas = client.stream(prompt, images=images)
+    try:
+        async for delta in deltas:
+            for key, value in parser.feed(delta):
+                if on_field:
+                    await on_field(client.name, key, value)
+            if parser.done:
+                break                   # skip trailing commentary tokens
+    finally:
+        await deltas.aclose()
+    if not parser.done:
+        raise ValueError("stream ended before the JSON object was complete")
+    return parser.value
+
+
+async def _timed_chat(
+    client: _Base,
+    prompt: str,
+    images: Sequence[Attachment] | None = None,
+    on_field: FieldCallback | None = None,
+    *, priority: int = DEFAULT_PRIORITY,
+) -> Dict[str, Any]:
+    """
+    ``client.chat`` (or its stream) once the backend's rate limiter admits
+    it, with latency + outcome fed to the breaker.
+    """
+    breaker = get_breaker(client.name)
+    try:
+        await get_limiter(client.name).acquire(
+            estimate_tokens(prompt, images),
+            priority=priority,
+            timeout=settings.rate_queue_timeout,
+        )
+    except BaseException:               # refused or cancelled: no verdict
+        breaker.release()
+        raise
+    try:
+        async with get_transport().slot(client.name):
+            t0 = time.perf_counter()
+            if settings.llm_stream and hasattr(client, "stream"):
+                raw = await _read_stream(client, prompt, images, on_field)
+            else:
+                raw = await client.chat(prompt, images=images)
+    except asyncio.CancelledError:
+        breaker.release()
+        raise
+    except Exception:
+        breaker.record_failure()
+        raise
+    breaker.record_success(time.perf_counter() - t0)
+    return raw
+
+
+def _policy(client: _Base) -> ImagePolicy:
+    override = settings.image_policies.get(client.name)
+    if override:
+        return ImagePolicy(**override)
+    return getattr(client, "image_policy", _Base.image_policy)
+
+
+async def _prepare(
+    images: Sequence[Attachment] | None, clients: Sequence[_Base]
+) -> dict[ImagePolicy, list[Attachment]]:
+    """Right-size *images* once per distinct backend policy, off the loop."""
+    if not images:
+        return {}
+    policies = list({_policy(c) for c in clients})
+    pool = get_pool()
+    sized = await asyncio.gather(*(
+        asyncio.gather(*(pool.run(apply_policy, a, p) for a in images))
+        for p in policies
+    ))
+    return dict(zip(policies, map(list, sized)))
+
+
+def _skipped(client: _Base) -> bool:
+    """True (and logged) when the backend's circuit is open."""
+    if get_breaker(client.name).allow():
+        return False
+    log.warning("LLM %s skipped: circuit open", client.name)
+    return True
+
+
+def _hedge_delay(name: str) -> float:
+    """Seconds to wait on *name* before firing the next backend."""
+    window = get_breaker(name).latency
+    if len(window) < settings.hedge_min_samples:
+        return settings.hedge_default_delay
+    q = settings.hedge_percentiles.get(name, settings.hedge_percentile)
+    return window.percentile(q) or settings.hedge_default_delay
 
 # ────────────────────────────────────────────────────────────────────────
 # Public helper: single complete
 # ────────────────────────────────────────────────────────────────────────
 async def complete(prompt: str) -> Dict[str, Any]:
     """Return the first successful LLM response as a dict."""
-    if settings.dry_run or not CLIENTS:
+    clients = get_clients()
+    if settings.dry_run or not clients:
         log.warning("DRY-RUN mode – returning stub LLM response")
         return {
             "title": prompt[:60].splitlines()[0].capitalize(),
@@ -218,49 +449,219 @@ async def complete(prompt: str) -> Dict[str, Any]:
             "attachments": [],
         }
 
-    for client in CLIENTS:
+    for client in clients:
+        if _skipped(client):
+            continue
         try:
-            return await client.chat(prompt)
+            return await _timed_chat(client, prompt)
         except Exception as exc:
             log.error("LLM %s failed: %s", client.name, exc, exc_info=False)
     raise RuntimeError("All LLM backends failed")
 
 # ────────────────────────────────────────────────────────────────────────
-# Public helper: fan-out to all backends
+# Public helper: hedged first-wins complete
 # ────────────────────────────────────────────────────────────────────────
-async def complete_many(
+async def complete_hedged(
     prompt: str,
-    *, image_bytes: List[bytes] | None = None
-) -> list[tuple[str, Dict[str, Any]]]:
+    *, images: Sequence[Attachment] | None = None,
+    on_field: FieldCallback | None = None,
+    priority: int = DEFAULT_PRIORITY,
+) -> tuple[str, Dict[str, Any]]:
     """
-    Run the prompt against every healthy backend in parallel.
-    Returns list of (model_name, ticket_json) tuples – order is fixed.
+    Start the primary backend; whenever the newest in-flight call outlives
+    its backend's latency percentile (or fails), fire the next one too.
+    The first answer that validates against ``ReportOut`` wins and every
+    other in-flight call is cancelled. Returns ``(model_name, ticket_json)``.
+    Used instead of ``complete_many`` when ``llm_mode`` is ``"hedged"``.
     """
-    if settings.dry_run or not CLIENTS:
-        return [("stub", await complete(prompt))]  # reuse stub
+    clients = get_clients()
+    if settings.dry_run or not clients:
+        return "stub", await complete(prompt)
+
+    prepared = await _prepare(images, clients)
+    queue = iter(clients)
+    inflight: dict[asyncio.Task, _Base] = {}
+    newest: _Base | None = None
+    launched = 0
+
+    def _launch() -> bool:
+        nonlocal newest, launched
+        client = next((c for c in queue if not _skipped(c)), None)
+        if client is None:
+            return False
+        sized = prepared.get(_policy(client), images)
+        task = asyncio.create_task(
+            _timed_chat(client, prompt, sized, on_field, priority=priority)
+        )
+        inflight[task] = newest = client
+        launched += 1
+        return True
 
-    async def _call(client: _Base):
+    _launch()
+    throttled: list[RateLimited] = []
+    exhausted = False
+    try:
+        while inflight:
+            timeout = None if exhausted else _hedge_delay(newest.name)
+            done, _ = await asyncio.wait(
+                inflight, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:                      # hedge: primary is slow
+                log.info("hedging: %s slower than %.2fs", newest.name, timeout)
+                exhausted = not _launch()
+                continue
+            for task in done:
+                client = inflight.pop(task)
+                try:
+                    raw = task.result()
+                    validate(raw)
+                    return client.name, raw
+                except Exception as exc:
+                    if isinstance(exc, RateLimited):
+                        throttled.append(exc)
+                    log.error("LLM %s failed: %s", client.name, exc, exc_info=False)
+                    if not exhausted:
+                        exhausted = not _launch()
+    finally:
+        for task in inflight:
+            task.cancel()
+    if throttled and len(throttled) == launched:     # backpressure, not failure
+        raise RateLimited("all backends", min(e.retry_after for e in throttled))
+    raise RuntimeError("All LLM backends failed")
+
+# ────────────────────────────────────────────────────────────────────────
+# Public helpers: fan-out to all backends
+# ────────────────────────────────────────────────────────────────────────
+async def _complete_one(
+    client: _Base,
+    prompt: str,
+    key: str | None,
+    sized: Sequence[Attachment] | None,
+    on_field: FieldCallback | None = None,
+    priority: int = DEFAULT_PRIORITY,
+) -> tuple[str, Dict[str, Any]]:
+    """Breaker → chat → validate (+ one fixer retry) → cache under *key*."""
+    cache = get_cache()
+    if _skipped(client):
+        return client.name, {"error": "backend unavailable (circuit open)"}
+    try:
+        raw = await _timed_chat(client, prompt, sized, on_field, priority=priority)
+        stats = get_retry_stats(client.name)
         try:
-            raw = await client.chat(prompt, image_bytes=image_bytes)
+            validate(raw)
+            stats.record()
+            if cache:
+                await cache.aput(key, raw)
+            return client.name, raw
+        except ValidationError as ve:
+            # one repair retry: only the bad JSON + errors, no note or images
+            if _skipped(client):            # tripped while this call ran
+                return client.name, InvalidDraft(
+                    error=f"validation failed, repair skipped (circuit open): {ve.errors()[:2]}",
+                    raw=raw,
+                ).model_dump()
+            fix = repair_prompt(raw, ve)
+            stats.record(retried_bytes=len(fix.encode()))
+            log.info("LLM %s draft invalid, retrying with %d bytes", client.name, len(fix))
             try:
-                validate(raw)
-                return client.name, raw
-            except ValidationError as ve:
-                # one retry with fixer instruction
-                try:
-                    fixed_raw = await client.chat(
-                        prompt + "\n\n" + FIX_JSON_PROMPT,
-                        image_bytes=image_bytes,
-                    )
-                    validate(fixed_raw)
-                    return client.name, fixed_raw
-                except ValidationError as ve2:
-                    return client.name, InvalidDraft(
-                        error=f"validation failed: {ve2.errors()[:2]}",
-                        raw=fixed_raw if 'fixed_raw' in locals() else raw,
-                    ).model_dump()
-        except Exception as exc:
-            log.error("LLM %s failed: %s", client.name, exc, exc_info=False)
-            return client.name, {"error": str(exc)}
+                fixed_raw = await _timed_chat(
+                    client, fix, None, on_field, priority=priority
+                )
+                validate(fixed_raw)
+                if cache:
+                    await cache.aput(key, fixed_raw)
+                return client.name, fixed_raw
+            except ValidationError as ve2:
+                return client.name, InvalidDraft(
+                    error=f"validation failed: {ve2.errors()[:2]}",
+                    raw=fixed_raw if 'fixed_raw' in locals() else raw,
+                ).model_dump()
+    except Exception as exc:
+        log.error("LLM %s failed: %s", client.name, exc, exc_info=False)
+        return client.name, {"error": str(exc)}
+
+
+async def complete_iter(
+    prompt: str,
+    *, images: Sequence[Attachment] | None = None,
+    on_field: FieldCallback | None = None,
+    priority: int = DEFAULT_PRIORITY,
+) -> AsyncIterator[tuple[str, Dict[str, Any]]]:
+    """
+    Like ``complete_many`` but yields each (model_name, ticket_json) as soon
+    as that backend finishes, fastest first. Backends still running when
+    the consumer stops iterating are cancelled. With ``llm_stream`` on,
+    *on_field* is awaited with (model_name, key, value) as each top-level
+    field of a streamed draft closes. Cached drafts are yielded first,
+    without touching the images or the rate limiter. Raises ``RateLimited``
+    before any call is made when nothing is cached and no backend could
+    admit the request in time.
+    """
+    clients = get_clients()
+    if settings.dry_run or not clients:
+        yield "stub", await complete(prompt)  # reuse stub
+        return
 
-    return await asyncio.gather(*(_call(c) for c in CLIENTS))
+    # keyed by the raw attachments' digests, so a hit needs no _prepare()
+    cache = get_cache()
+    digests = [a.sha256 for a in images or []]
+    keys = {c.name: cache.key(prompt, digests, c.name) if cache else None for c in clients}
+    hits, misses = [], []
+    for c in clients:
+        hit = await cache.aget(keys[c.name]) if cache else None
+        if hit is not None:
+            log.debug("cache hit for %s", c.name)
+            hits.append((c.name, hit))
+        else:
+            misses.append(c)
+
+    if misses:
+        prepared = await _prepare(images, misses)
+        sized = {c.name: prepared.get(_policy(c), images) for c in misses}
+        if not hits:
+            waits = [
+                get_limiter(c.name).delay(estimate_tokens(prompt, sized[c.name]), priority)
+                for c in misses
+            ]
+            if min(waits) > settings.rate_queue_timeout:       # backpressure
+                raise RateLimited("all backends", min(waits))
+    tasks = [
+        asyncio.create_task(
+            _complete_one(c, prompt, keys[c.name], sized[c.name], on_field, priority)
+        )
+        for c in misses
+    ]
+    try:
+        for hit in hits:
+            yield hit
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for t in tasks:
+            t.cancel()
+
+
+async def complete_many(
+    prompt: str,
+    *, images: Sequence[Attachment] | None = None,
+    on_result: Callable[[str, Dict[str, Any]], Awaitable[None]] | None = None,
+    on_field: FieldCallback | None = None,
+    priority: int = DEFAULT_PRIORITY,
+) -> list[tuple[str, Dict[str, Any]]]:
+    """
+    Run the prompt against every healthy backend in parallel; backends
+    whose circuit is open are not called and report an error instead.
+    Returns list of (model_name, ticket_json) tuples – order is fixed.
+    *on_result* is awaited with each tuple as soon as that backend is done;
+    *on_field* and *priority* (lower = admitted first) are passed through
+    to ``complete_iter``.
+    """
+    results: list[tuple[str, Dict[str, Any]]] = []
+    async for result in complete_iter(
+        prompt, images=images, on_field=on_field, priority=priority
+    ):
+        results.append(result)
+        if on_result:
+            await on_result(*result)
+    order = {c.name: i for i, c in enumerate(get_clients())}
+    return sorted(results, key=lambda r: order.get(r[0], 0))
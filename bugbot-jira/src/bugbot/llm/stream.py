@@ -0,0 +1,93 @@
+"""
+Incremental parser for a JSON draft arriving as a token stream.
+
+Models wrap the object in markdown fences or trail it with commentary;
+``JsonStreamParser`` ignores everything before the first ``{``, hands back
+each top-level member as soon as its value closes (so ``title`` and
+``severity`` can be shown before ``steps`` is written) and reports
+``done`` at the matching ``}`` so the caller can stop reading the stream.
+Every character is scanned once across all ``feed()`` calls.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, List, Tuple
+
+
+class JsonStreamParser:
+    def __init__(self) -> None:
+        self._buf = ""
+        self._pos = 0                   # next char of _buf to scan
+        self._depth = 0
+        self._in_str = False
+        self._escape = False
+        self._member = -1               # start of the current top-level member
+        self.fields: Dict[str, Any] = {}
+        self.done = False
+
+    @property
+    def value(self) -> Dict[str, Any]:
+        """The complete object; only meaningful once ``done``."""
+        return dict(self.fields)
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Consume *chunk*; return the top-level ``(key, value)`` pairs it closed.
+
+        Raises ``json.JSONDecodeError`` if a member is not valid JSON.
+        """
+        if self.done:
+            return []
+        if self._member < 0:            # still looking for the opening brace
+            start = chunk.find("{")
+            if start < 0:
+                return []
+            chunk = chunk[start:]
+        self._buf += chunk
+
+        closed: List[Tuple[str, Any]] = []
+        buf, i = self._buf, self._pos
+        while i < len(buf):
+            ch = buf[i]
+            if self._in_str:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_str = False
+            elif ch == '"':
+                self._in_str = True
+            elif ch in "{[":
+                self._depth += 1
+                if self._depth == 1:
+                    self._member = i + 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    closed += self._close(buf, i)
+                    self.done = True
+                    break
+            elif ch == "," and self._depth == 1:
+                closed += self._close(buf, i)
+                self._member = i + 1
+            i += 1
+        self._pos = i
+        return closed
+
+    def _close(self, buf: str, end: int) -> List[Tuple[str, Any]]:
+        text = buf[self._member:end].strip()
+        if not text:                    # "{}" or a trailing comma
+            return []
+        pair = json.loads("{" + text + "}")
+        self.fields.update(pair)
+        return list(pair.items())
+
+
+def parse_first_object(raw: str) -> Dict[str, Any]:
+    """Return the first complete top-level JSON object embedded in *raw*."""
+    parser = JsonStreamParser()
+    parser.feed(raw)
+    if not parser.done:
+        raise json.JSONDecodeError("no complete JSON object", raw, len(raw))
+    return parser.value
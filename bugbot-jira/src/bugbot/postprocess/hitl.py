@@ -0,0 +1,157 @@
+"""
+Server-side draft sessions for the human review step.
+
+Each draft shown on a card is held here under a short random *handle*;
+the page carries only that handle, and ``/push`` sends it back with the
+fields the tester can edit. Attachments stay content IDs in the upload
+store, pinned (owner ``draft:<handle>``) for as long as the draft is held,
+so neither the page nor the push round-trips draft JSON or image bytes.
+
+Drafts live in a small SQLite table (``draft_session_path``), so every
+worker process serving the app sees the same handles. The least recently
+used go first past *max_entries*, and a draft expires *ttl* seconds after
+it was last touched.
+
+A streamed request (``/drafts/stream``) is parked the same way: its note
+and uploads wait under a handle until the event stream that carries that
+handle takes them, so the drafts are generated on whichever worker serves
+the stream.
+"""
+
+from __future__ import annotations
+
+import json
+import secrets
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict
+
+from bugbot.config import get_settings
+from bugbot.ingress.schemas import TicketChoice
+from bugbot.ingress.store import get_store
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS held (
+    handle  TEXT PRIMARY KEY,
+    vendor  TEXT NOT NULL,
+    draft   TEXT NOT NULL,          -- JSON
+    note    TEXT NOT NULL,
+    touched REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS held_lru ON held (touched);
+CREATE TABLE IF NOT EXISTS pending (
+    handle  TEXT PRIMARY KEY,
+    note    TEXT NOT NULL,
+    files   TEXT NOT NULL,          -- JSON list of upload content IDs
+    touched REAL NOT NULL
+);
+"""
+
+
+@dataclass
+class HeldDraft:
+    handle: str
+    vendor: str
+    draft: Dict[str, Any]
+    note: str = ""
+    touched: float = field(default_factory=time.time)
+
+
+class DraftSessions:
+    def __init__(
+        self, path: str | Path = ":memory:", *, ttl: float = 86400.0, max_entries: int = 10_000
+    ) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._conn: sqlite3.Connection | None = None
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.path != ":memory:":
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def hold(self, ticket: TicketChoice) -> TicketChoice:
+        """Keep *ticket*'s draft server-side; return it carrying its handle."""
+        self._expire()
+        handle = secrets.token_urlsafe(9)
+        get_store().acquire(f"draft:{handle}", ticket.draft.get("attachments", []))
+        self.db.execute(
+            "INSERT INTO held (handle, vendor, draft, note, touched) VALUES (?, ?, ?, ?, ?)",
+            (handle, ticket.vendor, json.dumps(ticket.draft), ticket.note, time.time()),
+        )
+        self._drop(
+            "handle IN (SELECT handle FROM held ORDER BY touched DESC LIMIT -1 OFFSET ?)",
+            self.max_entries,
+        )
+        return ticket.model_copy(update={"handle": handle})
+
+    def get(self, handle: str) -> HeldDraft | None:
+        """A fresh copy of the held draft (safe to edit), or None once expired."""
+        self._expire()
+        now = time.time()
+        row = self.db.execute(
+            "UPDATE held SET touched = ? WHERE handle = ? "
+            "RETURNING vendor, draft, note",
+            (now, handle),
+        ).fetchone()
+        if row is None:
+            return None
+        vendor, draft, note = row
+        return HeldDraft(handle, vendor, json.loads(draft), note, now)
+
+    def stash(self, note: str, files: list[Path]) -> str:
+        """Park a streamed request until its event stream picks it up."""
+        self._expire()
+        handle = secrets.token_urlsafe(9)
+        self.db.execute(
+            "INSERT INTO pending (handle, note, files, touched) VALUES (?, ?, ?, ?)",
+            (handle, note, json.dumps([f.name for f in files]), time.time()),
+        )
+        return handle
+
+    def take(self, handle: str) -> tuple[str, list[Path]] | None:
+        """The parked ``(note, files)`` – once; None if unknown or taken."""
+        self._expire()
+        row = self.db.execute(
+            "DELETE FROM pending WHERE handle = ? RETURNING note, files", (handle,)
+        ).fetchone()
+        if row is None:
+            return None
+        note, files = row
+        store = get_store()
+        return note, [store.path(name) for name in json.loads(files)]
+
+    def __len__(self) -> int:
+        (n,) = self.db.execute("SELECT COUNT(*) FROM held").fetchone()
+        return n
+
+    def _drop(self, where: str, *params: Any) -> None:
+        """Delete the matching drafts and unpin their attachments."""
+        dropped = self.db.execute(f"DELETE FROM held WHERE {where} RETURNING handle", params)
+        store = get_store()
+        for (handle,) in dropped.fetchall():
+            store.release(f"draft:{handle}")
+
+    def _expire(self) -> None:
+        cutoff = time.time() - self.ttl
+        self._drop("touched < ?", cutoff)
+        self.db.execute("DELETE FROM pending WHERE touched < ?", (cutoff,))
+
+
+@lru_cache
+def get_sessions() -> DraftSessions:
+    """Draft sessions shared by every worker, built from settings."""
+    s = get_settings()
+    return DraftSessions(
+        s.draft_session_path, ttl=s.draft_session_ttl, max_entries=s.draft_session_max
+    )
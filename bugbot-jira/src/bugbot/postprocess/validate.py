@@ -3,6 +3,8 @@ Ticket JSON validation & retry helper.
 """
 
 from __future__ import annotations
+import json
+from functools import lru_cache
 from typing import Any, Dict
 from pydantic import ValidationError
 from bugbot.ingress.schemas import ReportOut
@@ -13,6 +15,37 @@ FIX_JSON_PROMPT = (
     "Please respond again using ONLY valid JSON that matches the schema."
 )
 
+# JSON-schema keywords every vendor's structured-output mode understands
+_SCHEMA_KEYS = {"type", "properties", "items", "required", "enum", "description"}
+
 def validate(ticket: Dict[str, Any]) -> ReportOut:
     """Raise ValidationError if ticket is malformed."""
     return ReportOut.model_validate(ticket)
+
+def _portable(node: Dict[str, Any]) -> Dict[str, Any]:
+    out = {k: v for k, v in node.items() if k in _SCHEMA_KEYS}
+    if "properties" in out:
+        out["properties"] = {k: _portable(v) for k, v in out["properties"].items()}
+    if "items" in out:
+        out["items"] = _portable(out["items"])
+    return out
+
+@lru_cache
+def report_schema() -> Dict[str, Any]:
+    """``ReportOut`` as a plain JSON schema (no titles/$defs) for vendor APIs."""
+    return _portable(ReportOut.model_json_schema())
+
+def repair_prompt(raw: Any, error: ValidationError) -> str:
+    """
+    Retry prompt carrying only the rejected JSON and what was wrong with it –
+    the note and images from the first request are not sent again.
+    """
+    problems = "\n".join(
+        f"- {'.'.join(map(str, e['loc'])) or '<root>'}: {e['msg']}"
+        for e in error.errors()
+    )
+    return (
+        f"{FIX_JSON_PROMPT}\n\n"
+        f"Previous answer:\n{json.dumps(raw, ensure_ascii=False)}\n\n"
+        f"Validation errors:\n{problems}"
+    )
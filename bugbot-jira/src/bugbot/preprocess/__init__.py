@@ -1,9 +1,22 @@
-from .text import clean_freeform, split_sentences
-from .vision import encode_screenshot, keyframes
+from .compact import STATS as COMPACTION_STATS, Compaction, compact_note
+from .text import clean_freeform, clean_freeform_many, split_sentences
+from .vision import (
+    Attachment, ImagePolicy, apply_policy, encode_screenshot, keyframes,
+    load_attachment, scene_keyframes,
+)
 
 __all__ = [
+    "COMPACTION_STATS",
+    "Compaction",
+    "compact_note",
     "clean_freeform",
+    "clean_freeform_many",
     "split_sentences",
+    "Attachment",
+    "ImagePolicy",
+    "apply_policy",
     "encode_screenshot",
     "keyframes",
+    "load_attachment",
+    "scene_keyframes",
 ]
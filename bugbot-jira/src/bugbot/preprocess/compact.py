@@ -0,0 +1,269 @@
+"""
+Log-aware compaction of tester notes before they reach the prompt.
+
+Testers paste whole stack traces and console dumps; every vendor bills
+for every line. ``compact_note`` finds log blocks (runs of stack frames,
+exception lines and timestamped/levelled log lines) and, inside each:
+
+1. collapses consecutive repeats of a 1–4 unit pattern (recursion,
+   retry loops) into ``… [previous N lines repeated K more times]``,
+   ignoring hex addresses, and numbers in log lines;
+2. keeps only the first and last *keep_frames* frames between exception
+   lines – exception lines themselves are always kept;
+3. if the note is still over *budget* tokens, drops the middle of the
+   largest blocks, and as a last resort cuts the middle of the note.
+
+Prose around the logs is never touched. Must run on the raw note –
+``clean_freeform`` collapses the newlines this relies on.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import List
+
+def approx_tokens(text: str) -> int:
+    """~4 characters per token for English text and code."""
+    return len(text) // 4 + 1
+
+
+_FRAME_RE = re.compile(
+    r'^\s*(?:File "[^"]*", line \d+'                    # Python
+    r"|at \S.*(?:\([^)]*\)|:\d+(?::\d+)?)$"               # Java / JS
+    r"|#\d+\s+(?:0x[0-9a-fA-F]+|\S+ in ))"               # gdb / native
+)
+_EXC_RE = re.compile(
+    r"^\s*(?:Traceback \(most recent call last\):"
+    r"|During handling of the above exception"
+    r"|The above exception was the direct cause"
+    r"|Caused by:|panic:|Uncaught "
+    r"|(?:[\w$]+\.)*[\w$]*(?:Error|Exception|Fault)\b)"
+)
+_LOG_RE = re.compile(
+    r"^\s*(?:\[?\d{4}-\d\d-\d\d[T ]\d\d:\d\d"           # 2024-05-01 12:00
+    r"|\[?\d\d:\d\d:\d\d"                                # 12:00:01
+    r"|\[?(?:TRACE|DEBUG|INFO|WARN|WARNING|ERROR|FATAL|CRITICAL)\b"
+    r"|\.\.\. \d+ more\b"                                # Java "... 12 more"
+    r"|[VDIWEF]/\w+)"                                    # logcat
+)
+_ADDR_RE = re.compile(r"0x[0-9a-fA-F]+")
+_DIGITS_RE = re.compile(r"0x[0-9a-fA-F]+|\d+")
+
+FRAME, EXC, LOG, TEXT = "frame", "exc", "log", "text"
+
+
+@dataclass(frozen=True, slots=True)
+class Compaction:
+    text: str
+    tokens_before: int
+    tokens_after: int
+
+    @property
+    def saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+
+@dataclass(slots=True)
+class CompactionStats:
+    notes: int = 0
+    compacted: int = 0                  # notes that got shorter
+    tokens_before: int = 0
+    tokens_saved: int = 0
+
+    def add(self, c: Compaction) -> None:
+        self.notes += 1
+        self.compacted += c.saved > 0
+        self.tokens_before += c.tokens_before
+        self.tokens_saved += c.saved
+
+    def snapshot(self) -> dict:
+        return {
+            "notes": self.notes,
+            "compacted": self.compacted,
+            "tokens_saved": self.tokens_saved,
+            "saved_ratio": round(self.tokens_saved / self.tokens_before, 3)
+            if self.tokens_before else 0.0,
+        }
+
+
+STATS = CompactionStats()              # process-wide, shown on /health/preprocess
+
+
+@dataclass(slots=True)
+class _Unit:
+    kind: str
+    lines: List[str]
+
+    @property
+    def key(self) -> str:
+        # log lines differ by timestamp/counter, frames only by address
+        mask = _DIGITS_RE if self.kind == LOG else _ADDR_RE
+        return mask.sub("#", "\n".join(self.lines))
+
+    @property
+    def size(self) -> int:
+        return sum(len(line) + 1 for line in self.lines)
+
+
+def _kind(line: str) -> str:
+    if _FRAME_RE.match(line):
+        return FRAME
+    if _EXC_RE.match(line):
+        return EXC
+    if _LOG_RE.match(line):
+        return LOG
+    return TEXT
+
+
+def _indent(line: str) -> str:
+    return line[: len(line) - len(line.lstrip())]
+
+
+def _marker(like: str, text: str) -> _Unit:
+    return _Unit(LOG, [f"{_indent(like)}… [{text}] …"])
+
+
+def _units(lines: List[str]) -> List[_Unit]:
+    """One unit per line, except a frame's indented source line joins it."""
+    out: List[_Unit] = []
+    for line in lines:
+        kind = _kind(line)
+        prev = out[-1] if out else None
+        if (
+            kind == TEXT and prev is not None and prev.kind == FRAME
+            and line.strip() and len(_indent(line)) > len(_indent(prev.lines[0]))
+        ):
+            prev.lines.append(line)             # source line under a frame
+        else:
+            out.append(_Unit(kind, [line]))
+    return out
+
+
+def _collapse_repeats(units: List[_Unit]) -> List[_Unit]:
+    out: List[_Unit] = []
+    i = 0
+    while i < len(units):
+        best_p, best_r = 0, 0
+        for p in range(1, 5):
+            pattern = [u.key for u in units[i:i + p]]
+            if len(pattern) < p:
+                break
+            r = 0
+            while [u.key for u in units[i + (r + 1) * p:i + (r + 2) * p]] == pattern:
+                r += 1
+            if r * p > best_r * best_p:
+                best_p, best_r = p, r
+        if best_r:
+            group = units[i:i + best_p]
+            dropped = sum(u.size for u in units[i + best_p:i + (best_r + 1) * best_p])
+            n = sum(len(u.lines) for u in group)
+            mark = _marker(group[0].lines[0],
+                           f"previous {n} line{'s' * (n > 1)} repeated {best_r} more times")
+            if dropped > mark.size:
+                out += group + [mark]
+                i += (best_r + 1) * best_p
+                continue
+        out.append(units[i])
+        i += 1
+    return out
+
+
+def _trim_frames(units: List[_Unit], keep: int) -> List[_Unit]:
+    """Keep the first/last *keep* frames of every run between exception lines."""
+    out: List[_Unit] = []
+    segment: List[_Unit] = []
+
+    def flush() -> None:
+        frames = [i for i, u in enumerate(segment) if u.kind == FRAME]
+        if len(frames) <= 2 * keep + 1:
+            out.extend(segment)
+        else:
+            drop = set(frames[keep:len(frames) - keep])
+            first = min(drop)
+            for i, u in enumerate(segment):
+                if i == first:
+                    out.append(_marker(u.lines[0], f"{len(drop)} frames omitted"))
+                if i not in drop:
+                    out.append(u)
+        segment.clear()
+
+    for u in units:
+        if u.kind == EXC:
+            flush()
+            out.append(u)
+        else:
+            segment.append(u)
+    flush()
+    return out
+
+
+def _squeeze(units: List[_Unit], keep: int) -> List[_Unit]:
+    """Keep exception lines plus the first/last *keep* units of a block."""
+    if len(units) <= 2 * keep + 1:
+        return units
+    middle = units[keep:len(units) - keep]
+    kept = [u for u in middle if u.kind == EXC]
+    dropped = len(middle) - len(kept)
+    return units[:keep] + [_marker(middle[0].lines[0], f"{dropped} lines omitted")] \
+        + kept + units[len(units) - keep:]
+
+
+def _render(parts: List[List[_Unit]]) -> str:
+    return "\n".join(line for block in parts for u in block for line in u.lines)
+
+
+def compact_note(
+    text: str,
+    *,
+    budget: int = 0,
+    keep_frames: int = 3,
+    min_block: int = 3,
+) -> Compaction:
+    """
+    Compact log blocks in *text*; ``budget`` (tokens, 0 = none) caps the result.
+    Blocks shorter than *min_block* lines are treated as prose.
+    """
+    before = approx_tokens(text)
+
+    # split into alternating prose / log blocks
+    parts: List[List[_Unit]] = []
+    is_log: List[bool] = []
+    for u in _units(text.split("\n")):
+        log_line = u.kind != TEXT
+        if not parts or is_log[-1] != log_line:
+            parts.append([])
+            is_log.append(log_line)
+        parts[-1].append(u)
+    for i, block in enumerate(parts):
+        if is_log[i] and sum(len(u.lines) for u in block) < min_block:
+            is_log[i] = False
+
+    for i, block in enumerate(parts):
+        if is_log[i]:
+            parts[i] = _trim_frames(_collapse_repeats(block), keep_frames)
+    out = _render(parts)
+
+    if budget and approx_tokens(out) > budget:
+        # shrink the largest log blocks first, more aggressively each round
+        for keep in range(keep_frames, 0, -1):
+            for i in sorted(
+                (i for i, log in enumerate(is_log) if log),
+                key=lambda i: -sum(u.size for u in parts[i]),
+            ):
+                parts[i] = _squeeze(parts[i], keep)
+                out = _render(parts)
+                if approx_tokens(out) <= budget:
+                    break
+            if approx_tokens(out) <= budget:
+                break
+
+    if budget and approx_tokens(out) > budget:
+        chars = budget * 4 - 40
+        head = max(0, chars // 2)
+        cut = len(out) - 2 * head
+        out = f"{out[:head]}\n… [{cut} characters omitted] …\n{out[len(out) - head:]}"
+
+    if len(out) >= len(text):
+        out = text
+    return Compaction(out, before, approx_tokens(out))
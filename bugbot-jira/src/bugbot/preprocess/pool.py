@@ -0,0 +1,108 @@
+"""
+Bounded executor that keeps image/video preprocessing off the event loop.
+
+``kind="process"`` isolates OpenCV decode work in worker processes;
+``kind="thread"`` is cheaper to start and is enough for file I/O (and
+OpenCV releases the GIL for most codecs). At most *concurrency* tasks are
+submitted at once; the rest wait in an asyncio queue that is visible in
+``stats()``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import multiprocessing
+import time
+from collections import defaultdict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, TypeVar
+
+from bugbot.config import get_settings
+from bugbot.utils.timing import LatencyWindow
+
+T = TypeVar("T")
+
+
+class PreprocessPool:
+    def __init__(self, kind: str = "thread", *, workers: int = 4, concurrency: int = 8) -> None:
+        if kind not in ("process", "thread"):
+            raise ValueError(f"unknown preprocess executor {kind!r}")
+        self.kind = kind
+        self.workers = workers
+        self.concurrency = concurrency
+        self._executor: Executor | None = None
+        self._sem: asyncio.Semaphore | None = None
+        self.queued = 0
+        self.running = 0
+        self.timings: defaultdict[str, LatencyWindow] = defaultdict(LatencyWindow)
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    self.workers, thread_name_prefix="bugbot-prep"
+                )
+        return self._executor
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run ``fn(*args, **kwargs)`` in the pool; *fn* must be picklable for processes."""
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self.concurrency)
+        loop = asyncio.get_running_loop()
+        self.queued += 1
+        started = False
+        try:
+            async with self._sem:
+                self.queued -= 1
+                started = True
+                self.running += 1
+                t0 = time.perf_counter()
+                try:
+                    return await loop.run_in_executor(
+                        self._get_executor(), functools.partial(fn, *args, **kwargs)
+                    )
+                finally:
+                    self.running -= 1
+                    self.timings[fn.__name__].add(time.perf_counter() - t0)
+        finally:
+            if not started:             # cancelled while still queued
+                self.queued -= 1
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "concurrency": self.concurrency,
+            "queued": self.queued,
+            "running": self.running,
+            "tasks": {
+                name: {
+                    "count": len(w),
+                    "p50_s": w.percentile(0.5),
+                    "p95_s": w.percentile(0.95),
+                }
+                for name, w in self.timings.items()
+            },
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+@lru_cache
+def get_pool() -> PreprocessPool:
+    """Process-wide preprocessing pool built from settings."""
+    s = get_settings()
+    return PreprocessPool(
+        s.preprocess_executor,
+        workers=s.preprocess_workers,
+        concurrency=s.preprocess_concurrency,
+    )
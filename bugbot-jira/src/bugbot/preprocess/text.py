@@ -1,41 +1,60 @@
 # src/bugbot/preprocess/text.py
 from __future__ import annotations
 
-import re
 import unicodedata
+from functools import lru_cache
 from typing import Iterable
 
 import emoji
-import nltk
-from nltk import sent_tokenize, download
 
+@lru_cache(maxsize=None)
 def _ensure_nltk_resource(resource_id: str, download_pkg: str) -> None:
+    """Download *download_pkg* only if *resource_id* is missing; once per process."""
+    import nltk
     try:
         nltk.data.find(resource_id)
     except LookupError:
         nltk.download(download_pkg, quiet=True)
 
-_ensure_nltk_resource("tokenizers/punkt", "punkt")
-_ensure_nltk_resource("corpora/stopwords", "stopwords")
 
-# first-time download guard (small, cached in ~/.cache/nltk/)
-download("punkt_tab", quiet=True)
-download("stopwords", quiet=True)
+def warm_up() -> None:
+    """Import NLTK and fetch the sentence tokenizer ahead of the first request."""
+    _ensure_nltk_resource("tokenizers/punkt_tab", "punkt_tab")
 
 _STOPWORDS = set(word.lower() for word in
                  ("the", "and", "to", "a", "of", "in"))  #  quick stub
 
 
+def _demojize(text: str) -> str:
+    # emoji.demojize walks its trie in Python, char by char. No emoji
+    # sequence contains "\n" or is pure ASCII, so only lines that could
+    # hold one (e.g. the note, not the pasted log) need the walk.
+    if "\n" not in text:
+        return emoji.demojize(text, delimiters=(":", ":"))
+    return "\n".join(
+        line if line.isascii() else emoji.demojize(line, delimiters=(":", ":"))
+        for line in text.split("\n")
+    )
+
+
 def _normalise_unicode(text: str) -> str:
     """NFKC normalisation + emoji demojise + strip accents."""
     text = unicodedata.normalize("NFKC", text)
-    text = emoji.demojize(text, delimiters=(":", ":"))
+    text = _demojize(text)
     text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
     return text
 
 
-def _collapse_whitespace(text: str) -> str:
-    return re.sub(r"\s+", " ", text).strip()
+def _finish(text: str, drop_stopwords: bool) -> str:
+    """Lower-case, optional stop-word pruning and whitespace collapse in one split.
+
+    *text* is ASCII here, where ``str.split()`` breaks on exactly the
+    characters ``\\s+`` matches, so this equals the old regex collapse.
+    """
+    words = text.lower().split()
+    if drop_stopwords:
+        words = [w for w in words if w not in _STOPWORDS]
+    return " ".join(words)
 
 
 def clean_freeform(raw: str, *, drop_stopwords: bool = False) -> str:
@@ -48,14 +67,48 @@ def clean_freeform(raw: str, *, drop_stopwords: bool = False) -> str:
     2. Lower-casing.
     3. Optional stop-word pruning.
     4. Whitespace collapse.
+
+    Pure-ASCII input is already NFKC/NFKD-stable and holds no emoji, so
+    it skips step 1 entirely (pasted logs and stack traces usually are).
     """
-    text = _normalise_unicode(raw).lower()
-    if drop_stopwords:
-        words = [w for w in text.split() if w not in _STOPWORDS]
-        text = " ".join(words)
-    return _collapse_whitespace(text)
+    text = raw if raw.isascii() else _normalise_unicode(raw)
+    return _finish(text, drop_stopwords)
+
+
+_BATCH_SEP = "\x00"    # a starter with no decomposition, emoji or case mapping
+
+
+def clean_freeform_many(
+    raws: Iterable[str], *, drop_stopwords: bool = False
+) -> list[str]:
+    """
+    ``clean_freeform`` over many notes, same output note for note.
+
+    ASCII notes take the fast path; the rest are joined on NUL and share a
+    single NFKC → demojize → NFKD pass instead of paying its per-call
+    overhead once per note.
+    """
+    raws = list(raws)
+    out = [""] * len(raws)
+    slow: list[int] = []
+    for i, raw in enumerate(raws):
+        if raw.isascii():
+            out[i] = _finish(raw, drop_stopwords)
+        else:
+            slow.append(i)
+    if not slow:
+        return out
+    if any(_BATCH_SEP in raws[i] for i in slow):
+        parts = [_normalise_unicode(raws[i]) for i in slow]
+    else:
+        parts = _normalise_unicode(_BATCH_SEP.join(raws[i] for i in slow)).split(_BATCH_SEP)
+    for i, text in zip(slow, parts):
+        out[i] = _finish(text, drop_stopwords)
+    return out
 
 
 def split_sentences(text: str) -> list[str]:
     """Sentence tokeniser wrapper (language-agnostic)."""
+    warm_up()
+    from nltk import sent_tokenize      # imported lazily: NLTK is slow to load
     return [s.strip() for s in sent_tokenize(text) if s.strip()]
@@ -1,6 +1,10 @@
 from __future__ import annotations
+import hashlib
+import itertools
+import struct
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, List
+from typing import Iterable, Iterator, List, Sequence
 
 import cv2                      # OpenCV
 import numpy as np
@@ -8,16 +12,194 @@ from pybase64 import b64encode  # faster
 
 # ────────────────────────── helpers ──────────────────────────
 
-def _b64(img: np.ndarray, *, fmt: str = ".png") -> str:
-    """Encode a BGR image → Base64 **string** (no newlines)."""
-    ok, buf = cv2.imencode(fmt, img, [cv2.IMWRITE_PNG_COMPRESSION, 3])
+_ENCODERS = {
+    # mime: (extension, quality flag or None)
+    "image/png":  (".png", None),
+    "image/jpeg": (".jpg", cv2.IMWRITE_JPEG_QUALITY),
+    "image/webp": (".webp", cv2.IMWRITE_WEBP_QUALITY),
+}
+
+
+def _encode(img: np.ndarray, mime: str = "image/png", *, quality: int = 85) -> bytes:
+    """Encode a BGR (or grey) image to *mime*; PNG uses compression level 3."""
+    ext, flag = _ENCODERS[mime]
+    params = [cv2.IMWRITE_PNG_COMPRESSION, 3] if flag is None else [flag, quality]
+    ok, buf = cv2.imencode(ext, img, params)
     if not ok:
         raise ValueError("cv2.imencode failed")
-    return b64encode(buf).decode()          # bytes → str
+    return buf.tobytes()
+
+
+def _b64(img: np.ndarray, *, mime: str = "image/png", quality: int = 85) -> str:
+    """Encode a BGR image → Base64 **string** (no newlines)."""
+    return b64encode(_encode(img, mime, quality=quality)).decode()   # bytes → str
+
+
+def _sniff_mime(raw: bytes) -> str | None:
+    """MIME type from magic bytes, for the formats every vendor accepts."""
+    if raw.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if raw.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if raw[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    if raw[:4] == b"RIFF" and raw[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def _header_size(raw: bytes, mime: str) -> tuple[int, int] | None:
+    """(width, height) read straight from the file header, no decode."""
+    try:
+        if mime == "image/png":
+            return struct.unpack(">II", raw[16:24])
+        if mime == "image/gif":
+            return struct.unpack("<HH", raw[6:10])
+        if mime == "image/jpeg":
+            i = 2
+            while i + 9 < len(raw):
+                if raw[i] != 0xFF:
+                    return None
+                marker = raw[i + 1]
+                seg_len = struct.unpack(">H", raw[i + 2:i + 4])[0]
+                if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                    h, w = struct.unpack(">HH", raw[i + 5:i + 9])
+                    return w, h
+                i += 2 + seg_len
+    except struct.error:
+        pass
+    return None
+
+
+# ───────────────────────── attachments ───────────────────────
+
+@dataclass(frozen=True, slots=True)
+class Attachment:
+    """
+    One image, read and Base64-encoded **once** per request and shared,
+    unchanged, by every LLM adapter.
+    """
+    raw: bytes
+    b64: str
+    mime: str
+    width: int
+    height: int
+    sha256: str
+    name: str = ""
+
+    @classmethod
+    def from_bytes(
+        cls, raw: bytes, *, name: str = "", sha256: str | None = None
+    ) -> Attachment:
+        """
+        Wrap encoded image bytes. Formats vendors don't accept (BMP, TIFF…)
+        are decoded and re-encoded to PNG once, here. *sha256*, the digest
+        of *raw* if the caller already has it, spares hashing it again.
+        Raises ValueError if OpenCV can't decode the bytes.
+        """
+        mime = _sniff_mime(raw)
+        size = _header_size(raw, mime) if mime else None
+        if size is None:
+            img = cv2.imdecode(np.frombuffer(raw, np.uint8), cv2.IMREAD_COLOR)
+            if img is None:
+                raise ValueError(f"cannot decode image {name!r}")
+            if mime is None:
+                raw, mime, sha256 = _encode(img), "image/png", None
+            size = (img.shape[1], img.shape[0])
+        return cls(
+            raw=raw,
+            b64=b64encode(raw).decode(),
+            mime=mime,
+            width=size[0],
+            height=size[1],
+            sha256=sha256 or hashlib.sha256(raw).hexdigest(),
+            name=name,
+        )
+
+    @property
+    def data_uri(self) -> str:
+        return f"data:{self.mime};base64,{self.b64}"
+
+
+# ───────────────────────── image policy ──────────────────────
+
+@dataclass(frozen=True, slots=True)
+class ImagePolicy:
+    """
+    How a backend wants its images: long edge capped at *max_edge* pixels,
+    re-encoded as *mime* at *quality* (JPEG/WebP), and converted to grey
+    when *grayscale* is ``"always"`` or, for ``"auto"``, when the shot is
+    nearly colourless (typical of text-heavy screenshots and logs).
+
+    Without a *mime* the source format is kept – a PNG of text stays
+    lossless – unless the image is resized, which re-encodes it as JPEG.
+    """
+    max_edge: int | None = 1568
+    mime: str | None = None         # None: source format, JPEG once resized
+    quality: int = 85
+    grayscale: str = "never"        # never | auto | always
+
+
+# Hasler & Süsstrunk colourfulness below this ≈ "black text on white"
+_GREY_COLOURFULNESS = 12.0
+
+
+def _colourfulness(img: np.ndarray) -> float:
+    b, g, r = (c.astype(np.float32) for c in cv2.split(img))
+    rg, yb = r - g, 0.5 * (r + g) - b
+    return float(
+        np.sqrt(rg.std() ** 2 + yb.std() ** 2)
+        + 0.3 * np.sqrt(rg.mean() ** 2 + yb.mean() ** 2)
+    )
+
+
+def apply_policy(att: Attachment, policy: ImagePolicy) -> Attachment:
+    """
+    Return *att* right-sized for *policy*. The original object is returned
+    untouched when it already fits (same format, within *max_edge*, colour
+    allowed), so backends sharing a policy share one payload.
+    """
+    too_big = policy.max_edge is not None and max(att.width, att.height) > policy.max_edge
+    mime = policy.mime or (
+        "image/jpeg" if too_big
+        else att.mime if att.mime in _ENCODERS
+        else "image/png"            # GIF: OpenCV cannot write it
+    )
+    if not too_big and att.mime == mime and policy.grayscale == "never":
+        return att
+
+    img = cv2.imdecode(np.frombuffer(att.raw, np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        return att
+    if too_big:
+        scale = policy.max_edge / max(att.width, att.height)
+        size = (max(round(att.width * scale), 1), max(round(att.height * scale), 1))
+        img = cv2.resize(img, size, interpolation=cv2.INTER_AREA)
+    if policy.grayscale == "always" or (
+        policy.grayscale == "auto" and _colourfulness(img) < _GREY_COLOURFULNESS
+    ):
+        img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+    out = Attachment.from_bytes(_encode(img, mime, quality=policy.quality), name=att.name)
+    # never send more bytes than the original when nothing forced a resize
+    return att if not too_big and len(out.raw) >= len(att.raw) else out
 
 
 # ───────────────────────── screenshots ───────────────────────
 
+def load_attachment(path: str | Path, *, sha256: str | None = None) -> Attachment:
+    """
+    Read the image at *path* once and return its shared ``Attachment``;
+    *sha256* is the file's digest when already known (upload store).
+    Raises FileNotFoundError if the file can’t be read or decoded.
+    """
+    p = Path(path)
+    try:
+        return Attachment.from_bytes(p.read_bytes(), name=p.name, sha256=sha256)
+    except (OSError, ValueError) as exc:
+        raise FileNotFoundError(path) from exc
+
+
 def encode_screenshot(path: str | Path) -> str:
     """
     Load an image from *path* and return a Base64-encoded PNG string.
@@ -31,34 +213,192 @@ def encode_screenshot(path: str | Path) -> str:
 
 # ───────────────────────── videos ────────────────────────────
 
+# seeking re-decodes from the previous keyframe; below this gap (in frames)
+# grabbing straight through is cheaper
+_SEEK_MIN_GAP = 30
+
+
+def _frames_decode(cap: cv2.VideoCapture, interval: int) -> Iterator[np.ndarray]:
+    """Reference path: decode + colour-convert every frame, keep every *interval*-th."""
+    idx = 0
+    while cap.isOpened():
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if idx % interval == 0:
+            yield frame
+        idx += 1
+
+
+def _frames_walk(cap: cv2.VideoCapture, targets: Iterable[int]) -> Iterator[np.ndarray]:
+    """
+    Sequential, but ``retrieve()`` (colour conversion) only the frames whose
+    index is in *targets* (ascending, may be infinite).
+    """
+    wanted = iter(targets)
+    nxt = next(wanted, None)
+    idx = 0
+    while nxt is not None and cap.grab():
+        if idx == nxt:
+            ret, frame = cap.retrieve()
+            if not ret:
+                break
+            yield frame
+            nxt = next(wanted, None)
+        idx += 1
+
+
+def _seek(cap: cv2.VideoCapture, target: int) -> bool:
+    return bool(cap.set(cv2.CAP_PROP_POS_FRAMES, target)) and \
+        int(cap.get(cv2.CAP_PROP_POS_FRAMES)) == target
+
+
+def _frames_seek(
+    cap: cv2.VideoCapture, targets: Sequence[int], video_path: str | Path
+) -> Iterator[np.ndarray]:
+    """
+    Jump straight to each target frame. If the container refuses a seek
+    (unseekable stream, or a frame count past the last index entry), walk
+    sequentially to the remaining targets from the last target that did
+    seek, or from the start after reopening.
+    """
+    last_good: int | None = None
+    for n, target in enumerate(targets):
+        if not _seek(cap, target):
+            rest = targets[n:]
+            if last_good is not None and _seek(cap, last_good):
+                yield from _frames_walk(cap, [t - last_good for t in rest])
+                return
+            seq = cv2.VideoCapture(str(video_path))
+            try:
+                yield from _frames_walk(seq, rest)
+            finally:
+                seq.release()
+            return
+        ret, frame = cap.read()
+        if not ret:
+            return
+        last_good = target
+        yield frame
+
+
 def keyframes(
     video_path: str | Path,
     *,
     every: float = 2.0,
     max_frames: int | None = 10,
+    mode: str = "seek",
 ) -> List[str]:
     """
     Return Base64 PNG strings by sampling one frame every *every* seconds.
     Stops after *max_frames* (None = no cap).
+
+    *mode* picks how skipped frames are handled:
+    ``"seek"`` jumps to each target timestamp, falling back to ``"grab"``
+    for containers that can't seek or report no frame count (on long-GOP,
+    variable-fps recordings the decoder may land a few frames off target);
+    ``"grab"`` walks every frame but only converts the kept ones;
+    ``"decode"`` fully decodes every frame. ``"grab"`` and ``"decode"``
+    always return identical frames.
     """
+    if mode not in ("seek", "grab", "decode"):
+        raise ValueError(f"unknown keyframes mode {mode!r}")
     cap = cv2.VideoCapture(str(video_path))
     if not cap.isOpened():
         raise FileNotFoundError(video_path)
 
     fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
-    interval = int(every * fps)
+    interval = max(int(every * fps), 1)
+    if mode == "seek" and (
+        interval < _SEEK_MIN_GAP or cap.get(cv2.CAP_PROP_FRAME_COUNT) <= 0
+    ):
+        mode = "grab"
+
+    if mode == "seek":
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        source = _frames_seek(cap, range(0, total, interval), video_path)
+    elif mode == "grab":
+        source = _frames_walk(cap, itertools.count(0, interval))
+    else:
+        source = _frames_decode(cap, interval)
+
     frames: list[str] = []
-    idx = 0
+    for frame in source:
+        frames.append(_b64(frame))
+        if max_frames and len(frames) >= max_frames:
+            break
 
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
+    source.close()
+    cap.release()
+    return frames
+
+
+def _dhash_bits(gray_9x8: np.ndarray) -> np.ndarray:
+    """Difference hash of a stack of (N, 8, 9) thumbnails → (N, 64) bools."""
+    return (gray_9x8[:, :, 1:] > gray_9x8[:, :, :-1]).reshape(len(gray_9x8), -1)
+
+
+def scene_keyframes(
+    video_path: str | Path,
+    *,
+    sample_every: float = 0.25,
+    threshold: float = 4.0,
+    max_frames: int | None = 10,
+    dedup_bits: int = 4,
+) -> List[str]:
+    """
+    Content-aware alternative to ``keyframes``: sample a frame every
+    *sample_every* seconds, keep those whose 32×32 grey thumbnail differs
+    from the previous sample by at least *threshold* (mean abs, 0-255),
+    then drop near-duplicates (dHash within *dedup_bits* of a kept frame).
+    If more than *max_frames* survive, the biggest changes win. The first
+    and last samples are always candidates. Returns Base64 PNG strings in
+    chronological order.
+    """
+    cap = cv2.VideoCapture(str(video_path))
+    if not cap.isOpened():
+        raise FileNotFoundError(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    step = max(int(sample_every * fps), 1)
+
+    # pass 1: cheap thumbnails of every sample (the last one is kept whole:
+    # it is always a candidate and seeking near the end is least reliable)
+    small, tiny = [], []
+    last = None
+    for frame in _frames_walk(cap, itertools.count(0, step)):
+        last = frame
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        small.append(cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA))
+        tiny.append(cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA))
+    cap.release()
+    if not small:
+        return []
+
+    # vectorised change score + candidate selection
+    stack = np.stack(small).astype(np.int16)
+    change = np.empty(len(stack))
+    change[0] = np.inf
+    change[1:] = np.abs(np.diff(stack, axis=0)).mean(axis=(1, 2))
+    change[-1] = max(change[-1], threshold)
+    candidates = np.flatnonzero(change >= threshold)
+
+    # perceptual dedup, most salient first
+    bits = _dhash_bits(np.stack(tiny))
+    kept: list[int] = []
+    for c in candidates[np.argsort(-change[candidates], kind="stable")]:
+        if kept and np.count_nonzero(bits[kept] != bits[c], axis=1).min() <= dedup_bits:
+            continue
+        kept.append(int(c))
+        if max_frames and len(kept) >= max_frames:
             break
-        if idx % interval == 0:
-            frames.append(_b64(frame))
-            if max_frames and len(frames) >= max_frames:
-                break
-        idx += 1
+    kept.sort()
 
+    # pass 2: full-resolution frames for the survivors only
+    tail = kept[-1] == len(small) - 1
+    cap = cv2.VideoCapture(str(video_path))
+    targets = [k * step for k in (kept[:-1] if tail else kept)]
+    frames = [_b64(f) for f in _frames_seek(cap, targets, video_path)]
     cap.release()
+    if tail:
+        frames.append(_b64(last))
     return frames
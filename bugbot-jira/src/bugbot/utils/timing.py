@@ -0,0 +1,27 @@
+"""Small latency helpers shared by the LLM selector and preprocessing."""
+
+from __future__ import annotations
+
+import math
+from collections import deque
+
+
+class LatencyWindow:
+    """Rolling window of the last *size* latencies, in seconds."""
+
+    def __init__(self, size: int = 200) -> None:
+        self._samples: deque[float] = deque(maxlen=size)
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, q: float) -> float | None:
+        """Nearest-rank percentile, *q* in [0, 1]; ``None`` while empty."""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        rank = max(math.ceil(q * len(ordered)) - 1, 0)
+        return ordered[min(rank, len(ordered) - 1)]
+
+    def __len__(self) -> int:
+        return len(self._samples)
@@ -0,0 +1,45 @@
+"""
+Pay one-off start-up costs before the first request does.
+
+Nothing heavy happens at import time any more: NLTK, the vendor SDKs and
+the Jira session are all built on first use. ``warm_up()`` triggers them
+in order, logging how long each took; the API runs it on a background
+thread at start-up so workers accept connections immediately.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from typing import Callable
+
+log = logging.getLogger(__name__)
+
+
+def _steps() -> list[tuple[str, Callable[[], object]]]:
+    from bugbot.config import get_settings
+    from bugbot.jira.client import get_jira
+    from bugbot.llm.selector import get_clients
+    from bugbot.preprocess import text
+
+    steps: list[tuple[str, Callable[[], object]]] = [
+        ("nltk", text.warm_up),
+        ("llm_clients", get_clients),
+    ]
+    if get_settings().jira_base:
+        steps.append(("jira", get_jira))
+    return steps
+
+
+def warm_up() -> dict[str, float]:
+    """Run every initialiser; failures are logged, never raised."""
+    timings: dict[str, float] = {}
+    for name, step in _steps():
+        t0 = time.perf_counter()
+        try:
+            step()
+        except Exception as exc:
+            log.warning("warm-up %s failed: %s", name, exc)
+        timings[name] = round(time.perf_counter() - t0, 3)
+    log.info("warm-up done: %s", timings)
+    return timings
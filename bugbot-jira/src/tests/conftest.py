@@ -0,0 +1,20 @@
+import pytest
+from bugbot.config import get_settings
+from bugbot.dedup.index import get_index
+from bugbot.jira.outbox import get_outbox
+from bugbot.postprocess.hitl import get_sessions
+
+
+@pytest.fixture(autouse=True)
+def state_in_tmp(tmp_path, monkeypatch):
+    """Point the SQLite/npz files the app opens by default at *tmp_path*."""
+    s = get_settings()
+    monkeypatch.setattr(s, "outbox_path", str(tmp_path / "outbox.sqlite3"))
+    monkeypatch.setattr(s, "draft_session_path", str(tmp_path / "sessions.sqlite3"))
+    monkeypatch.setattr(s, "dedup_path", str(tmp_path / "dedup.npz"))
+    singletons = (get_outbox, get_sessions, get_index)
+    for get in singletons:
+        get.cache_clear()
+    yield
+    for get in singletons:
+        get.cache_clear()
@@ -0,0 +1,119 @@
+import asyncio
+import pytest
+from bugbot.ingress import logic
+
+DRAFT = {"title": "Crash", "steps": [], "expected": "", "actual": "",
+         "severity": "major", "attachments": []}
+
+
+@pytest.fixture
+def fanout(monkeypatch):
+    calls = []
+
+    async def complete_many(prompt, *, images=None, on_result=None, on_field=None, priority=1):
+        calls.append(prompt)
+        await asyncio.sleep(0.05)
+        if on_result:
+            await on_result("gpt", dict(DRAFT))
+        return [("gpt", dict(DRAFT))]
+
+    monkeypatch.setattr(logic, "complete_many", complete_many)
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_identical_reports_share_one_fanout(fanout, tmp_path):
+    a, b = tmp_path / "a.txt", tmp_path / "b.txt"
+    a.write_bytes(b"same"); b.write_bytes(b"same")
+    seen = []
+
+    async def on_draft(t):
+        seen.append(t.draft["attachments"])
+
+    first, second = await asyncio.gather(
+        logic.generate_drafts("App crashed!!", [a], on_draft=on_draft),
+        logic.generate_drafts("app   crashed!!", [b]),
+    )
+    assert len(fanout) == 1
+    assert first[0].draft["attachments"] == ["a.txt"]
+    assert second[0].draft["attachments"] == ["b.txt"]
+    assert seen == [["a.txt"]]
+    assert not logic._INFLIGHT
+
+
+@pytest.mark.asyncio
+async def test_different_content_is_not_coalesced(fanout, tmp_path):
+    a, b = tmp_path / "a.txt", tmp_path / "b.txt"
+    a.write_bytes(b"one"); b.write_bytes(b"two")
+    await asyncio.gather(
+        logic.generate_drafts("crash", [a]),
+        logic.generate_drafts("crash", [b]),
+    )
+    assert len(fanout) == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelling_one_caller_keeps_the_shared_call(fanout, tmp_path):
+    first = asyncio.create_task(logic.generate_drafts("crash", []))
+    second = asyncio.create_task(logic.generate_drafts("crash", []))
+    await asyncio.sleep(0.01)
+    first.cancel()
+    assert (await second)[0].vendor == "gpt"
+    assert len(fanout) == 1
+
+
+@pytest.mark.asyncio
+async def test_severity_is_part_of_the_key(fanout):
+    await asyncio.gather(
+        logic.generate_drafts("crash", [], severity="critical"),
+        logic.generate_drafts("crash", [], severity="minor"),
+    )
+    assert len(fanout) == 2
+
+
+@pytest.mark.asyncio
+async def test_stored_uploads_are_keyed_by_name_not_rehashed(fanout, tmp_path, monkeypatch):
+    def no_rehash(path):
+        raise AssertionError(f"{path} hashed again")
+    monkeypatch.setattr(logic, "_digest", no_rehash)
+    stored = tmp_path / ("ab" * 32 + ".txt")
+    stored.write_bytes(b"x")
+    await asyncio.gather(
+        logic.generate_drafts("crash", [stored]),
+        logic.generate_drafts("crash", [stored]),
+    )
+    assert len(fanout) == 1
+
+
+@pytest.mark.asyncio
+async def test_one_failing_subscriber_does_not_fail_the_flight(fanout):
+    seen = []
+
+    async def gone(t):
+        raise ConnectionResetError("client disconnected")
+
+    async def ok(t):
+        seen.append(t.vendor)
+
+    first, second = await asyncio.gather(
+        logic.generate_drafts("crash", [], on_draft=gone),
+        logic.generate_drafts("crash", [], on_draft=ok),
+    )
+    assert first[0].vendor == second[0].vendor == "gpt"
+    assert seen == ["gpt"] and len(fanout) == 1
+
+
+@pytest.mark.asyncio
+async def test_hedged_mode_returns_the_first_valid_draft(fanout, monkeypatch):
+    async def complete_hedged(prompt, *, images=None, on_field=None, priority=1):
+        return "claude", dict(DRAFT)
+    monkeypatch.setattr(logic, "complete_hedged", complete_hedged)
+    monkeypatch.setattr(logic.get_settings(), "llm_mode", "hedged")
+    seen = []
+
+    async def on_draft(t):
+        seen.append(t.vendor)
+
+    tickets = await logic.generate_drafts("crash", [], on_draft=on_draft)
+    assert [t.vendor for t in tickets] == seen == ["claude"]
+    assert fanout == []                     # complete_many not called
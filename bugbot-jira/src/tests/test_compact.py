@@ -0,0 +1,70 @@
+from bugbot.preprocess import compact_note
+from bugbot.preprocess.compact import approx_tokens
+
+
+def _traceback(distinct=12, recursion=50):
+    lines = ["Login crashes after submit.", "Traceback (most recent call last):"]
+    for i in range(distinct):
+        lines += [f'  File "/app/mod{i}.py", line {i * 10}, in f{i}', f"    call_{i}()"]
+    for _ in range(recursion):
+        lines += ['  File "/app/rec.py", line 5, in rec', "    return rec(n - 1)"]
+    lines += ["RecursionError: maximum recursion depth exceeded", "", "Expected: dashboard."]
+    return "\n".join(lines)
+
+
+def test_prose_untouched():
+    note = "Open settings.\nClick save twice.\nPage goes blank."
+    c = compact_note(note, budget=1000)
+    assert c.text == note and c.saved == 0
+
+
+def test_traceback_keeps_ends_and_exception():
+    c = compact_note(_traceback(), keep_frames=3)
+    assert "Login crashes after submit." in c.text
+    assert "Expected: dashboard." in c.text
+    assert "RecursionError: maximum recursion depth exceeded" in c.text
+    for kept in ("mod0.py", "mod2.py", "mod11.py"):
+        assert kept in c.text
+    assert "mod5.py" not in c.text
+    assert "frames omitted" in c.text
+    assert c.text.count("rec.py") == 1
+    assert "repeated 49 more times" in c.text
+    assert c.saved > 0.8 * c.tokens_before
+
+
+def test_repeated_log_lines_ignore_counters():
+    note = "\n".join(
+        f"2024-05-01 12:00:{i:02d} WARN retrying connection attempt {i}" for i in range(30)
+    )
+    c = compact_note(note + "\n2024-05-01 12:01:00 ERROR giving up")
+    assert c.text.splitlines() == [
+        "2024-05-01 12:00:00 WARN retrying connection attempt 0",
+        "… [previous 1 line repeated 29 more times] …",
+        "2024-05-01 12:01:00 ERROR giving up",
+    ]
+
+
+def test_java_caused_by_chain():
+    frames = "\n".join(f"\tat com.a.B.m{i}(B.java:{i})" for i in range(10))
+    note = (
+        'Exception in thread "main" java.lang.IllegalStateException: boom\n'
+        f"{frames}\nCaused by: java.io.IOException: nope\n"
+        "\tat com.x.Y.z(Y.java:1)\n\t... 8 more"
+    )
+    c = compact_note(note, keep_frames=2)
+    assert "IllegalStateException: boom" in c.text
+    assert "Caused by: java.io.IOException: nope" in c.text
+    assert "m0(" in c.text and "m9(" in c.text and "m5(" not in c.text
+    assert "Y.java:1" in c.text
+
+
+def test_budget_enforced():
+    note = _traceback()
+    for budget in (400, 80, 20):
+        c = compact_note(note, budget=budget)
+        assert c.tokens_after <= budget
+        assert c.tokens_after == approx_tokens(c.text)
+    # squeezing the log keeps the prose and the exception
+    c = compact_note(note, budget=80)
+    assert "Expected: dashboard." in c.text
+    assert "RecursionError" in c.text
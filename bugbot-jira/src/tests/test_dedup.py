@@ -0,0 +1,115 @@
+import asyncio
+import numpy as np
+import pytest
+from bugbot.dedup import HashingEmbedder, NumpyIndex, finder, record_ticket, find_duplicates
+from bugbot.ingress import logic
+from bugbot.ingress.schemas import Duplicate
+
+
+@pytest.mark.asyncio
+async def test_hashing_embedder_ranks_near_duplicates():
+    emb = HashingEmbedder(dim=256)
+    a, b, c = await emb.embed([
+        "app crashes when saving a file with unicode name",
+        "crash when saving file with a unicode name in the app",
+        "login button is misaligned on the settings page",
+    ])
+    assert np.isclose(np.linalg.norm(a), 1.0)
+    assert a @ b > 0.5 > a @ c
+
+
+@pytest.mark.asyncio
+async def test_numpy_index_topk_update_and_persist(tmp_path):
+    rng = np.random.default_rng(0)
+    vecs = rng.normal(size=(200, 16)).astype(np.float32)
+    vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+    idx = NumpyIndex(16, tmp_path / "ix.npz")
+    for i, v in enumerate(vecs):
+        await idx.add(f"BUG-{i}", f"t{i}", v)
+    await idx.add("BUG-7", "renamed", vecs[7])          # upsert, no new row
+    assert len(idx) == 200
+    assert len(NumpyIndex(16, tmp_path / "ix.npz")) == 200   # saved per add, no close()
+
+    hits = await idx.search(vecs[7], 3)
+    assert hits[0][:2] == ("BUG-7", "renamed") and hits[0][2] == pytest.approx(1.0)
+    assert [h[2] for h in hits] == sorted((h[2] for h in hits), reverse=True)
+
+    await idx.close()
+    again = NumpyIndex(16, tmp_path / "ix.npz")
+    assert await again.search(vecs[7], 3) == hits
+
+
+@pytest.mark.asyncio
+async def test_workers_share_one_index_file(tmp_path):
+    path = tmp_path / "ix.npz"
+    rng = np.random.default_rng(1)
+    vecs = rng.normal(size=(40, 8)).astype(np.float32)
+    vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+    a, b = NumpyIndex(8, path, compact_min=8), NumpyIndex(8, path, compact_min=8)
+    for i, v in enumerate(vecs):                    # two workers, interleaved
+        await (a if i % 2 else b).add(f"BUG-{i}", f"t{i}", v)
+    assert len(a.journal.read_text().splitlines()) <= 8 < len(vecs)   # compacted
+    for idx in (a, b, NumpyIndex(8, path)):
+        assert (await idx.search(vecs[0], 1))[0][0] == "BUG-0"
+        assert (await idx.search(vecs[39], 1))[0][0] == "BUG-39"
+        assert len(idx) == 40
+
+
+@pytest.mark.asyncio
+async def test_index_of_another_embedder_is_ignored(tmp_path):
+    idx = NumpyIndex(16, tmp_path / "ix.npz")
+    await idx.add("BUG-1", "t", np.ones(16, np.float32) / 4)
+    wider = NumpyIndex(32, tmp_path / "ix.npz")         # embedder switched
+    assert len(wider) == 0
+    await wider.add("BUG-2", "t", np.ones(32, np.float32) / np.sqrt(32))
+    assert NumpyIndex(32, tmp_path / "ix.npz").keys == ["BUG-2"]
+
+
+@pytest.mark.asyncio
+async def test_lookup_survives_a_broken_index(monkeypatch):
+    def get_index():
+        raise RuntimeError("DEDUP_DSN missing for the pgvector backend")
+    monkeypatch.setattr(finder, "get_index", get_index)
+    assert await find_duplicates("app crashed") == []
+    await record_ticket("BUG-1", {"title": "Crash"}, "app crashed")        # no raise
+
+
+@pytest.mark.asyncio
+async def test_record_then_find(monkeypatch):
+    idx = NumpyIndex(384)
+    monkeypatch.setattr(finder, "get_index", lambda: idx)
+    await record_ticket("BUG-1", {
+        "title": "Crash on save", "actual": "app crashed",
+        "steps": ["open editor", "press save"],
+    })
+    dups = await find_duplicates("crash on save: app crashed after I press save in the editor")
+    assert [d.key for d in dups] == ["BUG-1"]
+    assert await find_duplicates("dark mode colours are wrong") == []
+
+
+@pytest.mark.asyncio
+async def test_ticket_is_indexed_by_its_source_note(monkeypatch):
+    idx = NumpyIndex(384)
+    monkeypatch.setattr(finder, "get_index", lambda: idx)
+    note = "after the update the editor freezes whenever i paste an image"
+    await record_ticket("BUG-2", {
+        "title": "UI hang on clipboard image insert", "actual": "unresponsive",
+        "steps": ["copy png", "ctrl+v"],
+    }, note)
+    [dup] = await find_duplicates(note)
+    assert dup.key == "BUG-2" and dup.score == pytest.approx(1.0)
+
+
+@pytest.mark.asyncio
+async def test_drafts_carry_duplicates(monkeypatch):
+    async def complete_many(prompt, *, images=None, on_result=None, on_field=None, priority=1):
+        return [("gpt", {"title": "x"})]
+
+    async def find(text):
+        return [Duplicate(key="BUG-9", title="Old crash", score=0.93)]
+
+    monkeypatch.setattr(logic, "complete_many", complete_many)
+    monkeypatch.setattr(logic, "find_duplicates", find)
+    [ticket] = await logic.generate_drafts("crash", [])
+    assert ticket.duplicates[0].key == "BUG-9"
+    assert ticket.note == "crash"                       # carried to the push
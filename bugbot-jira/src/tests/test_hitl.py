@@ -0,0 +1,86 @@
+import re
+import time
+
+import httpx
+import pytest
+from bugbot.ingress import api, ui, uploads
+from bugbot.ingress.schemas import TicketChoice
+from bugbot.ingress.store import get_store
+from bugbot.postprocess.hitl import DraftSessions
+
+
+def _ticket(vendor, attachments=()):
+    return TicketChoice(vendor=vendor, draft={
+        "title": "Crash", "steps": ["open", "tap"], "expected": "ok", "actual": "crash",
+        "severity": "major", "attachments": list(attachments),
+    })
+
+
+def test_sessions_pin_attachments_until_expiry(tmp_path, monkeypatch):
+    monkeypatch.setattr(uploads, "UPLOAD_DIR", tmp_path)
+    blob = get_store().put_bytes(b"png", ".png").name
+    sessions = DraftSessions(ttl=60, max_entries=2)
+    held = sessions.hold(_ticket("gpt", [blob]))
+    assert len(held.handle) <= 12 and sessions.get(held.handle).vendor == "gpt"
+    assert get_store().stats()["referenced"] == 1
+
+    copy = sessions.get(held.handle)
+    copy.draft["title"] = "edited"                  # a copy, not the held draft
+    assert sessions.get(held.handle).draft["title"] == "Crash"
+
+    sessions.db.execute("UPDATE held SET touched = ?", (time.time() - 120,))
+    assert sessions.get(held.handle) is None
+    assert get_store().stats()["referenced"] == 0
+
+    handles = [sessions.hold(_ticket(v)).handle for v in "abc"]     # LRU cap
+    assert sessions.get(handles[0]) is None and len(sessions) == 2
+
+
+def test_sessions_are_shared_between_processes(tmp_path, monkeypatch):
+    monkeypatch.setattr(uploads, "UPLOAD_DIR", tmp_path)
+    path = tmp_path / "sessions.sqlite3"
+    one, other = DraftSessions(path), DraftSessions(path)     # two workers
+    held = one.hold(_ticket("gpt").model_copy(update={"note": "app crashed"}))
+    seen = other.get(held.handle)
+    assert (seen.vendor, seen.draft["title"], seen.note) == ("gpt", "Crash", "app crashed")
+
+
+@pytest.mark.asyncio
+async def test_cards_carry_handles_and_push_sends_only_edits(tmp_path, monkeypatch):
+    monkeypatch.setattr(uploads, "UPLOAD_DIR", tmp_path)
+    blob = get_store().put_bytes(b"\x89PNG" * 10_000, ".png").name
+    sessions = DraftSessions()
+    monkeypatch.setattr(ui, "get_sessions", lambda: sessions)
+
+    async def generate(note, files, **kw):
+        return [_ticket(v, [blob, blob]) for v in ("gpt", "claude", "gemini")]
+    monkeypatch.setattr(ui, "generate_drafts", generate)
+    queued = []
+    monkeypatch.setattr(ui, "queue_pushes", lambda items: queued.extend(items) or [
+        {"vendor": v, "status": "pending", "is_final": True, "error": None} for v, *_ in items
+    ])
+
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+        page = (await client.post("/drafts", data={"note": "x"})).text
+        assert 'name="draft"' not in page and "&#34;title&#34;" not in page
+        handles = re.findall(r'name="handle" value="([^"]+)"', page)
+        assert len(set(handles)) == 3
+
+        form = {"handle": handles[1], "title": "Edited", "steps": "a\n\nb",
+                "expected": "ok", "actual": "crash", "severity": "critical"}
+        r = await client.post("/push", data=form)
+        assert r.status_code == 200
+        assert len(r.request.content) < 1024
+        vendor, draft, key, _ = queued[0]
+        assert vendor == "claude" and key is None
+        assert draft["title"] == "Edited" and draft["steps"] == ["a", "b"]
+        assert draft["attachments"] == [blob, blob]
+        assert sessions.get(handles[1]).draft["title"] == "Crash"    # held copy untouched
+
+        r = await client.post("/push", data={**form, "handle": "gone"})
+        assert r.status_code == 200                 # htmx only swaps 2xx
+        assert 'class="card"' in r.text and "this draft has expired" in r.text
+        assert "hx-trigger" not in r.text           # final: the card does not poll
+        r = await client.post("/push/all", data={**form, "handle": [handles[0], "gone"]})
+        assert r.status_code == 200 and "this draft has expired" in r.text
@@ -5,11 +5,15 @@ from pathlib import Path
 from fastapi.testclient import TestClient
 from bugbot.ingress.api import app
 from bugbot.llm import selector
+from bugbot.ingress import uploads
+from bugbot.ingress.store import get_store
 
 
 client = TestClient(app)
 
-def test_report_roundtrip(tmp_path: Path):
+def test_report_roundtrip(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(uploads, "UPLOAD_DIR", tmp_path / "uploads")
+    (tmp_path / "uploads").mkdir()
     # create a valid 1×1 white PNG
     png = tmp_path / "shot.png"
     cv2.imwrite(str(png), np.full((1, 1, 3), 255, np.uint8))
@@ -21,8 +25,12 @@ def test_report_roundtrip(tmp_path: Path):
     )
     j = resp.json()
     assert resp.status_code == 200
-    assert j["severity"] == "critical"
-    assert "shot.png" in j["attachments"]
+    draft = j[0]["draft"]
+    assert draft["severity"] == "critical"
+    # attachments name the stored copies, which /push later re-attaches
+    stored = get_store().path(draft["attachments"][0])
+    assert stored.is_relative_to(tmp_path / "uploads")
+    assert stored.suffix == ".png" and stored.read_bytes() == png.read_bytes()
 @pytest.mark.asyncio
 async def test_llm_dry_run(monkeypatch):
     monkeypatch.setenv("DRY_RUN", "true")
@@ -0,0 +1,102 @@
+import json
+
+import httpx
+import pytest
+from bugbot.ingress import api, push, uploads
+from bugbot.ingress.store import get_store
+from bugbot.jira import outbox as outbox_mod
+from bugbot.jira.client import JiraClient, JiraError
+from bugbot.jira.outbox import DONE, FAILED, Outbox
+
+
+class BulkJira:
+    """Bulk-capable fake: summaries starting with "bad" are rejected."""
+
+    def __init__(self):
+        self.calls, self.keys = [], 0
+
+    def handler(self, request):
+        self.calls.append(request.url.path)
+        if request.url.path == "/rest/api/2/issue/bulk":
+            updates = json.loads(request.content)["issueUpdates"]
+            issues, errors = [], []
+            for n, u in enumerate(updates):
+                if u["fields"]["summary"].startswith("bad"):
+                    errors.append({"status": 400, "failedElementNumber": n,
+                                   "elementErrors": {"errors": {"summary": "rejected"}}})
+                else:
+                    self.keys += 1
+                    issues.append({"key": f"BUG-{self.keys}"})
+            return httpx.Response(400 if not issues else 201,
+                                  json={"issues": issues, "errors": errors})
+        if request.url.path == "/rest/api/2/issue":
+            self.keys += 1
+            return httpx.Response(201, json={"key": f"BUG-{self.keys}"})
+        return httpx.Response(200, json=[])
+
+    def client(self, **kw):
+        return JiraClient("https://jira.test", "u", "t", retries=0,
+                          transport=httpx.MockTransport(self.handler), **kw)
+
+
+def _draft(title, attachments=()):
+    return {"title": title, "steps": ["a"], "expected": "e", "actual": "x",
+            "severity": "major", "attachments": list(attachments)}
+
+
+@pytest.mark.asyncio
+async def test_create_issues_chunks_and_reports_partial_failures():
+    jira = BulkJira()
+    client = jira.client(bulk_size=2)
+    fields = [{"summary": s} for s in ["a", "bad", "c", "d", "bad2"]]
+    out = await client.create_issues(fields)
+    assert jira.calls.count("/rest/api/2/issue/bulk") == 3
+    assert [o if isinstance(o, str) else "ERR" for o in out] == \
+        ["BUG-1", "ERR", "BUG-2", "BUG-3", "ERR"]
+    assert isinstance(out[1], JiraError) and "summary: rejected" in str(out[1])
+
+
+@pytest.mark.asyncio
+async def test_short_bulk_response_fails_only_unmatched_elements():
+    def handler(request):                   # 3 sent, 1 created, no errors listed
+        return httpx.Response(201, json={"issues": [{"key": "BUG-9"}], "errors": []})
+
+    client = JiraClient("https://jira.test", "u", "t", retries=0,
+                        transport=httpx.MockTransport(handler))
+    out = await client.create_issues([{"summary": s} for s in "abc"])
+    assert out[0] == "BUG-9"
+    assert all(isinstance(o, JiraError) and o.status == 502 for o in out[1:])
+    assert not outbox_mod._permanent(out[1])
+
+
+@pytest.mark.asyncio
+async def test_bulk_push_api_one_create_call_per_batch(tmp_path, monkeypatch):
+    jira = BulkJira()
+    monkeypatch.setattr(outbox_mod, "get_jira", lambda: jira.client())
+
+    async def _record(key, draft, note=""):
+        pass
+    monkeypatch.setattr(outbox_mod, "record_ticket", _record)
+    box = Outbox(tmp_path / "o.db")
+    monkeypatch.setattr(push, "get_outbox", lambda: box)
+    monkeypatch.setattr(api, "get_outbox", lambda: box)
+    monkeypatch.setattr(uploads, "UPLOAD_DIR", tmp_path)
+    names = [get_store().put_bytes(b"png%d" % i, ".png").name for i in range(48)]
+
+    items = [{"vendor": "gpt", "draft": _draft(f"t{i}", [names[i]])} for i in range(48)]
+    items += [{"vendor": "gpt", "draft": _draft("bad one")}, items[0]]   # + repeat
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+        r = await client.post("/push/bulk", params={"wait": 5}, json=items)
+    body = r.json()
+    assert r.status_code == 202 and len(body["items"]) == 50
+    assert body["failed"] == 1
+    statuses = [i["status"] for i in body["items"]]
+    assert statuses.count(DONE) == 49 and statuses[48] == FAILED
+    assert "rejected" in body["items"][48]["error"]
+    assert body["items"][49] == body["items"][0]          # same key, same issue
+    assert jira.calls.count("/rest/api/2/issue/bulk") == 1
+    assert "/rest/api/2/issue" not in jira.calls
+    assert sum(c.endswith("/attachments") for c in jira.calls) == 48
+    assert get_store().stats()["referenced"] == 0       # delivered ⇒ released
+    await box.stop()
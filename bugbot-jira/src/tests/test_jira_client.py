@@ -0,0 +1,93 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from bugbot.jira.attachments import upload_attachments
+from bugbot.jira.client import JiraClient, JiraError, issue_fields
+
+
+def _client(handler, **kw):
+    return JiraClient(
+        "https://jira.test/", "me", "tok",
+        backoff=0, transport=httpx.MockTransport(handler), **kw,
+    )
+
+
+@pytest.mark.asyncio
+async def test_create_issue_posts_fields():
+    seen = []
+
+    def handler(request):
+        seen.append(request)
+        return httpx.Response(201, json={"key": "BUG-1"})
+
+    jira = _client(handler)
+    draft = {"title": "t", "steps": ["a", "b"], "expected": "e",
+             "actual": "x", "severity": "critical"}
+    assert await jira.create_issue(issue_fields(draft)) == "BUG-1"
+    body = json.loads(seen[0].content)["fields"]
+    assert seen[0].url.path == "/rest/api/2/issue"
+    assert seen[0].headers["authorization"].startswith("Basic ")
+    assert body["summary"] == "t" and body["priority"] == {"name": "Highest"}
+    assert "# a\n# b" in body["description"]
+    await jira.aclose()
+
+
+@pytest.mark.asyncio
+async def test_retries_429_and_5xx_then_gives_up():
+    calls = {"n": 0}
+
+    def flaky(request):
+        calls["n"] += 1
+        if calls["n"] == 1:
+            return httpx.Response(429, headers={"Retry-After": "0"})
+        if calls["n"] == 2:
+            return httpx.Response(502)
+        return httpx.Response(200, json={"ok": True})
+
+    jira = _client(flaky, retries=3)
+    assert (await jira.request("GET", "/rest/api/2/myself")).json() == {"ok": True}
+    assert calls["n"] == 3
+
+    # creates only retry statuses that mean "not processed"
+    jira = _client(lambda r: httpx.Response(500, text="boom"), retries=3)
+    with pytest.raises(JiraError) as err:
+        await jira.create_issue({})
+    assert err.value.status == 500
+
+    jira = _client(lambda r: httpx.Response(503), retries=2)
+    with pytest.raises(JiraError):
+        await jira.request("GET", "/x")
+
+
+@pytest.mark.asyncio
+async def test_attachments_upload_concurrently_and_bounded(tmp_path):
+    files = []
+    for i in range(10):
+        f = tmp_path / f"shot{i}.png"
+        f.write_bytes(b"\x89PNG" + bytes([i]) * 1000)
+        files.append(f)
+    files.append(tmp_path / "missing.png")
+    state = {"now": 0, "peak": 0, "attempts": {}}
+
+    async def handler(request):
+        assert request.headers["x-atlassian-token"] == "no-check"
+        name = request.content.split(b'filename="')[1].split(b'"')[0].decode()
+        state["attempts"][name] = state["attempts"].get(name, 0) + 1
+        if name == "shot3.png" and state["attempts"][name] == 1:
+            return httpx.Response(500)      # file is re-opened for the retry
+        if name == "shot7.png":
+            return httpx.Response(413, text="too large")
+        state["now"] += 1
+        state["peak"] = max(state["peak"], state["now"])
+        await asyncio.sleep(0.02)
+        state["now"] -= 1
+        return httpx.Response(200, json=[{"filename": name}])
+
+    jira = _client(handler, attach_concurrency=4)
+    failed = await upload_attachments(jira, "BUG-1", files)
+    assert list(failed) == [files[7]] and failed[files[7]].status == 413
+    assert sorted(state["attempts"]) == sorted(f.name for f in files[:10])
+    assert state["peak"] == 4
+    assert state["attempts"]["shot3.png"] == 2
@@ -0,0 +1,77 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from bugbot.ingress import api, jobs, uploads
+from bugbot.ingress.jobs import JobQueue
+from bugbot.ingress.schemas import TicketChoice
+from bugbot.postprocess.hitl import get_sessions
+
+
+@pytest.fixture
+def fake_drafts(monkeypatch):
+    async def generate(note, files, *, severity=None, on_draft=None, on_field=None):
+        out = []
+        for vendor in ("fast", "slow"):
+            await asyncio.sleep(0.01)
+            t = TicketChoice(vendor=vendor, draft={"title": note})
+            if on_draft:
+                await on_draft(t)
+            out.append(t)
+        return out
+    monkeypatch.setattr(jobs, "generate_drafts", generate)
+
+
+@pytest.mark.asyncio
+async def test_events_stream_each_vendor(fake_drafts):
+    q = JobQueue(workers=1)
+    job = q.submit("crash", [])
+    seen = [e async for e in q.events(job)]
+    assert [e["event"] for e in seen] == ["running", "draft", "draft", "done"]
+    assert [e["ticket"]["vendor"] for e in seen if e["event"] == "draft"] == ["fast", "slow"]
+    # late subscribers get a replay
+    assert [e["event"] async for e in q.events(job)] == ["draft", "draft", "done"]
+    await q.stop()
+
+
+def test_submit_poll_and_ws(fake_drafts, monkeypatch, tmp_path):
+    monkeypatch.setattr(uploads, "UPLOAD_DIR", tmp_path)
+    queue = JobQueue(workers=2)
+    monkeypatch.setattr(api, "get_jobs", lambda: queue)
+    monkeypatch.setattr("bugbot.ingress.ws.get_jobs", lambda: queue)
+
+    with TestClient(api.app) as client:
+        r = client.post("/jobs", data={"note": "boom"})
+        assert r.status_code == 202
+        job_id = r.json()["job_id"]
+        with client.websocket_connect(f"/ws/jobs/{job_id}") as sock:
+            events = []
+            while not events or events[-1]["event"] not in ("done", "failed"):
+                events.append(sock.receive_json())
+        assert [e["ticket"]["vendor"] for e in events if e["event"] == "draft"] == ["fast", "slow"]
+        j = client.get(f"/jobs/{job_id}").json()
+        assert j["status"] == "done" and len(j["drafts"]) == 2
+        assert client.get("/jobs/nope").status_code == 404
+
+
+def test_draft_stream_sse(fake_drafts, monkeypatch, tmp_path):
+    monkeypatch.setattr(uploads, "UPLOAD_DIR", tmp_path)
+    workers = [JobQueue(workers=1), JobQueue(workers=1)]
+    monkeypatch.setattr("bugbot.ingress.ui.get_jobs", lambda: workers[0])
+
+    with TestClient(api.app) as client:
+        r = client.post("/drafts/stream", data={"note": "boom"})
+        assert r.status_code == 200 and "sse-connect" in r.text
+        handle = r.text.split("/drafts/")[1].split("/events")[0]
+        get_sessions.cache_clear()              # the stream lands on another worker
+        workers.reverse()
+        body = client.get(f"/drafts/{handle}/events").text
+        events = [line.split(": ", 1)[1] for line in body.splitlines()
+                  if line.startswith("event:")]
+        assert events == ["card", "card", "done"]
+        assert body.index("fast") < body.index("slow")
+        done = body.split("event: done", 1)[1]
+        assert "Send all to JIRA" in done and 'class="card"' not in done   # cards left alone
+        assert body.count('name="handle"') == 2
+        assert workers[1].jobs == {} and len(workers[0].jobs) == 1
+        assert client.get(f"/drafts/{handle}/events").status_code == 404   # no replay
+        assert client.get("/drafts/nope/events").status_code == 404
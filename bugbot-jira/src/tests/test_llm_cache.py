@@ -0,0 +1,159 @@
+import threading
+import time
+from pathlib import Path
+import pytest
+from bugbot.llm import selector
+from bugbot.llm.cache import DraftCache, MemoryBackend, DiskBackend
+from bugbot.preprocess import Attachment
+
+PNG = Attachment(raw=b"png", b64="cG5n", mime="image/png", width=1, height=1,
+                 sha256="ab" * 32)
+
+DRAFT = {
+    "title": "Crash on save",
+    "steps": ["open app", "click save"],
+    "expected": "file saved",
+    "actual": "app crashed",
+    "severity": "critical",
+    "attachments": [],
+}
+
+
+def test_key_depends_on_prompt_images_backend():
+    a, b = "aa" * 32, "bb" * 32
+    k = DraftCache.key("p", [a], "gpt")
+    assert k == DraftCache.key("p", [a], "gpt")
+    assert k != DraftCache.key("p", [b], "gpt")
+    assert k != DraftCache.key("p", [a], "claude")
+    assert k != DraftCache.key("q", [a], "gpt")
+
+
+def test_memory_ttl_and_cap():
+    cache = DraftCache(MemoryBackend(max_entries=2), ttl=0.05)
+    for k in "abc":
+        cache.put(k, DRAFT)
+    assert cache.get("a") is None            # evicted by size cap
+    assert cache.get("c") == DRAFT
+    time.sleep(0.06)
+    assert cache.get("c") is None            # expired
+    assert cache.stats()["hits"] == 1
+
+
+def test_invalid_draft_never_stored(tmp_path):
+    cache = DraftCache(DiskBackend(tmp_path))
+    assert not cache.put("k", {"error": "validation failed", "raw": {}})
+    assert cache.put("k", DRAFT)
+    hit = cache.get("k")
+    hit["attachments"].append("x.png")       # callers may mutate the copy
+    assert cache.get("k") == DRAFT
+
+
+def test_disk_cap_tracked_without_listing(tmp_path, monkeypatch):
+    backend = DiskBackend(tmp_path, max_entries=2)
+    def glob(self, pattern):
+        raise AssertionError("set() must not list the cache directory")
+    with monkeypatch.context() as m:
+        m.setattr(Path, "glob", glob)
+        for k in "abc":
+            backend.set(k, time.time() + 60, DRAFT)
+        assert len(backend) == 2
+    assert sorted(p.stem for p in tmp_path.glob("*.json")) == ["b", "c"]
+    assert len(DiskBackend(tmp_path, max_entries=2)) == 2     # one scan on start
+
+
+@pytest.mark.asyncio
+async def test_disk_io_runs_off_the_event_loop(tmp_path):
+    threads = []
+
+    class Spy(DiskBackend):
+        def get(self, key):
+            threads.append(threading.get_ident())
+            return super().get(key)
+
+        def set(self, key, expires_at, draft):
+            threads.append(threading.get_ident())
+            super().set(key, expires_at, draft)
+
+    cache = DraftCache(Spy(tmp_path))
+    assert await cache.aput("k", DRAFT)
+    assert await cache.aget("k") == DRAFT
+    assert len(threads) == 2 and threading.get_ident() not in threads
+
+
+@pytest.mark.asyncio
+async def test_complete_many_served_from_cache(monkeypatch):
+    calls = []
+
+    class Fake:
+        name = "fake"
+        async def chat(self, prompt, *, images=None):
+            calls.append(prompt)
+            return dict(DRAFT)
+
+    cache = DraftCache(MemoryBackend())
+    monkeypatch.setattr(selector, "CLIENTS", [Fake()])
+    monkeypatch.setattr(selector.settings, "dry_run", False)
+    monkeypatch.setattr(selector, "get_cache", lambda: cache)
+
+    first = await selector.complete_many("note", images=[PNG])
+    second = await selector.complete_many("note", images=[PNG])
+    assert first == second == [("fake", DRAFT)]
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_hit_skips_prepare_and_limiter(monkeypatch):
+    from bugbot.llm.ratelimit import RateLimited
+
+    class Fake:
+        name = "fake"
+        async def chat(self, prompt, *, images=None):
+            return dict(DRAFT)
+
+    class Saturated:
+        def delay(self, tokens, priority):
+            return 1e9
+
+    prepared = []
+
+    async def prepare(images, clients):
+        prepared.append([c.name for c in clients])
+        return {}
+
+    cache = DraftCache(MemoryBackend())
+    cache.put(cache.key("note", [PNG.sha256], "fake"), DRAFT)
+    monkeypatch.setattr(selector, "CLIENTS", [Fake()])
+    monkeypatch.setattr(selector.settings, "dry_run", False)
+    monkeypatch.setattr(selector, "get_cache", lambda: cache)
+    monkeypatch.setattr(selector, "get_limiter", lambda name: Saturated())
+    monkeypatch.setattr(selector, "_prepare", prepare)
+
+    assert await selector.complete_many("note", images=[PNG]) == [("fake", DRAFT)]
+    assert prepared == []
+    with pytest.raises(RateLimited):                # a miss still sees backpressure
+        await selector.complete_many("other", images=[PNG])
+    assert prepared == [["fake"]]
+
+
+@pytest.mark.asyncio
+async def test_backends_get_policy_sized_images(monkeypatch):
+    import cv2, numpy as np
+    from bugbot.preprocess.vision import ImagePolicy
+
+    seen = {}
+
+    class Fake:
+        def __init__(self, name, edge):
+            self.name, self.image_policy = name, ImagePolicy(max_edge=edge)
+        async def chat(self, prompt, *, images=None):
+            seen[self.name] = images[0]
+            return dict(DRAFT)
+
+    big = Attachment.from_bytes(cv2.imencode(".png", np.zeros((1000, 2000, 3), np.uint8))[1].tobytes())
+    monkeypatch.setattr(selector, "CLIENTS", [Fake("a", 1000), Fake("b", 500)])
+    monkeypatch.setattr(selector.settings, "dry_run", False)
+    monkeypatch.setattr(selector, "get_cache", lambda: None)
+    await selector.complete_many("note", images=[big])
+    assert (seen["a"].width, seen["b"].width) == (1000, 500)
+    assert seen["a"].mime == "image/jpeg"
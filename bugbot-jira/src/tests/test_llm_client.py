@@ -0,0 +1,35 @@
+import asyncio
+import threading
+import pytest
+from bugbot.llm.client import Transport
+
+
+@pytest.mark.asyncio
+async def test_slot_caps_per_backend_and_times_out():
+    t = Transport(concurrency=2, per_backend={"narrow": 1}, total_timeout=0.05)
+    peak = {"wide": 0, "narrow": 0}
+
+    async def call(name):
+        async with t.slot(name):
+            peak[name] = max(peak[name], t.inflight[name])
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(call(n) for n in ["wide"] * 5 + ["narrow"] * 3))
+    assert peak == {"wide": 2, "narrow": 1}
+    assert t.inflight == {"wide": 0, "narrow": 0}
+
+    with pytest.raises(TimeoutError):
+        async with t.slot("wide"):
+            await asyncio.sleep(1)
+    await t.aclose()
+
+
+@pytest.mark.asyncio
+async def test_shared_client_and_dedicated_executor():
+    t = Transport(max_connections=7, connect_timeout=1.5, read_timeout=20)
+    assert t.http is t.http
+    assert t.http.timeout.connect == 1.5 and t.http.timeout.read == 20
+    name = await t.run_blocking(lambda: threading.current_thread().name)
+    assert name.startswith("bugbot-llm")
+    await t.aclose()
+    assert t.stats()["max_connections"] == 7
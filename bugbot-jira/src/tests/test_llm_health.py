@@ -0,0 +1,80 @@
+import pytest
+from fastapi.testclient import TestClient
+from bugbot.llm import selector, health
+from bugbot.llm.health import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+
+
+def test_breaker_trips_on_errors_and_probes():
+    b = CircuitBreaker("x", min_calls=3, error_rate=0.5, cooldown=0.0)
+    b.record_success(0.1)
+    b.record_failure()
+    assert b.state == CLOSED
+    b.record_failure()
+    assert b.state == OPEN
+    assert b.allow() and b.state == HALF_OPEN     # cooldown elapsed → probe
+    assert not b.allow()                          # only one probe at a time
+    b.record_success(0.1)
+    assert b.state == CLOSED
+
+
+def test_breaker_trips_on_slow_calls():
+    b = CircuitBreaker("x", min_calls=2, error_rate=0.5, slow_call=1.0, cooldown=60)
+    b.record_success(5.0)
+    b.record_success(5.0)
+    assert b.state == OPEN and not b.allow()
+
+
+@pytest.mark.asyncio
+async def test_open_backend_skipped(monkeypatch):
+    calls = []
+
+    class Fake:
+        def __init__(self, name):
+            self.name = name
+        async def chat(self, prompt, *, images=None):
+            calls.append(self.name)
+            return {"error": "x"}
+
+    monkeypatch.setattr(selector.settings, "dry_run", False)
+    monkeypatch.setattr(selector, "get_cache", lambda: None)
+    monkeypatch.setattr(selector, "CLIENTS", [Fake("down"), Fake("up")])
+    monkeypatch.setattr(health, "BREAKERS", {})
+    health.get_breaker("down")._open()
+
+    out = await selector.complete("p")
+    assert calls == ["up"] and out == {"error": "x"}
+    many = dict(await selector.complete_many("p"))
+    assert "circuit open" in many["down"]["error"]
+    assert calls.count("down") == 0
+
+
+@pytest.mark.asyncio
+async def test_repair_retry_respects_open_breaker(monkeypatch):
+    calls = []
+
+    class Fake:
+        name = "flaky"
+        async def chat(self, prompt, *, images=None):
+            calls.append(prompt)
+            health.get_breaker("flaky")._open()   # tripped by other traffic meanwhile
+            return {"title": "only"}
+
+    monkeypatch.setattr(selector.settings, "dry_run", False)
+    monkeypatch.setattr(selector, "get_cache", lambda: None)
+    monkeypatch.setattr(selector, "CLIENTS", [Fake()])
+    monkeypatch.setattr(health, "BREAKERS", {})
+
+    [(name, draft)] = await selector.complete_many("p")
+    assert calls == ["p"]                       # no repair sent to an open circuit
+    assert "circuit open" in draft["error"] and draft["raw"] == {"title": "only"}
+
+
+def test_health_backends_endpoint(monkeypatch):
+    from bugbot.ingress.api import app
+
+    class Fake:
+        name = "gpt"
+    monkeypatch.setattr(selector, "CLIENTS", [Fake()])
+    monkeypatch.setattr(health, "BREAKERS", {})
+    j = TestClient(app).get("/health/backends").json()
+    assert j[0]["backend"] == "gpt" and j[0]["state"] == "closed"
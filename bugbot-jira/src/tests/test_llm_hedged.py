@@ -0,0 +1,67 @@
+import asyncio
+import pytest
+from bugbot.llm import selector, health
+from bugbot.utils.timing import LatencyWindow
+
+DRAFT = {
+    "title": "Crash on save",
+    "steps": ["open app"],
+    "expected": "saved",
+    "actual": "crashed",
+    "severity": "major",
+    "attachments": [],
+}
+
+
+class Fake:
+    def __init__(self, name, delay, result):
+        self.name, self.delay, self.result = name, delay, result
+        self.cancelled = False
+
+    async def chat(self, prompt, *, images=None):
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if isinstance(self.result, Exception):
+            raise self.result
+        return dict(self.result)
+
+
+@pytest.fixture
+def live(monkeypatch):
+    monkeypatch.setattr(selector.settings, "dry_run", False)
+    monkeypatch.setattr(selector.settings, "hedge_default_delay", 0.05)
+    monkeypatch.setattr(health, "BREAKERS", {})
+
+
+def test_latency_percentile():
+    w = LatencyWindow()
+    for x in range(1, 101):
+        w.add(x / 100)
+    assert w.percentile(0.95) == 0.95
+    assert LatencyWindow().percentile(0.5) is None
+
+
+@pytest.mark.asyncio
+async def test_hedge_fires_after_delay_and_cancels_loser(live, monkeypatch):
+    slow = Fake("slow", 5.0, DRAFT)
+    fast = Fake("fast", 0.01, DRAFT)
+    monkeypatch.setattr(selector, "CLIENTS", [slow, fast])
+
+    name, draft = await asyncio.wait_for(selector.complete_hedged("p"), 1.0)
+    await asyncio.sleep(0)
+    assert name == "fast" and draft == DRAFT
+    assert slow.cancelled
+
+
+@pytest.mark.asyncio
+async def test_hedge_skips_invalid_and_failed(live, monkeypatch):
+    clients = [
+        Fake("boom", 0.0, RuntimeError("429")),
+        Fake("bad", 0.0, {"title": "only"}),
+        Fake("good", 0.0, DRAFT),
+    ]
+    monkeypatch.setattr(selector, "CLIENTS", clients)
+    assert (await selector.complete_hedged("p"))[0] == "good"
@@ -0,0 +1,78 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from bugbot.ingress import api, uploads
+from bugbot.llm import ratelimit, selector, health
+from bugbot.llm.ratelimit import BackendLimiter, RateLimited, priority_for
+
+
+@pytest.mark.asyncio
+async def test_queue_admits_by_severity():
+    lim = BackendLimiter("x", rpm=6000)            # 100 calls/s
+    lim.requests.level = 0                         # burst already spent
+    order = []
+
+    async def call(sev):
+        await lim.acquire(10, priority=priority_for(sev), timeout=1)
+        order.append(sev)
+
+    tasks = []
+    for sev in ("minor", "major", "critical"):
+        tasks.append(asyncio.create_task(call(sev)))
+        await asyncio.sleep(0)                     # enqueue in this order
+    await asyncio.gather(*tasks)
+    assert order == ["critical", "major", "minor"]
+    assert lim.snapshot()["rate_admitted"] == 3
+
+
+@pytest.mark.asyncio
+async def test_refuses_past_deadline():
+    lim = BackendLimiter("x", tpm=600)             # 10 tokens/s
+    lim.tokens.level = 0
+    with pytest.raises(RateLimited) as err:
+        await lim.acquire(5_000, timeout=1)        # capped to one minute's worth
+    assert err.value.retry_after == pytest.approx(60, abs=1)
+    assert lim.rejected == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("late", [TimeoutError, asyncio.CancelledError])
+async def test_admission_racing_the_deadline_is_not_lost(monkeypatch, late):
+    lim = BackendLimiter("x", rpm=60)
+    lim.requests.level = 0
+
+    async def wait_for(fut, timeout):               # _pump wins the race, then
+        lim.requests.level = 1                      # the deadline/cancel lands
+        lim._pump()
+        assert fut.done()
+        raise late()
+    monkeypatch.setattr(ratelimit.asyncio, "wait_for", wait_for)
+
+    if late is TimeoutError:                        # admitted ⇒ proceed
+        await lim.acquire(10, timeout=1)
+        assert (lim.admitted, lim.rejected) == (1, 0)
+    else:                                           # cancelled ⇒ slot handed back
+        with pytest.raises(asyncio.CancelledError):
+            await lim.acquire(10, timeout=1)
+        assert lim.admitted == 0 and lim.requests.level == pytest.approx(1, abs=0.01)
+
+
+@pytest.mark.parametrize("mode", ["all", "hedged"])
+def test_api_returns_503_with_retry_after(monkeypatch, tmp_path, mode):
+    class Fake:
+        name = "busy"
+        async def chat(self, prompt, *, images=None):
+            raise AssertionError("must not be called")
+
+    monkeypatch.setattr(uploads, "UPLOAD_DIR", tmp_path)
+    monkeypatch.setattr(selector.settings, "dry_run", False)
+    monkeypatch.setattr(selector, "CLIENTS", [Fake()])
+    monkeypatch.setattr(ratelimit, "LIMITERS", {"busy": BackendLimiter("busy", rpm=6)})
+    monkeypatch.setattr(health, "BREAKERS", {})
+    ratelimit.LIMITERS["busy"].requests.level = 0  # next slot in 10s > queue timeout
+    monkeypatch.setattr(selector.settings, "rate_queue_timeout", 1.0)
+    monkeypatch.setattr(selector.settings, "llm_mode", mode)
+
+    r = TestClient(api.app).post("/report", data={"note": "boom", "severity": "minor"})
+    assert r.status_code == 503
+    assert int(r.headers["Retry-After"]) >= 9
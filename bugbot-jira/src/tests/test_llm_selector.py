@@ -20,14 +20,15 @@ selector_module._safe_load = lambda raw: raw
 
 # 2) Now import your real adapters
 from bugbot.llm.selector import _OpenAI, _Claude, _GeminiStudio
+from bugbot.preprocess import load_attachment
 
 async def main():
     if len(sys.argv) < 2:
         print("Usage: python test_selector_path_nojson.py <img1> [<img2> …]")
         return
 
-    # read raw bytes
-    imgs = [open(p, "rb").read() for p in sys.argv[1:]]
+    # read + encode each image once
+    imgs = [load_attachment(p) for p in sys.argv[1:]]
 
     prompt = "Describe this image."
 
@@ -40,8 +41,8 @@ async def main():
     for client in clients:
         print(f"\n=== {client.name} ===")
         try:
-            # pass same raw bytes to each
-            resp = await client.chat(prompt, image_bytes=imgs)
+            # pass the same attachments to each
+            resp = await client.chat(prompt, images=imgs)
             # pretty-print whatever comes back
             if isinstance(resp, dict):
                 # sometimes safe_load still wraps dicts
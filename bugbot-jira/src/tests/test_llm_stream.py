@@ -0,0 +1,97 @@
+import asyncio
+import json
+import pytest
+from bugbot.llm import selector, health
+from bugbot.llm.stream import JsonStreamParser, parse_first_object
+
+DRAFT = {
+    "title": "Crash on save {draft}",
+    "steps": ["open app", "press \"save\", twice"],
+    "expected": "saved",
+    "actual": "crashed",
+    "severity": "major",
+    "attachments": [],
+}
+TEXT = "```json\n" + json.dumps(DRAFT) + "\n```\nHope this helps! {not: json}"
+
+
+def test_parser_char_by_char():
+    p = JsonStreamParser()
+    closed = []
+    for ch in TEXT:
+        closed += p.feed(ch)
+        if p.done:
+            break
+    assert p.value == DRAFT
+    assert [k for k, _ in closed] == list(DRAFT)
+    assert p.feed("more") == []
+
+
+def test_parse_first_object_is_not_greedy():
+    assert parse_first_object(TEXT) == DRAFT
+    with pytest.raises(json.JSONDecodeError):
+        parse_first_object('{"title": "cut off')
+
+
+class Streamer:
+    name = "streamer"
+
+    def __init__(self, text, size=5):
+        self.chunks = [text[i:i + size] for i in range(0, len(text), size)]
+        self.sent = 0
+        self.closed = False
+
+    async def chat(self, prompt, *, images=None):
+        raise AssertionError("stream() should be used")
+
+    async def stream(self, prompt, *, images=None):
+        try:
+            for c in self.chunks:
+                self.sent += 1
+                await asyncio.sleep(0)
+                yield c
+        finally:
+            self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_stream_surfaces_fields_and_stops_early(monkeypatch):
+    monkeypatch.setattr(selector.settings, "dry_run", False)
+    monkeypatch.setattr(health, "BREAKERS", {})
+    client = Streamer(TEXT)
+    monkeypatch.setattr(selector, "CLIENTS", [client])
+
+    fields = []
+    async def on_field(name, key, value):
+        fields.append((name, key))
+
+    [(name, draft)] = await selector.complete_many("stream-me", on_field=on_field)
+    assert name == "streamer" and draft == DRAFT
+    assert fields[0] == ("streamer", "title") and ("streamer", "severity") in fields
+    assert client.closed and client.sent < len(client.chunks)   # trailing text never read
+
+
+class Timed:
+    def __init__(self, name, delay):
+        self.name, self.delay = name, delay
+
+    async def chat(self, prompt, *, images=None):
+        await asyncio.sleep(self.delay)
+        return dict(DRAFT)
+
+
+@pytest.mark.asyncio
+async def test_complete_iter_yields_fastest_first(monkeypatch):
+    monkeypatch.setattr(selector.settings, "dry_run", False)
+    monkeypatch.setattr(health, "BREAKERS", {})
+    monkeypatch.setattr(selector, "CLIENTS", [Timed("slow", 0.05), Timed("fast", 0.0)])
+
+    seen = [name async for name, _ in selector.complete_iter("iter-order")]
+    assert seen == ["fast", "slow"]
+
+    streamed = []
+    async def on_result(name, draft):
+        streamed.append(name)
+    res = await selector.complete_many("iter-order-2", on_result=on_result)
+    assert streamed == ["fast", "slow"]
+    assert [n for n, _ in res] == ["slow", "fast"]      # CLIENTS order
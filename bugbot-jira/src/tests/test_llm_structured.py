@@ -0,0 +1,66 @@
+import pytest
+from bugbot.ingress.schemas import ReportOut
+from bugbot.llm import selector, health
+from bugbot.postprocess.validate import report_schema
+
+DRAFT = {
+    "title": "Crash on save",
+    "steps": ["open app"],
+    "expected": "saved",
+    "actual": "crashed",
+    "severity": "major",
+    "attachments": [],
+}
+
+
+def test_schema_follows_report_model():
+    schema = report_schema()
+    assert set(schema["properties"]) == set(ReportOut.model_fields)
+    assert schema["required"] == list(ReportOut.model_fields)
+    assert "title" not in schema["properties"]["steps"]      # pydantic titles stripped
+
+    openai_fmt = object.__new__(selector._OpenAI)._format()["response_format"]
+    assert openai_fmt["json_schema"]["schema"]["additionalProperties"] is False
+    claude = object.__new__(selector._Claude)._tools()
+    assert claude["tool_choice"]["name"] == claude["tools"][0]["name"]
+
+
+def test_gemini_accepts_schema():
+    generation_types = pytest.importorskip("google.generativeai.types.generation_types")
+    cfg = object.__new__(selector._GeminiStudio)._config()
+    generation_types.to_generation_config_dict(cfg)       # raises on unknown keys
+
+
+def test_gemini_schema_only_on_sdks_that_take_it(monkeypatch):
+    old_sdk = frozenset({"candidate_count", "stop_sequences", "max_output_tokens",
+                         "temperature", "top_p", "top_k"})     # 0.4.x
+    monkeypatch.setattr(selector, "_gemini_config_keys", lambda: old_sdk)
+    cfg = object.__new__(selector._GeminiStudio)._config()
+    assert set(cfg) == {"temperature", "max_output_tokens"}
+
+
+@pytest.mark.asyncio
+async def test_retry_resends_only_json_and_errors(monkeypatch):
+    sent = []
+
+    class Fake:
+        name = "fixable"
+        async def chat(self, prompt, *, images=None):
+            sent.append((prompt, images))
+            return dict(DRAFT) if len(sent) > 1 else {"title": "only"}
+
+    monkeypatch.setattr(selector.settings, "dry_run", False)
+    monkeypatch.setattr(selector, "get_cache", lambda: None)
+    monkeypatch.setattr(selector, "CLIENTS", [Fake()])
+    monkeypatch.setattr(health, "BREAKERS", {})
+    monkeypatch.setattr(health, "RETRIES", {})
+
+    [(_, draft)] = await selector.complete_many("note " * 500, images=[])
+    assert draft == DRAFT
+    retry_prompt, retry_images = sent[1]
+    assert retry_images is None and "note" not in retry_prompt
+    assert '"title": "only"' in retry_prompt and "- steps: Field required" in retry_prompt
+
+    [row] = health.scoreboard(["fixable"])
+    assert row["retry_rate"] == 1.0
+    assert row["retry_bytes_avg"] == len(retry_prompt.encode())
@@ -0,0 +1,285 @@
+import asyncio
+import dataclasses
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+from bugbot.ingress import api, push, ui, uploads
+from bugbot.jira import outbox as outbox_mod
+from bugbot.jira.client import JiraClient
+from bugbot.ingress.schemas import TicketChoice
+from bugbot.ingress.store import get_store
+from bugbot.jira.outbox import DONE, FAILED, PENDING, SENDING, Outbox
+from bugbot.postprocess.hitl import DraftSessions
+
+DRAFT = {"title": "t", "steps": ["a"], "expected": "e", "actual": "x",
+         "severity": "minor", "attachments": []}
+
+
+class FakeJira:
+    """Jira that records creates; `lose` drops the response to the first one."""
+
+    def __init__(self, *, lose=False, status=201, flaky_upload=0):
+        self.issues, self.uploads, self.lose, self.status = {}, [], lose, status
+        self.props, self.searches = {}, []
+        self.flaky_upload = flaky_upload            # uploads that fail with 503
+
+    def handler(self, request):
+        if request.url.path == "/rest/api/2/issue":
+            if self.status >= 400:
+                return httpx.Response(self.status, text="nope")
+            body = json.loads(request.content)
+            key = f"BUG-{len(self.issues) + 1}"
+            self.issues[key] = body["fields"]
+            self.props[key] = {p["key"]: p["value"] for p in body.get("properties", [])}
+            if self.lose:
+                self.lose = False
+                return httpx.Response(502)
+            return httpx.Response(201, json={"key": key})
+        if request.url.path == "/rest/api/3/search/jql":
+            label = request.url.params["jql"].split('"')[1]
+            self.searches.append(label)
+            hits = [{"key": k} for k, f in self.issues.items() if label in f["labels"]]
+            return httpx.Response(200, json={"issues": hits})
+        if "/properties/" in request.url.path:
+            *_, key, _, name = request.url.path.split("/")
+            if name not in self.props.get(key, {}):
+                return httpx.Response(404)
+            return httpx.Response(200, json={"key": name, "value": self.props[key][name]})
+        if self.flaky_upload:
+            self.flaky_upload -= 1
+            return httpx.Response(503)
+        name = request.content.split(b'filename="')[1].split(b'"')[0].decode()
+        self.uploads.append((request.url.path, name))
+        return httpx.Response(200, json=[])
+
+    def client(self):
+        return JiraClient("https://jira.test", "u", "t", retries=0,
+                          transport=httpx.MockTransport(self.handler))
+
+
+@pytest.fixture
+def fake(monkeypatch, tmp_path):
+    monkeypatch.setattr(uploads, "UPLOAD_DIR", tmp_path / "uploads")
+    async def _record(key, draft, note=""):
+        pass
+    monkeypatch.setattr(outbox_mod, "record_ticket", _record)
+
+    def install(jira):
+        monkeypatch.setattr(outbox_mod, "get_jira", jira.client)
+        return jira
+    return install
+
+
+async def _settle(box, key, timeout=2.0):
+    async with asyncio.timeout(timeout):
+        while not (d := box.get(key)).is_final:
+            await asyncio.sleep(0.01)
+    return d
+
+
+@pytest.mark.asyncio
+async def test_same_key_files_one_issue(tmp_path, fake):
+    jira = fake(FakeJira())
+    shot = tmp_path / "a.png"
+    shot.write_bytes(b"png")
+    box = Outbox(tmp_path / "o.db")
+    first = box.enqueue("k1", "gpt", DRAFT, [shot])
+    again = box.enqueue("k1", "gpt", DRAFT, [shot])
+    assert first.status == again.status == PENDING
+    d = await _settle(box, "k1")
+    assert (d.status, d.issue_key) == (DONE, "BUG-1")
+    assert len(jira.issues) == 1
+    assert jira.uploads == [("/rest/api/2/issue/BUG-1/attachments", "a.png")]
+    assert jira.issues["BUG-1"]["labels"] == [d.label]
+    assert box.enqueue("k1", "gpt", DRAFT, [shot]).issue_key == "BUG-1"
+    assert box.stats()[DONE] == 1
+    await box.stop()
+
+
+@pytest.mark.asyncio
+async def test_lost_create_response_is_found_by_label(tmp_path, fake):
+    jira = fake(FakeJira(lose=True))
+    box = Outbox(tmp_path / "o.db", backoff=0.01, settle=0.3)
+    box.enqueue("k2", "gpt", DRAFT, [])
+    await asyncio.sleep(0.15)                     # retried, but not searched yet
+    d = box.get("k2")
+    (next_try,) = box.db.execute("SELECT next_try FROM outbox WHERE id = 'k2'").fetchone()
+    assert d.status == PENDING and next_try >= d.sent_at + 0.3 and not jira.searches
+    d = await _settle(box, "k2")
+    assert (d.status, d.issue_key, d.attempts) == (DONE, "BUG-1", 1)
+    assert len(jira.issues) == 1 and jira.props["BUG-1"]["bugbot.push"] == {"id": "k2"}
+    await box.stop()
+
+
+@pytest.mark.asyncio
+async def test_label_hit_of_another_push_is_not_taken(tmp_path, fake):
+    jira = fake(FakeJira())
+    client = jira.client()
+    await client.create_issue({"labels": ["bugbot-k8"]}, properties={"bugbot.push": {"id": "other"}})
+    await client.create_issue({"labels": ["bugbot-k9"]})          # predates the property
+    assert await client.find_issue("bugbot-k8", push_id="k8") is None
+    assert await client.find_issue("bugbot-k8") == "BUG-1"
+    assert await client.find_issue("bugbot-k9", push_id="k9") == "BUG-2"
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_client_errors_fail_without_retry(tmp_path, fake):
+    fake(FakeJira(status=400))
+    box = Outbox(tmp_path / "o.db", backoff=0.01)
+    box.enqueue("k3", "gpt", DRAFT, [])
+    d = await _settle(box, "k3")
+    assert d.status == FAILED and d.attempts == 1 and "400" in d.error
+    await box.stop()
+
+
+@pytest.mark.asyncio
+async def test_failed_push_is_sent_again_when_pushed_again(tmp_path, fake, monkeypatch):
+    jira = fake(FakeJira(status=400))
+    box = Outbox(tmp_path / "o.db", backoff=0.01, settle=0)
+    monkeypatch.setattr(push, "get_outbox", lambda: box)
+    item = ("gpt", DRAFT, None, "")
+    [d] = push.queue_pushes([item])
+    assert (await _settle(box, d.id)).status == FAILED
+    jira.status = 201                               # Jira is fixed; the tester clicks again
+    [again] = push.queue_pushes([item])
+    assert again.id == d.id and (again.status, again.attempts, again.error) == (PENDING, 0, None)
+    d = await _settle(box, d.id)
+    assert (d.status, d.issue_key) == (DONE, "BUG-1") and jira.searches == [d.label]
+    assert push.queue_pushes([item])[0].issue_key == "BUG-1"     # done stays done
+    await box.stop()
+
+
+@pytest.mark.asyncio
+async def test_interrupted_send_resumes_after_lease_expires(tmp_path, fake):
+    jira = fake(FakeJira())
+    path = tmp_path / "o.db"
+    Outbox(path).db.execute(
+        "INSERT INTO outbox (id, vendor, draft, files, status, created, next_try, "
+        "owner, lease_until) VALUES ('k4', 'gpt', ?, '[]', ?, 0, 0, 'dead', 0)",
+        (json.dumps(DRAFT), SENDING),
+    )
+    box = Outbox(path, settle=0)
+    box.start()
+    d = await _settle(box, "k4")
+    assert d.status == DONE and d.attempts == 1   # ⇒ label lookup first
+    assert len(jira.issues) == 1
+    await box.stop()
+
+
+@pytest.mark.asyncio
+async def test_failed_attachments_retry_alone_and_stay_referenced(tmp_path, fake, monkeypatch):
+    jira = fake(FakeJira(flaky_upload=1))
+    store = get_store()
+    a, b = store.put_bytes(b"one", ".png"), store.put_bytes(b"two", ".png")
+    store.acquire("push:k7", [a.name, b.name])
+    indexed = []
+
+    async def _record(key, draft, note=""):
+        indexed.append((key, note))
+    monkeypatch.setattr(outbox_mod, "record_ticket", _record)
+    box = Outbox(tmp_path / "o.db", backoff=0.2, workers=1)
+    box.enqueue("k7", "gpt", DRAFT, [a, b], "app crashed on save")
+    async with asyncio.timeout(2):
+        while not (d := box.get("k7")).attempts:
+            await asyncio.sleep(0.01)
+    assert d.status == PENDING and d.issue_key == "BUG-1" and len(d.files) == 1
+    assert store.stats()["referenced"] == 2           # nothing collectable yet
+    d = await _settle(box, "k7")
+    assert d.status == DONE and len(jira.issues) == 1 and indexed == [("BUG-1", "app crashed on save")]
+    assert sorted(name for _, name in jira.uploads) == sorted([a.name, b.name])
+    assert store.stats()["referenced"] == 0
+    await box.stop()
+
+
+def _seed(box, n):
+    """Pending rows written directly, without starting the workers."""
+    box.db.executemany(
+        "INSERT INTO outbox (id, vendor, draft, files, status, created, next_try) "
+        "VALUES (?, 'gpt', ?, '[]', ?, 0, 0)",
+        [(f"k{i}", json.dumps(DRAFT), PENDING) for i in range(n)],
+    )
+
+
+def test_live_lease_is_not_taken_over(tmp_path):
+    path = tmp_path / "o.db"
+    a, b = Outbox(path, batch=10), Outbox(path, batch=10)
+    _seed(a, 6)
+    mine = a._claim()
+    assert len(mine) == 6 and {d.owner for d in mine} == {mine[0].owner}
+    assert b._claim() == []                       # a's lease is live
+    assert Outbox(path).stats()[SENDING] == 6     # a new process resets nothing
+    stale = dataclasses.replace(mine[0], owner="lease-lost")
+    b._update(stale, status=DONE)                 # no longer that owner's row
+    assert a.get("k0").status == SENDING
+    a._unclaim(mine[0].owner)
+    assert [d.attempts for d in b._claim()] == [1] * 6
+
+
+def test_concurrent_claims_never_overlap(tmp_path):
+    path = tmp_path / "o.db"
+    _seed(Outbox(path), 200)
+    boxes = [Outbox(path, batch=7) for _ in range(4)]
+
+    def drain(box):
+        got = []
+        while batch := box._claim():
+            got += [d.id for d in batch]
+        return got
+
+    with ThreadPoolExecutor(4) as pool:
+        claimed = [i for got in pool.map(drain, boxes) for i in got]
+    assert len(claimed) == len(set(claimed)) == 200
+
+
+@pytest.mark.asyncio
+async def test_worker_survives_unexpected_errors(tmp_path, fake, monkeypatch):
+    jira = fake(FakeJira())
+    real_upload = outbox_mod.upload_attachments
+    calls = []
+
+    async def flaky_upload(*args):
+        calls.append(args)
+        if len(calls) == 1:
+            raise ConnectionResetError("boom")
+        return await real_upload(*args)
+
+    async def broken_index(key, draft, note=""):
+        raise httpx.ConnectError("embedder down")
+    monkeypatch.setattr(outbox_mod, "upload_attachments", flaky_upload)
+    monkeypatch.setattr(outbox_mod, "record_ticket", broken_index)
+    box = Outbox(tmp_path / "o.db", backoff=0.01, workers=1)
+    box.enqueue("k5", "gpt", DRAFT, [])
+    d = await _settle(box, "k5")
+    assert (d.status, d.issue_key, d.attempts) == (DONE, "BUG-1", 1)
+    box.enqueue("k6", "gpt", DRAFT, [])           # same worker, still running
+    assert (await _settle(box, "k6")).status == DONE
+    assert len(jira.issues) == 2
+    await box.stop()
+
+
+@pytest.mark.asyncio
+async def test_push_returns_before_jira_and_card_polls(tmp_path, fake, monkeypatch):
+    fake(FakeJira())
+    box = Outbox(tmp_path / "o.db")
+    monkeypatch.setattr(ui, "get_outbox", lambda: box)
+    monkeypatch.setattr(push, "get_outbox", lambda: box)
+    monkeypatch.setattr(ui, "get_sessions", lambda: sessions)
+    sessions = DraftSessions()
+    held = sessions.hold(TicketChoice(vendor="gpt", draft=DRAFT))
+    form = {"handle": held.handle, "title": "t", "steps": "a",
+            "expected": "e", "actual": "x", "severity": "minor"}
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+        r1 = await client.post("/push", data=form)
+        r2 = await client.post("/push", data=form)          # double-click
+        assert "Queued for JIRA" in r1.text and 'hx-trigger="every 1s"' in r1.text
+        [key] = [row[0] for row in box.db.execute("SELECT id FROM outbox")]
+        await _settle(box, key)
+        r3 = await client.get(f"/push/{key}")
+        assert "BUG-1" in r3.text and "hx-trigger" not in r3.text
+        assert (await client.get("/push/nope")).status_code == 404
+    assert r2.status_code == 200
+    await box.stop()
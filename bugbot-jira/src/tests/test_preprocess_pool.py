@@ -0,0 +1,29 @@
+import asyncio, math, threading, time
+import pytest
+from bugbot.preprocess.pool import PreprocessPool
+
+
+def _busy(seconds: float) -> str:
+    time.sleep(seconds)
+    return threading.current_thread().name
+
+
+@pytest.mark.asyncio
+async def test_thread_pool_bounded_and_timed():
+    pool = PreprocessPool("thread", workers=4, concurrency=2)
+    tasks = [asyncio.create_task(pool.run(_busy, 0.05)) for _ in range(4)]
+    await asyncio.sleep(0.01)
+    assert pool.stats()["running"] == 2 and pool.stats()["queued"] == 2
+    names = await asyncio.gather(*tasks)
+    assert all(n.startswith("bugbot-prep") for n in names)
+    st = pool.stats()
+    assert st["queued"] == st["running"] == 0
+    assert st["tasks"]["_busy"]["count"] == 4
+    pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_process_pool():
+    pool = PreprocessPool("process", workers=1)
+    assert await pool.run(math.factorial, 5) == 120
+    pool.shutdown()
@@ -0,0 +1,36 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from bugbot import warmup
+
+SRC = Path(__file__).resolve().parent.parent
+HEAVY = ("openai", "anthropic", "google.generativeai", "atlassian", "nltk")
+IMPORT_BUDGET_S = 2.0
+
+
+def test_api_import_is_lazy_and_fast(tmp_path):
+    code = (
+        "import sys, time\n"
+        "t = time.perf_counter()\n"
+        "import bugbot.ingress.api\n"
+        "print(time.perf_counter() - t)\n"
+        f"print(','.join(m for m in {HEAVY!r} if m in sys.modules))\n"
+    )
+    env = {k: v for k, v in os.environ.items() if not k.startswith("JIRA_")}
+    env.update(PYTHONPATH=str(SRC), DRY_RUN="false", OPENAI_KEY="sk-test")
+    out = subprocess.run(
+        [sys.executable, "-c", code], env=env, cwd=tmp_path,
+        capture_output=True, text=True, check=True,
+    ).stdout.split("\n")
+    assert out[1] == ""                       # no SDK / NLTK / Jira at import
+    assert float(out[0]) < IMPORT_BUDGET_S
+
+
+def test_warm_up_reports_each_step(monkeypatch):
+    monkeypatch.setattr(warmup, "_steps", lambda: [
+        ("ok", lambda: None),
+        ("broken", lambda: 1 / 0),
+    ])
+    assert set(warmup.warm_up()) == {"ok", "broken"}
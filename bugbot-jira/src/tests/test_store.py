@@ -0,0 +1,79 @@
+import base64
+import hashlib
+import io
+import os
+import time
+
+import httpx
+import pytest
+from fastapi import UploadFile
+from bugbot.ingress import api, push, uploads
+from bugbot.ingress.store import BlobStore, get_store
+from bugbot.ingress.uploads import ingest_many
+
+
+@pytest.mark.asyncio
+async def test_repeats_stored_once_in_shards(tmp_path):
+    shot = b"\x89PNG" + os.urandom(2000)
+    ups = [UploadFile(io.BytesIO(shot), filename=f"copy{i}.PNG") for i in range(5)]
+    stored = await ingest_many(ups, tmp_path)
+    assert len({s.path for s in stored}) == 1
+    digest = hashlib.sha256(shot).hexdigest()
+    assert stored[0].path.relative_to(tmp_path).parts == (digest[:2], digest[2:4], f"{digest}.png")
+    store = BlobStore(tmp_path)
+    assert store.stats() == {"blobs": 1, "bytes": len(shot), "referenced": 0}
+    assert list(store.tmp.iterdir()) == []
+
+
+def test_gc_by_age_and_size_spares_referenced(tmp_path):
+    store = BlobStore(tmp_path)
+    paths = [store.put_bytes(bytes([i]) * 100, ".png") for i in range(5)]
+    names = [p.name for p in paths]
+    old = time.time() - 1000
+    store._db.execute("UPDATE blobs SET last_used = ? WHERE name IN (?, ?)", (old, *names[:2]))
+    store.acquire("push:k", [names[0]])
+
+    # age: blob 1 is idle and unreferenced; blob 0 is idle but held
+    assert store.gc(max_bytes=10_000, max_age=500) == {"removed": 1, "freed": 100}
+    assert paths[0].exists() and not paths[1].exists()
+
+    # size: evict least recently used unreferenced blobs until under the cap
+    assert store.gc(max_bytes=250, max_age=10_000)["removed"] == 2
+    assert store.stats()["bytes"] == 200 and paths[0].exists()
+
+    store.release("push:k")
+    assert store.gc(max_bytes=0, max_age=10_000)["removed"] == 2
+    assert store.stats()["blobs"] == 0
+
+
+def test_data_uri_push_goes_into_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(uploads, "UPLOAD_DIR", tmp_path)
+    png = b"\x89PNG-inline"
+    uri = "data:image/png;base64," + base64.b64encode(png).decode()
+    [a, b] = push.attachment_paths([uri, uri])
+    assert a == b and a.read_bytes() == png and a.is_relative_to(tmp_path)
+    for bad in ["../../etc/passwd", "index.sqlite3", "data:png;base64,AAAA",
+                "data:image/png;base64,not base64!"]:
+        with pytest.raises(ValueError):
+            push.attachment_paths([bad])
+
+
+def test_suffix_is_normalised_to_a_content_id(tmp_path):
+    store = BlobStore(tmp_path)
+    for suffix, kept in [(".PNG", ".png"), (".averylongsuffix", ""), (".p g", "")]:
+        path = store.put_bytes(suffix.encode(), suffix)
+        assert path.suffix == kept and path.parent.parent.parent == tmp_path
+
+
+@pytest.mark.asyncio
+async def test_bulk_push_rejects_bad_attachments_with_422(tmp_path, monkeypatch):
+    monkeypatch.setattr(uploads, "UPLOAD_DIR", tmp_path)
+    good = get_store().put_bytes(b"png", ".png").name
+    draft = {"title": "t", "steps": ["a"], "expected": "e", "actual": "x", "severity": "minor"}
+    items = [{"vendor": "gpt", "draft": {**draft, "attachments": [good]}},
+             {"vendor": "gpt", "draft": {**draft, "attachments": ["data:;base64,AAAA"]}}]
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+        r = await client.post("/push/bulk", json=items)
+    assert r.status_code == 422 and "data URI" in r.json()["detail"]
+    assert get_store().stats()["referenced"] == 0      # nothing pinned
@@ -1,4 +1,30 @@
-from bugbot.preprocess import clean_freeform, split_sentences
+import re
+import unicodedata
+
+import emoji
+from bugbot.preprocess import clean_freeform, clean_freeform_many, split_sentences
+
+
+def _reference(raw, drop_stopwords=False):
+    # clean_freeform before the ASCII fast path / batch API
+    text = unicodedata.normalize("NFKC", raw)
+    text = emoji.demojize(text, delimiters=(":", ":"))
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    text = text.lower()
+    if drop_stopwords:
+        text = " ".join(w for w in text.split() if w not in {"the", "and", "to", "a", "of", "in"})
+    return re.sub(r"\s+", " ", text).strip()
+
+
+NOTES = [
+    "",
+    "  OMG 😱 Page CRASHED!!!   ",
+    "Tabs\tand\x1cseparators\x0b\x0cand\r\nCRLF",
+    "café ﬁle\u00a0NBSP e\u0301 ½",
+    "Keycap 1️⃣ and flag 🇱🇻\nsecond line 👩‍💻\nTraceback:\n  File \"a.py\"",
+    "NUL\x00inside 🚀",
+    "The cause of the crash and a fix to it",
+]
 
 
 def test_cleaner_basic():
@@ -9,3 +35,15 @@ def test_cleaner_basic():
 def test_sentence_split():
     txt = "Step 1: open app. Step 2: click ✅."
     assert split_sentences(txt) == ["Step 1: open app.", "Step 2: click ✅."]
+
+
+def test_fast_paths_match_reference():
+    for drop in (False, True):
+        expected = [_reference(n, drop) for n in NOTES]
+        assert [clean_freeform(n, drop_stopwords=drop) for n in NOTES] == expected
+        assert clean_freeform_many(NOTES, drop_stopwords=drop) == expected   # NUL → per-note
+
+
+def test_batch_shares_one_unicode_pass():
+    notes = [n for n in NOTES if "\x00" not in n] * 3
+    assert clean_freeform_many(notes) == [_reference(n) for n in notes]
@@ -0,0 +1,28 @@
+import hashlib, io
+import pytest
+from fastapi import HTTPException, UploadFile
+from bugbot.ingress.store import get_store
+from bugbot.ingress.uploads import ingest, ingest_many
+
+
+@pytest.mark.asyncio
+async def test_ingest_streams_and_hashes(tmp_path):
+    data = b"\x89PNG" + bytes(range(256)) * 10_000
+    up = UploadFile(io.BytesIO(data), filename="Shot.PNG")
+    stored = await ingest(up, tmp_path)
+    digest = hashlib.sha256(data).hexdigest()
+    assert stored.path == tmp_path / digest[:2] / digest[2:4] / f"{digest}.png"
+    assert stored.size == len(data)
+    assert stored.sha256 == hashlib.sha256(data).hexdigest()
+
+
+@pytest.mark.asyncio
+async def test_oversized_upload_rejected_and_cleaned(tmp_path):
+    ok = UploadFile(io.BytesIO(b"x" * 10), filename="a.png")
+    big = UploadFile(io.BytesIO(b"x" * 5000), filename="b.png")
+    with pytest.raises(HTTPException) as exc:
+        await ingest(big, tmp_path, max_bytes=1000)
+    assert exc.value.status_code == 413
+    assert list((tmp_path / "tmp").iterdir()) == []
+    assert get_store(tmp_path).stats()["blobs"] == 0
+    assert len(await ingest_many([ok], tmp_path)) == 1
@@ -1,6 +1,6 @@
 import numpy as np, cv2, os
 from pathlib import Path
-from bugbot.preprocess import encode_screenshot, keyframes
+from bugbot.preprocess import encode_screenshot, keyframes, load_attachment, scene_keyframes
 
 def test_encode_screenshot(tmp_path: Path):
     img = np.full((50, 50, 3), (0, 0, 255), dtype=np.uint8)   # red square
@@ -21,3 +21,64 @@ def test_keyframes_sample(tmp_path: Path):
 
     frames = keyframes(vid, every=1.0, max_frames=4)
     assert len(frames) == 3                 # 0 s, 1 s, 2 s
+
+def test_attachment_loaded_once(tmp_path: Path):
+    img = np.zeros((30, 50, 3), np.uint8)
+    for ext, mime in ((".png", "image/png"), (".jpg", "image/jpeg"), (".bmp", "image/png")):
+        f = tmp_path / f"shot{ext}"
+        cv2.imwrite(str(f), img)
+        att = load_attachment(f)
+        assert (att.mime, att.width, att.height) == (mime, 50, 30)
+        assert att.data_uri.startswith(f"data:{mime};base64,")
+        known = load_attachment(f, sha256="ab" * 32)    # digest from the store
+        assert known.sha256 == ("ab" * 32 if ext != ".bmp" else att.sha256)
+
+def test_keyframes_modes_agree(tmp_path: Path):
+    vid = tmp_path / "counter.avi"
+    out = cv2.VideoWriter(str(vid), cv2.VideoWriter_fourcc(*"MJPG"), 30, (64, 64))
+    for i in range(300):                    # 10 s, every frame a distinct grey
+        out.write(np.full((64, 64, 3), i % 250, np.uint8))
+    out.release()
+
+    ref = keyframes(vid, every=2.0, mode="decode")
+    assert len(ref) == 5
+    assert keyframes(vid, every=2.0, mode="grab") == ref
+    assert keyframes(vid, every=2.0, mode="seek") == ref
+
+def test_scene_keyframes_catches_flash_and_dedups(tmp_path: Path):
+    vid = tmp_path / "flash.avi"
+    out = cv2.VideoWriter(str(vid), cv2.VideoWriter_fourcc(*"MJPG"), 20, (128, 96))
+    desktop = np.full((96, 128, 3), 230, np.uint8)
+    dialog = desktop.copy()
+    cv2.rectangle(dialog, (30, 20), (100, 70), (0, 0, 200), -1)   # crash dialog
+    for i in range(120):                    # 6 s; dialog visible 2.1 s – 2.4 s
+        out.write(dialog if 42 <= i < 48 else desktop)
+    out.release()
+
+    assert len(keyframes(vid, every=2.0)) == 3          # interval sampling misses it
+    frames = scene_keyframes(vid, sample_every=0.25)
+    assert len(frames) == 2                             # desktop + dialog, no repeats
+
+def test_apply_policy_right_sizes(tmp_path: Path):
+    from bugbot.preprocess.vision import Attachment, ImagePolicy, apply_policy
+
+    rng = np.random.default_rng(0)
+    big = rng.integers(0, 255, (1800, 3200, 3), dtype=np.uint8)
+    att = Attachment.from_bytes(cv2.imencode(".png", big)[1].tobytes())
+    out = apply_policy(att, ImagePolicy(max_edge=1568, mime="image/jpeg"))
+    assert (out.mime, out.width, out.height) == ("image/jpeg", 1568, 882)
+    assert len(out.raw) < len(att.raw)
+
+    small = Attachment.from_bytes(cv2.imencode(".jpg", big[:100, :100])[1].tobytes())
+    assert apply_policy(small, ImagePolicy(max_edge=1568)) is small
+    png = Attachment.from_bytes(cv2.imencode(".png", big[:100, :100])[1].tobytes())
+    assert apply_policy(png, ImagePolicy(max_edge=1568)) is png     # no lossy re-encode
+    assert apply_policy(png, ImagePolicy(max_edge=50)).mime == "image/jpeg"
+
+    text = np.full((400, 600, 3), 255, np.uint8)
+    cv2.putText(text, "Traceback (most recent call last)", (10, 200),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 0), 2)
+    shot = Attachment.from_bytes(cv2.imencode(".jpg", text)[1].tobytes())
+    grey = apply_policy(shot, ImagePolicy(grayscale="auto", quality=95))
+    decoded = cv2.imdecode(np.frombuffer(grey.raw, np.uint8), cv2.IMREAD_UNCHANGED)
+    assert decoded.ndim == 2